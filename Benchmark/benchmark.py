@@ -0,0 +1,195 @@
+# Benchmark of build time, solve time, memory and gap for the models in this repository, on synthetic instances of increasing size
+# Each run generates its data with a seeded generator, then runs the model's own Main() in a fresh Python process, with profiling on
+# Results are appended to a results file, and compared with a stored baseline to flag regressions
+# Usage: python benchmark.py   (edit the globals at the bottom to choose the models, sizes and time limit)
+
+# Import dependencies
+import pandas as pd
+import numpy as np
+import datetime as dt
+import importlib.util
+import subprocess
+import contextlib
+import tempfile
+import shutil
+import json
+import sys
+import os
+import io
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Tools'))   # Shared helpers
+import profiler
+from highs_log import SolveSummary
+from generators import PaperItems, WirePieces, MarketData
+
+Root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Models that can be benchmarked: the script, the generator and data file name for its instances, and the default sizes
+# The paper coverage models have O(n^2) candidates, so they are kept to smaller sizes by default
+# Settings are globals of the script to set for that entry, e.g. to compare the GDP formulations or the wire cutting symmetry breaking
+# (gdp and hangs use their defaults)
+Models = {'gdp':      {'Script': os.path.join(Root, 'GDP', 'gdp.py'), 'Generator': PaperItems, 'Data': 'items.xlsx', 'Sizes': [10, 30, 100]},
+          'model-3':  {'Script': os.path.join(Root, 'HiGHS-testing', 'Presolve', 'model-3-cloud.py'), 'Generator': PaperItems, 'Data': 'items.xlsx', 'Sizes': [10, 30, 100]},
+          'hangs':    {'Script': os.path.join(Root, 'HiGHS-testing', 'Hangs', 'hangs.py'), 'Generator': WirePieces, 'Data': 'pieces.json', 'Sizes': [10, 30, 100, 300, 1000]},
+          'gdp-binary': {'Script': os.path.join(Root, 'GDP', 'gdp.py'), 'Generator': PaperItems, 'Data': 'items.xlsx', 'Sizes': [10, 30, 60, 100], 'Settings': {'Formulation': 'binary'}},
+          'gdp-hull': {'Script': os.path.join(Root, 'GDP', 'gdp.py'), 'Generator': PaperItems, 'Data': 'items.xlsx', 'Sizes': [10, 30, 60], 'Settings': {'Formulation': 'hull'}},
+          'hangs-none': {'Script': os.path.join(Root, 'HiGHS-testing', 'Hangs', 'hangs.py'), 'Generator': WirePieces, 'Data': 'pieces.json', 'Sizes': [10, 30, 100], 'Settings': {'Symmetry': 'none'}},
+          'hangs-load': {'Script': os.path.join(Root, 'HiGHS-testing', 'Hangs', 'hangs.py'), 'Generator': WirePieces, 'Data': 'pieces.json', 'Sizes': [10, 30, 100], 'Settings': {'Symmetry': 'load'}},
+          'hangs-lex':  {'Script': os.path.join(Root, 'HiGHS-testing', 'Hangs', 'hangs.py'), 'Generator': WirePieces, 'Data': 'pieces.json', 'Sizes': [10, 30, 100], 'Settings': {'Symmetry': 'lex'}},
+          'patterns': {'Script': os.path.join(Root, 'HiGHS-testing', 'Hangs', 'hangs.py'), 'Generator': WirePieces, 'Data': 'pieces.json', 'Sizes': [100, 300, 1000, 3000]},
+          'dispatch': {'Script': os.path.join(Root, 'HiGHS-testing', 'Case-001', 'model-1.py'), 'Generator': MarketData, 'Data': 'market.json', 'Sizes': [10, 100, 1000]}}
+
+BuildPhases = ['Model data', 'Define model', 'Define matrix', 'Translate']   # Top-level profile phases that count as build time
+TransformPhases = ['Define model/Transformation']   # Profile phases, within the build, that transform the model, e.g. GDP to MIP
+SolvePhases = ['Solve', 'Column generation', 'Integer master']   # Top-level profile phases that count as solve time
+
+# Import a model script as a module, without running its Main(). The script's folder is on the path, for any modules next to it
+def LoadScript(Path):
+    sys.path.insert(0, os.path.dirname(Path))
+    Spec = importlib.util.spec_from_file_location('benchmarked', Path)
+    Module = importlib.util.module_from_spec(Spec)
+    Spec.loader.exec_module(Module)
+    return Module
+
+# Set the script's globals for a quiet, profiled run on the generated data
+def Configure(Name, Module, DataFile, Size, TimeLimit):
+    Module.Verbose = False
+    Module.Profile = True
+    Module.ProfileFile = None   # Keep the profile records in memory only
+    Module.UseCache = False   # Build and solve every run, rather than reading a cached solution (no effect on the dispatch model, which has no cache)
+    if Name in ['gdp', 'gdp-binary', 'gdp-hull', 'model-3']:
+        Module.DataFile = DataFile
+        Module.DataWorksheet = 'Data'
+        Module.ProductsMin = Module.ProductsMax = min(Orders, Size)
+        Module.TimeLimit = TimeLimit
+    elif Name in ['hangs', 'hangs-none', 'hangs-load', 'hangs-lex', 'patterns']:
+        Module.DataFilename = DataFile
+        Module.TimeLimit = TimeLimit
+        Module.WriteFile = False
+        Module.PrintMatrix = False
+        Module.Method = 'patterns' if Name == 'patterns' else 'assignment'
+    elif Name == 'dispatch':
+        Module.DataFilename = DataFile   # Time limit is in the data file
+    for Setting, Value in Models[Name].get('Settings', {}).items():
+        setattr(Module, Setting, Value)
+
+# Runs in the child process: generate the instance in WorkDir, run the model, and return one row of results
+def RunChild(Name, Size, Seed, TimeLimit, WorkDir):
+    os.chdir(WorkDir)   # The solver's log file is written here
+    Model = Models[Name]
+    if Name == 'dispatch':
+        Model['Generator'](Size, Seed, Model['Data'], TimeLimit)
+    else:
+        Model['Generator'](Size, Seed, Model['Data'])
+    Module = LoadScript(Model['Script'])
+    Configure(Name, Module, Model['Data'], Size, TimeLimit)
+    with contextlib.redirect_stdout(io.StringIO()):   # The model's own output isn't needed
+        Module.Main()
+
+    Phases = {}
+    for Record in profiler.Records:
+        if '/' not in Record['Phase'] or Record['Phase'] in TransformPhases:
+            Phases[Record['Phase']] = Phases.get(Record['Phase'], 0) + Record['Wall (s)']
+    Summary = SolveSummary('highs.log')
+    return {'Model': Name,
+            'Size': Size,
+            'Seed': Seed,
+            'Status': Summary['Status'],
+            'Load (s)': Phases.get('Load data', 0),
+            'Build (s)': sum(Phases.get(Phase, 0) for Phase in BuildPhases),
+            'Transform (s)': sum(Phases.get(Phase, 0) for Phase in TransformPhases),
+            'Solve (s)': sum(Phases.get(Phase, 0) for Phase in SolvePhases),
+            'Peak RSS (MB)': max(Record['Peak RSS (MB)'] for Record in profiler.Records),
+            'Rows': Summary['Rows'],
+            'Cols': Summary['Cols'],
+            'Nonzeros': Summary['Nonzeros'],
+            'Objective': Summary['Objective'],
+            'Bound': Summary['Bound'],
+            'Gap': Summary['Gap'],
+            'Nodes': Summary['Nodes']}
+
+# Run one model and size in a fresh Python process, so that peak memory is for that run alone
+def RunCase(Name, Size):
+    WorkDir = tempfile.mkdtemp(prefix = 'benchmark-')
+    try:
+        Child = subprocess.run([sys.executable, os.path.abspath(__file__), 'child', Name, str(Size), str(Seed), str(TimeLimit), WorkDir],
+                               capture_output = True, text = True, timeout = 3 * TimeLimit + 300)
+        if Child.returncode == 0:
+            return json.loads(Child.stdout.strip().splitlines()[-1])
+        Error = (Child.stderr.strip().splitlines() or ['no output'])[-1]
+    except subprocess.TimeoutExpired:
+        Error = 'timed out'
+    finally:
+        shutil.rmtree(WorkDir, ignore_errors = True)
+    print(f'{Name} {Size}: failed, {Error}')
+    return {'Model': Name, 'Size': Size, 'Seed': Seed, 'Status': 'Failed'}
+
+# Commit of the code being benchmarked, if this is a git repository
+def GitCommit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd = Root, capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# Compare results with the baseline, returning one row for each metric that is worse than the baseline by more than the tolerance
+# Small absolute changes are ignored, as timings of short runs are noisy
+def Regressions(Results, Baseline):
+    Merged = Results.merge(Baseline, on = ['Model', 'Size', 'Seed'], suffixes = ('', ' baseline'))
+    Rows = []
+    for Metric, Floor in [('Build (s)', 0.5), ('Transform (s)', 0.5), ('Solve (s)', 0.5), ('Peak RSS (MB)', 20), ('Gap', 0.001)]:
+        if Metric not in Merged or Metric + ' baseline' not in Merged:
+            continue
+        New, Old = Merged[Metric].astype(float), Merged[Metric + ' baseline'].astype(float)
+        Limit = Old + 0.001 if Metric == 'Gap' else Old * (1 + Tolerance)
+        Worse = (New > Limit) & (New - Old > Floor)
+        for k in np.flatnonzero(Worse.to_numpy()):
+            Rows.append({'Model': Merged['Model'].iloc[k], 'Size': Merged['Size'].iloc[k], 'Metric': Metric, 'Baseline': Old.iloc[k], 'Now': New.iloc[k]})
+    Failed = Merged[(Merged['Status'] == 'Failed') & (Merged['Status baseline'] != 'Failed')]
+    for k in range(0, len(Failed)):
+        Rows.append({'Model': Failed['Model'].iloc[k], 'Size': Failed['Size'].iloc[k], 'Metric': 'Status', 'Baseline': Failed['Status baseline'].iloc[k], 'Now': 'Failed'})
+    return pd.DataFrame(Rows, columns = ['Model', 'Size', 'Metric', 'Baseline', 'Now'])
+
+def Main():
+    Rows = []
+    for Name in RunModels:
+        for Size in (Sizes or Models[Name]['Sizes']):
+            print(f'Running {Name}, size {Size}')
+            Rows.append(RunCase(Name, Size))
+    Results = pd.DataFrame(Rows)
+    Results.insert(0, 'Run', dt.datetime.now().isoformat(timespec = 'seconds'))
+    Results.insert(1, 'Commit', GitCommit())
+    pd.options.display.float_format = '{:,.2f}'.format
+    pd.set_option('display.width', 200)
+    print()
+    print(Results.drop(columns = ['Run', 'Commit']).to_string(index = False))
+
+    Results.to_csv(ResultsFile, mode = 'a', header = not os.path.exists(ResultsFile), index = False)
+    if SaveBaseline:
+        Results.to_csv(BaselineFile, index = False)
+        print(f'\nSaved as baseline: {BaselineFile}')
+    elif os.path.exists(BaselineFile):
+        Found = Regressions(Results, pd.read_csv(BaselineFile))
+        if len(Found) == 0:
+            print('\nNo regressions against the baseline')
+        else:
+            print(f'\nRegressions against the baseline (tolerance {Tolerance:.0%}):')
+            print(Found.to_string(index = False))
+            sys.exit(1)
+    else:
+        print('\nNo baseline to compare with. Set SaveBaseline = True to store these results as the baseline')
+
+# Globals
+RunModels = ['dispatch', 'hangs', 'patterns', 'model-3', 'gdp']   # Models to run, from Models above
+Sizes = None   # List of sizes for every model, e.g. [10, 100, 1000], or None for each model's default sizes
+Seed = 0   # Seed for the instance generators
+TimeLimit = 60   # seconds, for each solve
+Orders = 6   # Order size for the paper coverage models
+Tolerance = 0.25   # Flag a regression when a metric is this much worse than the baseline
+SaveBaseline = False   # Store this run's results as the baseline, rather than comparing with it
+ResultsFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results.csv')   # Results of every run, appended
+BaselineFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.csv')
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'child':
+        print(json.dumps(RunChild(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]), float(sys.argv[5]), sys.argv[6])))
+    else:
+        Main()
@@ -0,0 +1,88 @@
+# Seeded generators of synthetic instances for the models in this repository, written in the same file format as each model's sample data
+# The same size and seed always give the same instance, so runs can be compared over time
+
+import json
+import numpy as np
+from openpyxl import Workbook
+from openpyxl.workbook.defined_name import DefinedName
+
+# Paper coverage items (gdp.py and model-3-cloud.py): width <= length, with sizes and weights like the sample data
+# Writes a workbook with the same layout as data-20-unsorted.xlsx: sheet 'Data', named ranges Width, Length and Weight
+def PaperItems(n, Seed, FileName):
+    rng = np.random.default_rng(Seed)
+    Sides = rng.integers(200, 1001, size = (n, 2))
+    Width, Length = Sides.min(axis = 1), Sides.max(axis = 1)
+    Weight = rng.random(n) + 0.1
+    Weight = np.round(Weight / Weight.sum(), 4)
+    Book = Workbook()
+    Sheet = Book.active
+    Sheet.title = 'Data'
+    Sheet['A1'] = 'Paper data'
+    Sheet.append([])
+    Sheet.append([])
+    Sheet.append(['Item', 'Width', 'Length', 'Weight'])
+    for i in range(0, n):
+        Sheet.append([i + 1, int(Width[i]), int(Length[i]), float(Weight[i])])
+    for Name, Column in [('Width', 'B'), ('Length', 'C'), ('Weight', 'D')]:
+        Book.defined_names[Name] = DefinedName(Name, attr_text = f'Data!${Column}$5:${Column}${4 + n}')
+    Book.save(FileName)
+
+# Wire cutting pieces and stock (hangs.py): pieces of 500 to 3,500 mm in steps of 10 mm, with enough 10,000 mm stock items to cut them all,
+# plus a few shorter stock items, like data-100.json. The first stock item is excluded from the objective (UseOne = 0)
+def WirePieces(n, Seed, FileName):
+    rng = np.random.default_rng(Seed)
+    Required = rng.integers(50, 351, n) * 10
+    Full = int(np.ceil(Required.sum() / 10000 * 1.15)) + 1
+    Short = rng.integers(220, 700, 3) * 10
+    Lengths = [10000] * Full + sorted(Short.tolist(), reverse = True)
+    Data = {'UseOne': [0],
+            'Stock': {str(s + 1): {'Lengths': int(Lengths[s]), 'MustUse': 0} for s in range(0, len(Lengths))},
+            'Demand': {str(p + 1): {'Required': int(Required[p])} for p in range(0, n)}}
+    with open(FileName, 'w') as f:
+        json.dump(Data, f, indent = 4)
+
+# Generator dispatch market (Case-001 model-1.py): n generators with a spread of costs and capacities, and demand at 70% of total capacity
+def MarketData(n, Seed, FileName, TimeLimit = 60):
+    rng = np.random.default_rng(Seed)
+    VarCost = np.round(rng.gamma(2, 25, n), 2)
+    GMax = np.round(rng.integers(50, 501, n).astype(float), 2)
+    GMin = np.where(rng.random(n) < 0.2, np.round(GMax * 0.2, 2), 0.0)   # Some generators have a must-run minimum
+    Data = {'Name': 'Synthetic ' + str(n),
+            'Demand': round(float(GMax.sum() * 0.7), 2),
+            'Generators': {'G' + str(g + 1): {'VarCost': float(VarCost[g]), 'GMin': float(GMin[g]), 'GMax': float(GMax[g])} for g in range(0, n)},
+            'VarInitial': 0,
+            'VarLBounds': 0,
+            'VarUBounds': float(GMax.max()),
+            'Engine': 'appsi_highs',
+            'TimeLimit': TimeLimit}
+    with open(FileName, 'w') as f:
+        json.dump(Data, f, indent = 4)
+
+# Demand and cost scenarios for the dispatch model's batch mode (model-1.py with ScenarioFile set): demand from 50% to 110% of the demand in the
+# data file, and each generator's cost scaled by a random factor around 1. Written as CSV, one row per scenario, with a column for each generator
+def MarketScenarios(DataFile, n, Seed, FileName):
+    rng = np.random.default_rng(Seed)
+    with open(DataFile, 'r') as f:
+        Data = json.load(f)
+    Generators = list(Data['Generators'])
+    Cost = np.array([Data['Generators'][g]['VarCost'] for g in Generators])
+    with open(FileName, 'w') as f:
+        f.write(','.join(['Demand'] + Generators) + '\n')
+        for Start in range(0, n, 100000):   # In blocks, so that large files don't need all scenarios in memory
+            m = min(100000, n - Start)
+            Demand = np.round(Data['Demand'] * rng.uniform(0.5, 1.1, m), 2)
+            Costs = np.round(Cost * rng.lognormal(0, 0.2, (m, len(Generators))), 2)
+            np.savetxt(f, np.column_stack((Demand, Costs)), delimiter = ',', fmt = '%.2f')
+
+# TV breaks for the slot filling model's batch mode (tv_slots/slot_filling.py with BreaksFile set): targets from 2 to 4 minutes, as hh:mm:ss;ff
+# at the frame rate of the workbooks, with a break name. Written as CSV, one row per break
+def SlotBreaks(n, Seed, FileName, FrameRate = 29.98):
+    rng = np.random.default_rng(Seed)
+    with open(FileName, 'w') as f:
+        f.write('Name,Target\n')
+        for Start in range(0, n, 100000):   # In blocks, so that large files don't need all breaks in memory
+            m = min(100000, n - Start)
+            Seconds = rng.integers(120, 240, m)
+            Extra = rng.integers(0, int(FrameRate), m)
+            Lines = [f'B{Start + b + 1},{Seconds[b] // 3600:02d}:{Seconds[b] // 60 % 60:02d}:{Seconds[b] % 60:02d};{Extra[b]:02d}' for b in range(0, m)]
+            f.write('\n'.join(Lines) + '\n')
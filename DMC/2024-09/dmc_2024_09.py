@@ -2,6 +2,10 @@
 # Code generated by Copilot, with corrections by SolverMax
 
 from pyomo.environ import *
+import os.path
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Tools'))   # Shared helpers
+from exact import BalancedPurchase
 
 # Create a model
 model = ConcreteModel()
@@ -14,6 +18,10 @@ boats = {
     'Classy': {'manufacturer': 'Racer', 'cost': 9000, 'seating': 6, 'profit': 110}
 }
 
+budget = 420000
+min_boats = 50
+min_capacity = 200
+
 # Define decision variable
 model.num_boats = Var(boats.keys(), within=NonNegativeIntegers)
 
@@ -21,15 +29,22 @@ model.num_boats = Var(boats.keys(), within=NonNegativeIntegers)
 model.profit = Objective(expr=sum(boats[b]['profit'] * model.num_boats[b] for b in boats), sense=maximize)
 
 # Constraints
-model.cost_constraint = Constraint(expr=sum(boats[b]['cost'] * model.num_boats[b] for b in boats) <= 420000)
-model.boat_constraint = Constraint(expr=sum(model.num_boats[b] for b in boats) >= 50)
+model.cost_constraint = Constraint(expr=sum(boats[b]['cost'] * model.num_boats[b] for b in boats) <= budget)
+model.boat_constraint = Constraint(expr=sum(model.num_boats[b] for b in boats) >= min_boats)
 model.goodwill_constraint = Constraint(expr=sum(model.num_boats[b] for b in boats if boats[b]['manufacturer'] == 'Sleekboat') == 
                                             sum(model.num_boats[b] for b in boats if boats[b]['manufacturer'] == 'Racer'))
-model.capacity_constraint = Constraint(expr=sum(boats[b]['seating'] * model.num_boats[b] for b in boats) >= 200)
-
-# Solve the model
-solver = SolverFactory('glpk')
-solver.solve(model)
+model.capacity_constraint = Constraint(expr=sum(boats[b]['seating'] * model.num_boats[b] for b in boats) >= min_capacity)
+
+# Solve the model. With two manufacturers and the same number of boats from each, it is small enough to solve exactly by enumeration,
+# in about a millisecond, which is much faster than launching GLPK. If the data doesn't have that structure, solve with GLPK
+exact = BalancedPurchase([boats[b]['cost'] for b in boats], [boats[b]['seating'] for b in boats], [boats[b]['profit'] for b in boats],
+                         [boats[b]['manufacturer'] for b in boats], budget, min_boats, min_capacity)
+if exact is not None:
+    for b, count in zip(boats, exact[0]):
+        model.num_boats[b].set_value(int(count))
+else:
+    solver = SolverFactory('glpk')
+    solver.solve(model)
 
 # Display the results
 for b in boats:
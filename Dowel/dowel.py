@@ -0,0 +1,348 @@
+# Dowel cutting
+# Cut pieces from dowels, using as little dowel length as possible. Uses the same data as the wire cutting model (HiGHS-testing/Hangs/hangs.py),
+# i.e. Stock (Lengths, MustUse) and Demand (Required) in a JSON file, or the pieces listed in Dowel-cutting-results.xlsx
+# Solved as a pattern model: how many times to cut each pattern, where a pattern is a count of each piece length cut from one stock length
+# The patterns depend only on the stock length and the piece lengths, not on how many of each piece are needed, so they are generated once
+# and cached on disk. A rerun with new quantities of the same lengths only solves the pattern model again
+
+# Import dependencies
+
+import highspy
+import numpy as np
+import functools
+import hashlib
+import json
+import os.path
+import sys
+import time as tm
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Tools'))   # Shared helpers
+from excel_data import LoadRanges
+from profiler import StartProfile, ProfilePhase, Profiled, WriteProfile
+
+PatternFolder = os.path.join('.cache', 'patterns')   # In the working directory
+
+# Get data
+
+# Data in the wire cutting model's form. The workbook has the pieces (Results!B5:B154) but not the dowel length, so each piece gets
+# a dowel of DowelLength, which is always enough
+@Profiled('Load data')
+def GetData(DataFilename):
+    if os.path.splitext(DataFilename)[1].lower() == '.json':
+        with open(DataFilename, 'r') as f:
+            Data = json.load(f)
+        return Data
+    Pieces = LoadRanges(DataFilename, ['B5:B154'], 'Results')['B5:B154'][0].dropna().to_numpy()
+    return {'UseOne': [1],
+            'Stock': {str(s + 1): {'Lengths': DowelLength, 'MustUse': 0} for s in range(0, len(Pieces))},
+            'Demand': {str(p + 1): {'Required': float(Pieces[p])} for p in range(0, len(Pieces))}}
+
+# Lengths as whole numbers of a common unit: the fewest decimal places that makes them whole, divided by their greatest common divisor,
+# so that the pattern tables are as small as possible. Returns the lengths in units, and the size of the unit
+def WholeLengths(Lengths, MaxDecimals = 4):
+    for Decimals in range(0, MaxDecimals + 1):
+        Scaled = np.asarray(Lengths, dtype = np.float64) * 10**Decimals
+        if np.all(np.abs(Scaled - np.round(Scaled)) < 1e-6):
+            Whole = np.round(Scaled).astype(np.int64)
+            Unit = int(np.gcd.reduce(Whole))
+            return Whole // Unit, Unit / 10**Decimals
+    raise ValueError(f'Lengths must have at most {MaxDecimals} decimal places')
+
+# Patterns
+
+# Number of maximal patterns: Count[i, r] is the number of ways to cut pieces i onwards (any number of each) from room r, leaving less room
+# than the shortest piece, so that no piece could be added. Counted as floats, as the number can be far too large to enumerate
+def PatternCounts(Weights, Capacity):
+    n = len(Weights)
+    Count = np.zeros((n + 1, Capacity + 1))
+    Count[n, :min(int(Weights.min()), Capacity + 1)] = 1
+    for i in range(n - 1, -1, -1):
+        Count[i] = Count[i + 1]
+        w = int(Weights[i])
+        for Start in range(w, Capacity + 1, w):   # Count[i, r] = Count[i + 1, r] + Count[i, r - w], a block of w rooms at a time
+            End = min(Start + w, Capacity + 1)
+            Count[i, Start:End] += Count[i, Start - w:End - w]
+    return Count
+
+# Every maximal pattern, as a Patterns x Pieces array of counts, by a recursive generator memoized on (piece, room left), so each
+# (piece, room) combination is generated once however many ways it is reached. Branches with no maximal pattern are skipped using Count
+def MaximalPatterns(Weights, Capacity, Count):
+    n = len(Weights)
+
+    @functools.lru_cache(maxsize = None)
+    def Generate(i, Room):
+        if i == n:
+            return np.zeros((1, 0), dtype = np.int32)
+        Blocks = []
+        for c in range(0, Room // int(Weights[i]) + 1):
+            Left = Room - c * int(Weights[i])
+            if Count[i + 1, Left] > 0:
+                Rest = Generate(i + 1, Left)
+                Blocks.append(np.column_stack((np.full(len(Rest), c, dtype = np.int32), Rest)))
+        return np.vstack(Blocks)
+
+    return Generate(0, Capacity)
+
+# Fill the room left in a pattern with the longest pieces that fit, up to Bounds of each, so that patterns from column generation are maximal
+# among the patterns within those bounds
+def FillPattern(Counts, Weights, Capacity, Bounds):
+    Room = Capacity - int(Counts @ Weights)
+    for i in np.argsort(-Weights, kind = 'stable'):
+        Add = min(Room // Weights[i], max(Bounds[i] - Counts[i], 0))
+        Counts[i] += Add
+        Room -= Add * Weights[i]
+    return Counts
+
+# Knapsack with at most Bounds[i] of each item, as 0/1 steps over the copies of each item, each step one vectorized update over all
+# capacities. Pricing with the demand as bounds gives patterns that don't cut more of a piece than is needed, which suit the integer model
+# better than the unbounded knapsack's patterns when most pieces are needed once. Returns the best value for Capacity and its counts
+def BoundedKnapsack(Weights, Values, Bounds, Capacity):
+    Items = [i for i in np.flatnonzero((Values > 0) & (Weights <= Capacity)) for Copy in range(0, min(int(Bounds[i]), Capacity // int(Weights[i])))]
+    Best = np.zeros(Capacity + 1)
+    Take = np.zeros((len(Items), Capacity + 1), dtype = bool)
+    for j, i in enumerate(Items):
+        w = int(Weights[i])
+        With = Best[:Capacity + 1 - w] + Values[i]
+        Take[j, w:] = With > Best[w:] + 1e-12
+        Best[w:] = np.where(Take[j, w:], With, Best[w:])
+    Counts = np.zeros(len(Weights), dtype = np.int64)
+    c = Capacity
+    for j in range(len(Items) - 1, -1, -1):   # Walk back through the steps, from the last
+        if Take[j, c]:
+            Counts[Items[j]] += 1
+            c -= int(Weights[Items[j]])
+    return Best[Capacity], Counts
+
+# Cache file for the patterns of a stock length and set of piece lengths, both in units. Patterns only depend on the ratios of the lengths,
+# so the same file serves any unit
+def PatternFile(Weights, Capacity):
+    Key = hashlib.sha256(np.asarray(Weights, dtype = np.int64).tobytes() + np.int64(Capacity).tobytes()).hexdigest()[:24]
+    return os.path.join(PatternFolder, Key + '.npz')
+
+# Cached patterns and whether they are all the maximal patterns (rather than those found by column generation), or None
+def LoadPatterns(Weights, Capacity):
+    File = PatternFile(Weights, Capacity)
+    if not UseCache or not os.path.exists(File):
+        return None
+    with np.load(File) as Stored:
+        return Stored['Patterns'], bool(Stored['Complete'])
+
+def StorePatterns(Weights, Capacity, Patterns, Complete):
+    if UseCache:
+        os.makedirs(PatternFolder, exist_ok = True)
+        np.savez(PatternFile(Weights, Capacity), Patterns = Patterns, Complete = Complete)
+
+# Patterns for one stock length: from the cache, or all maximal patterns if there are at most MaxPatterns, otherwise each piece on its own
+# (as many as fit and are needed), filled with other pieces, as a start for column generation. Returns the patterns, whether they are all the
+# maximal patterns, and where they came from
+def StockPatterns(Weights, Capacity, Demand):
+    Cached = LoadPatterns(Weights, Capacity)
+    if Cached is not None:
+        return Cached[0], Cached[1], 'cache'
+    Count = PatternCounts(Weights, Capacity)
+    if Count[0, Capacity] <= MaxPatterns:
+        Patterns = MaximalPatterns(Weights, Capacity, Count)
+        StorePatterns(Weights, Capacity, Patterns, True)
+        return Patterns, True, 'enumerated'
+    print(f'Patterns:      about {Count[0, Capacity]:,.3g} maximal patterns, more than MaxPatterns, so using column generation')
+    Patterns = np.diag(np.where(Weights <= Capacity, np.minimum(Capacity // Weights, Demand), 0)).astype(np.int64)
+    return np.array([FillPattern(Counts, Weights, Capacity, Demand) for Counts in Patterns[Patterns.any(axis = 1)]]), False, 'column generation'
+
+# Pattern model
+
+# Pattern model in HiGHS: columns are the patterns (each cut from stock type Types[k] at cost Cost[k]), rows are the demand for each
+# piece length (at least Demand, as maximal patterns can cut more than needed) and the number of each stock type used (Lower to Upper)
+# The first columns are artificial, one for each piece length at cost Penalty, so that the LP is feasible whatever the starting patterns,
+# e.g. when cutting each piece length on its own needs more stock than is available. They are closed before the integer model is solved
+def PatternModel(Patterns, Types, Cost, Demand, Lower, Upper, Penalty):
+    n, m = Patterns.shape[1], len(Lower)
+    Solver = highspy.Highs()
+    Solver.setOptionValue('output_flag', False)
+    Solver.setOptionValue('threads', 1)
+    Inf = highspy.kHighsInf
+    Empty = np.array([], dtype = np.int32)
+    Solver.addRows(n, Demand.astype(np.float64), np.full(n, Inf), 0, Empty, Empty, np.array([]))
+    Solver.addRows(m, Lower.astype(np.float64), Upper.astype(np.float64), 0, Empty, Empty, np.array([]))
+    Rows = np.arange(0, n, dtype = np.int32)
+    Solver.addCols(n, np.full(n, float(Penalty)), np.zeros(n), np.full(n, Inf), n, Rows, Rows, np.ones(n))
+    AddPatterns(Solver, Patterns, Types, Cost)
+    return Solver
+
+# Add patterns as columns: the nonzero counts in each pattern's demand rows, and 1 in its stock type's row
+def AddPatterns(Solver, Patterns, Types, Cost):
+    n = Patterns.shape[1]
+    Column, Row = np.nonzero(Patterns)
+    Column = np.concatenate((Column, np.arange(0, len(Patterns))))
+    Row = np.concatenate((Row, n + Types))
+    Value = np.concatenate((Patterns[np.nonzero(Patterns)], np.ones(len(Patterns))))
+    Order = np.lexsort((Row, Column))   # By column, as HiGHS takes the columns in compressed sparse column form
+    Starts = np.searchsorted(Column[Order], np.arange(0, len(Patterns)))
+    Solver.addCols(len(Patterns), Cost.astype(np.float64), np.zeros(len(Patterns)), np.full(len(Patterns), highspy.kHighsInf), len(Order),
+                   Starts.astype(np.int32), Row[Order].astype(np.int32), Value[Order].astype(np.float64))
+
+# Solve
+
+# Column generation for the stock types in Open, which don't have all their maximal patterns: solve the LP, then add the pattern with the most
+# negative reduced cost for each of those types, priced by a knapsack with at most Bounds of each piece, until there are none
+# Returns the patterns and their types (including those added), the iterations, and whether it converged, i.e. the LP optimum is a bound
+def ColumnGeneration(Solver, Patterns, Types, Weights, Capacity, TypeLength, Open, Bounds):
+    Iterations = 0
+    while True:
+        Solver.run()
+        if Solver.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            return Patterns, Types, Iterations, False
+        Duals = np.array(Solver.getSolution().row_dual)
+        Price, TypePrice = np.maximum(Duals[:len(Weights)], 0), Duals[len(Weights):]
+        New = []
+        for t in Open:
+            Value, Counts = BoundedKnapsack(Weights, Price, Bounds, int(Capacity[t]))
+            if TypeLength[t] - TypePrice[t] - Value < -1e-6 * TypeLength[t]:
+                New.append((t, FillPattern(Counts, Weights, int(Capacity[t]), Bounds)))
+        if len(New) == 0:
+            return Patterns, Types, Iterations, True
+        if Iterations == MaxIterations:
+            return Patterns, Types, Iterations, False
+        Iterations += 1
+        Added, AddedTypes = np.array([Counts for t, Counts in New]), np.array([t for t, Counts in New])
+        AddPatterns(Solver, Added, AddedTypes, TypeLength[AddedTypes])
+        Patterns, Types = np.vstack((Patterns, Added)), np.concatenate((Types, AddedTypes))
+
+# Diving heuristic, for an integer solution when the patterns come from column generation, as the integer model over only the patterns that
+# the LP needed can miss the best solution. Repeatedly fix the patterns that the LP cuts at least once more (or, if none, the largest fraction) as
+# lower bounds on their columns, then generate patterns for the rest of the demand, until the LP solution is whole. Returns the patterns and
+# the solution (all columns, including the artificial columns at 0), or None if the dive ends without one. The column bounds are reset to 0 at the end
+def Dive(Solver, Patterns, Types, Weights, Capacity, TypeLength, Open, Demand):
+    n = len(Weights)   # Artificial columns, before the patterns
+    Fixed = np.zeros(len(Patterns))
+    Solution = None
+    while True:
+        Values = np.array(Solver.getSolution().col_value)
+        Artificial, Values = Values[:n], Values[n:]
+        if np.all(np.abs(Values - np.round(Values)) < 1e-6):
+            if np.all(Artificial < 1e-6):
+                Solution = np.concatenate((np.zeros(n), np.round(Values)))
+            break
+        Floor = np.floor(Values + 1e-6)
+        if np.any(Floor > Fixed):
+            Fixed = np.maximum(Fixed, Floor)
+        else:   # Nothing more is cut at least once, so cut the largest fraction once
+            k = np.argmax(Values - Fixed)
+            Fixed[k] = np.ceil(Values[k] - 1e-6)
+        Solver.changeColsBounds(len(Fixed), np.arange(n, n + len(Fixed), dtype = np.int32), Fixed, np.full(len(Fixed), highspy.kHighsInf))
+        Residual = np.maximum(Demand - Fixed @ Patterns, 0)
+        Patterns, Types, Iterations, Converged = ColumnGeneration(Solver, Patterns, Types, Weights, Capacity, TypeLength, Open, Residual)
+        if Solver.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            break
+        Fixed = np.concatenate((Fixed, np.zeros(len(Patterns) - len(Fixed))))
+    Solver.changeColsBounds(len(Patterns), np.arange(n, n + len(Patterns), dtype = np.int32), np.zeros(len(Patterns)), np.full(len(Patterns), highspy.kHighsInf))
+    return Patterns, Types, Solution
+
+# Solve the pattern model. Stock types with all their maximal patterns are solved as they are, as an integer model. Otherwise, patterns are
+# generated by column generation, then by the diving heuristic, and the integer model is solved over all of them, starting from the dive's
+# solution. Returns a dict of the solution: stock types, piece lengths and demand, the patterns and how many times each is cut, and the
+# LP lower bound (None if column generation didn't converge)
+@Profiled('Solve')
+def SolveDowels(Data):
+    Required = np.array([Data['Demand'][p]['Required'] for p in Data['Demand']], dtype = np.float64)
+    Lengths = np.array([Data['Stock'][s]['Lengths'] for s in Data['Stock']], dtype = np.float64)
+    MustUse = np.array([Data['Stock'][s]['MustUse'] for s in Data['Stock']], dtype = np.int64)
+    if Data['UseOne'][0] == 0:
+        print('Note: UseOne is 0, but every stock item is counted here, including the first')
+    PieceLength, Demand = np.unique(Required, return_counts = True)
+    StockKeys, StockType = np.unique(np.column_stack((Lengths, MustUse)), axis = 0, return_inverse = True)
+    TypeLength = StockKeys[:, 0]
+    Available = np.bincount(StockType.ravel(), minlength = len(StockKeys))
+    Lower = np.where(StockKeys[:, 1] > 0, Available, 0)
+    Whole, Unit = WholeLengths(np.concatenate((PieceLength, TypeLength)))
+    Weights, Capacity = Whole[:len(PieceLength)], Whole[len(PieceLength):]
+
+    Started = tm.perf_counter()
+    with ProfilePhase('Patterns'):
+        Found = [StockPatterns(Weights, int(Capacity[t]), Demand) for t in range(0, len(StockKeys))]
+    Patterns = np.vstack([Found[t][0] for t in range(0, len(StockKeys))]).astype(np.int64)
+    Types = np.concatenate([np.full(len(Found[t][0]), t) for t in range(0, len(StockKeys))])
+    Open = [t for t in range(0, len(StockKeys)) if not Found[t][1]]
+    if Verbose:
+        for t in range(0, len(StockKeys)):
+            print(f'Patterns:      {len(Found[t][0]):,.0f} for stock length {TypeLength[t]:,.2f} ({Found[t][2]}), in {tm.perf_counter() - Started:,.3f} seconds')
+
+    Penalty = 1 + Available @ TypeLength   # More than any solution that uses only the stock available
+    Solver = PatternModel(Patterns, Types, TypeLength[Types], Demand, Lower, Available, Penalty)
+    Start = None
+    with ProfilePhase('Column generation'):
+        Patterns, Types, Iterations, Converged = ColumnGeneration(Solver, Patterns, Types, Weights, Capacity, TypeLength, Open, Demand)
+        Bound = Solver.getInfo().objective_function_value if Converged else None   # With artificial columns allowed, so still a lower bound
+        if len(Open) > 0 and Solver.getModelStatus() == highspy.HighsModelStatus.kOptimal:
+            Patterns, Types, Start = Dive(Solver, Patterns, Types, Weights, Capacity, TypeLength, Open, Demand)
+    for t in Open:   # Keep the patterns found, so a rerun with other quantities starts from them
+        StorePatterns(Weights, int(Capacity[t]), Patterns[Types == t].astype(np.int32), False)
+    if Verbose and len(Open) > 0:
+        print(f'Column generation: {Iterations:,.0f} iterations, then diving, {len(Patterns):,.0f} patterns in total')
+
+    with ProfilePhase('Integer model'):
+        n = len(Weights)
+        Solver.changeColsBounds(n, np.arange(0, n, dtype = np.int32), np.zeros(n), np.zeros(n))   # Close the artificial columns
+        Columns = np.arange(n, n + len(Patterns), dtype = np.int32)
+        Solver.changeColsIntegrality(len(Columns), Columns, np.array([highspy.HighsVarType.kInteger] * len(Columns)))
+        Solver.setOptionValue('output_flag', True)
+        Solver.setOptionValue('log_to_console', False)
+        Solver.setOptionValue('log_file', 'highs.log')
+        Solver.setOptionValue('time_limit', TimeLimit)
+        Solver.setOptionValue('mip_rel_gap', 0)
+        if Start is not None:
+            Solution = highspy.HighsSolution()
+            Solution.col_value = Start.tolist()
+            Solver.setSolution(Solution)
+        Solver.run()
+    Solution = {'Status': Solver.modelStatusToString(Solver.getModelStatus()), 'PieceLength': PieceLength, 'Demand': Demand, 'TypeLength': TypeLength,
+                'Patterns': Patterns, 'Types': Types, 'Uses': None, 'Bound': Bound, 'Time': tm.perf_counter() - Started}
+    if Solver.getInfo().primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible:
+        Solution['Uses'] = np.round(np.array(Solver.getSolution().col_value)[n:]).astype(np.int64)
+    return Solution
+
+# Write output
+
+def WriteOutput(Solution):
+    print(f'\nStatus:        {Solution["Status"]}')
+    if Solution['Uses'] is None:
+        print('No solution found')
+        return
+    Used = np.flatnonzero(Solution['Uses'])
+    Uses, Types = Solution['Uses'][Used], Solution['Types'][Used]
+    Cut = Solution['Patterns'][Used] @ Solution['PieceLength']
+    Total = Solution['Demand'] @ Solution['PieceLength']
+    StockUsed = Uses @ Solution['TypeLength'][Types]
+    for t in range(0, len(Solution['TypeLength'])):
+        print(f'Stock used:    {Uses[Types == t].sum():,.0f} of length {Solution["TypeLength"][t]:,.2f}')
+    print(f'Off-cut:       {StockUsed - Uses @ Cut:,.2f} ({1 - Uses @ Cut / StockUsed:.2%} of the stock used), plus {Uses @ Cut - Total:,.2f} of surplus pieces')
+    if Solution['Bound'] is not None:
+        print(f'Lower bound:   {Solution["Bound"]:,.2f} of stock length (LP)')
+    print(f'Time:          {Solution["Time"]:,.3f} seconds\n')
+    if Verbose:
+        print('Times  Stock   Used  Pieces')
+        print('-----------------------------------------------------------')
+        for k in np.argsort(-Uses, kind = 'stable'):
+            Pieces = ', '.join(f'{Count} x {Length:g}' for Count, Length in zip(Solution['Patterns'][Used[k]], Solution['PieceLength']) if Count > 0)
+            print(f'{Uses[k]:>5,.0f}  {Solution["TypeLength"][Types[k]]:>5,.0f}  {Cut[k]:>5,.2f}  {Pieces}')
+
+def Main():
+    if Profile:
+        StartProfile(ProfileFile, Script = 'dowel', DataFile = DataFilename)
+    Data = GetData(DataFilename)
+    Solution = SolveDowels(Data)
+    WriteOutput(Solution)
+    WriteProfile()
+
+# Globals
+
+DataFilename = 'Dowel-cutting-results.xlsx'   # Pieces from the workbook, or a JSON file in the same form as the wire cutting model's data, e.g. '../HiGHS-testing/Hangs/data-100.json'
+DowelLength = 96   # Length of each dowel, for the pieces from the workbook, which doesn't include it
+MaxPatterns = 10**6   # Enumerate all maximal patterns for a stock length if there are at most this many, otherwise generate them by column generation
+MaxIterations = 1000   # Most column generation iterations
+TimeLimit = 60   # seconds, for the integer pattern model
+UseCache = True   # Keep the patterns of each stock length and set of piece lengths in .cache/patterns in the working directory
+Verbose = True
+Profile = False   # Record the wall time, CPU time and peak memory of each phase
+ProfileFile = 'profile.jsonl'   # Profile records as JSON lines, appended to by each run
+
+if __name__ == '__main__':
+    Main()
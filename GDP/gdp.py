@@ -5,44 +5,32 @@ import pandas as pd
 import numpy as np
 import time as tm
 import os.path
-from openpyxl import load_workbook
-from openpyxl.utils.cell import range_boundaries
+import sys
 import random as rnd
-
-# Record time checkpoints
-# Requires global variable: Checkpoints = []
-def Timer(Point):   # String label for current checkpoint
-    Checkpoints.append([Point, tm.perf_counter()])
-
-# Output list of checkpoint labels and times
-def WriteCheckpoints():
-    print('\nCheckpoint    Seconds')
-    print('---------------------')
-    Start = Checkpoints[0][1]
-    for i in range(1, len(Checkpoints)):
-        Point = Checkpoints[i][0]
-        TimeStep = Checkpoints[i][1] - Start
-        print(f'{Point:12}{TimeStep:9,.1f}')
-
-# Generic loader from Excel file, given worksheet and named range
-def LoadFromExcel(ExcelFile, Worksheet, Range):
-    wb = load_workbook(filename=ExcelFile, read_only = True)
-    ws = wb[Worksheet]
-    dests = wb.defined_names[Range].destinations
-    for title, coord in dests:
-        min_col, min_row, max_col, max_row = range_boundaries(coord)
-        data = ws.iter_rows(min_row, max_row, min_col, max_col, values_only = True)
-    df = pd.DataFrame(data)
-    return df
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Tools'))   # Shared helpers
+from excel_data import LoadRanges
+from deadline import RunWithDeadline, WriteDeadlineReport
+from supervisor import WriteModelFile, RemoveModelFile, SolveModelFile, SupervisedSolve, LoadSolutionByName, WriteIncidents
+from profiler import StartProfile, ProfileContext, ProfilePhase, Profiled, WriteProfile
+from solution import Values, ValueMatrix, WriteTable, CaseFileName
+from highs_log import WatchProgress, FinishWatch, StopRule, SeriesWriter
+from solution_cache import CachedSolution, StoreSolution
+from solver_manager import LocalSolverManager
+from portfolio import PortfolioSolve, Incumbent
+from coverage import CandidateSizes, ReduceCandidates, HeuristicSolution, WriteHeuristic, CoverageKey, CacheRecord, CachedProducts, NearestStart, WriteCached, RunSweep, IncrementalCases, QueueCases
 
 # Write model to file, if required. The format will be inferred by Pyomo from the file extension, e.g. .gams or .nl
 def WriteModelToFile(WriteFile, Model):
     if WriteFile:
         Model.write(ModelFile, io_options={'symbolic_solver_labels': False})   # symbolic_solver_labels of True is easier to read, but a longer file
 
-# Create the Solver object for either NEOS or a local solver
+# Create the Solver object for either NEOS, the local job queue or a local solver
 def SetUpSolver(Model):
+    global Manager
     Model.Options = None
+    Model.WarmStart = False   # Set when the variables hold a heuristic solution to start from
+    Model.StoppedEarly = None   # Reason the solve was stopped early by the HiGHS log watcher, if it was
+    Model.Variants = {}   # Models with other formulations, for a portfolio solve
     if Neos:
         Solver = pyo.SolverManagerFactory('neos')   # Solver on NEOS
         if pyo.value(Model.Engine) == 'cplex':   # Linear
@@ -53,6 +41,16 @@ def SetUpSolver(Model):
             print('No options for Couenne')
         else:
             print('Unknown NEOS solver when setting options')
+    elif Queued:
+        if Manager is None:   # One job queue for all cases, so that QueueWorkers limits the solves at the same time
+            Manager = LocalSolverManager(QueueWorkers, QueueThreads, QueueMemory)
+        Solver = Manager   # Local job queue, solving in child processes, with the same solve call as NEOS
+        if pyo.value(Model.Engine) == 'appsi_highs':
+            Model.Options = {'time_limit': pyo.value(Model.TimeLimit), 'log_file': 'highs.log'}
+        elif pyo.value(Model.Engine) == 'glpk':
+            Model.Options = {'tmlim': pyo.value(Model.TimeLimit)}
+        else:
+            print('Unknown local solver when setting options')
     else:
         Solver = pyo.SolverFactory(pyo.value(Model.Engine))   # Local solver installed
         if pyo.value(Model.Engine) == 'couenne':   # Non-linear
@@ -66,81 +64,144 @@ def SetUpSolver(Model):
     
     return Solver, Model
 
-# Call either NEOS or a local solver
+# Call either NEOS (or the local job queue, which takes the same call) or a local solver
 def CallSolver(Solver, Model):
-    if Neos:
-        if Model.Options == None:
-            Results = Solver.solve(Model, load_solutions = LoadSolution, tee = Verbose, solver = Model.Engine)
-        else:
-            Results = Solver.solve(Model, load_solutions = LoadSolution, tee = Verbose, solver = Model.Engine, options = Model.Options)
+    if Neos or Queued:
+        with ProfilePhase('Solve'):
+            if Model.Options == None:
+                Results = Solver.solve(Model, load_solutions = LoadSolution, tee = Verbose, solver = Model.Engine)
+            else:
+                Results = Solver.solve(Model, load_solutions = LoadSolution, tee = Verbose, solver = Model.Engine, options = Model.Options)
+    elif Supervised:   # Solve in a monitored child process, restarting the solve with other settings if HiGHS hangs
+        with ProfilePhase('Translate'):   # The child process solves a model file, as the model can't be sent to a spawned process
+            SolveFile = WriteModelFile(Model, Model.WarmStart)
+        with ProfilePhase('Solve'):
+            Report = SupervisedSolve(SolveModelFile, (pyo.value(Model.Engine), dict(Solver.options), SolveFile), HangRestarts, HangWindow, LogFile = Solver.options.get('log_file', 'highs.log'), IncidentFile = IncidentFile)
+        RemoveModelFile(SolveFile)
+        WriteIncidents(Report['Incidents'])
+        if Report['Status'] != 'finished':
+            raise RuntimeError('Supervised solve ' + Report['Status'] + ': ' + str(Report['Result']))
+        Results = Report['Result']
+        if LoadSolution:
+            LoadSolutionByName(Model, Results)
+    elif Portfolio is not None:   # Solve directly for PortfolioDelay seconds, then race several configurations in separate processes unless that proves optimality
+        with ProfilePhase('Solve'):   # Includes translation, as the solves are of a model file
+            Results, Model = PortfolioSolve(Model, pyo.value(Model.Engine), dict(Solver.options), Portfolio, Model.TimeLimit, PortfolioDelay, PortfolioGrace, Model.WarmStart,
+                                            Model.Variants, Formulation, Verbose, PortfolioFile, {'Script': 'gdp', 'DataFile': DataFile, 'Orders': pyo.value(Model.Orders), 'Formulation': Formulation})
+        if Incumbent(Results) is None:
+            raise RuntimeError('Portfolio solve: no configuration found a solution')
     else:
-        Results = Solver.solve(Model, load_solutions = LoadSolution, tee = Verbose)
+        Watch = None
+        if pyo.value(Model.Engine) == 'appsi_highs':   # Translate the model to HiGHS first, so that translation is timed separately. The solve then has nothing to translate
+            with ProfilePhase('Translate'):
+                Solver.set_instance(Model)
+            Watch = WatchSolve(Solver._solver_model, Solver.options['log_file'])
+        with ProfilePhase('Solve'):
+            if Model.WarmStart:   # Start from the heuristic solution in the variable values
+                Results = Solver.solve(Model, load_solutions = LoadSolution, tee = Verbose, warmstart = True)
+            else:
+                Results = Solver.solve(Model, load_solutions = LoadSolution, tee = Verbose)
+        if Watch is not None and FinishWatch(Watch) is not None:
+            Model.StoppedEarly = Watch['Reason']
+            print('Stopped early:', Watch['Reason'])
     
     return Results, Model
 
-# Load data from Excel file
+# Copies of the model data, each defined with another formulation used in Portfolio. Made before the model is defined, as the data is the same
+def PortfolioModels(Model):
+    Variants = {}
+    for Settings in Portfolio:
+        Form = Settings.get('Formulation', Formulation)
+        if Form != Formulation and Form not in Variants:
+            Variants[Form] = Model.clone()
+            DefineModel(Variants[Form], Form)
+    return Variants
+
+# Watch the solve's progress in the HiGHS log file, to stop early and/or write a time series of progress, if either is wanted
+def WatchSolve(Highs, LogFile):
+    if TargetGap is None and StallTime is None and SeriesFile is None:
+        return None
+    return WatchProgress(Highs, LogFile, StopRule(TargetGap, StallTime), None if SeriesFile is None else SeriesWriter(SeriesFile))
+
+# Load data from Excel file, opening the workbook once for all ranges (or not at all, if the cached copy is current)
+@Profiled('Load data')
 def GetData(DataFile, DataWorksheet):
-    Width = LoadFromExcel(DataFile, DataWorksheet, 'Width')
-    Length = LoadFromExcel(DataFile, DataWorksheet, 'Length')
-    Weight = LoadFromExcel(DataFile, DataWorksheet, 'Weight')
+    Data = LoadRanges(DataFile, ['Width', 'Length', 'Weight'], DataWorksheet)
+    Width, Length, Weight = Data['Width'], Data['Length'], Data['Weight']
     Width.columns = ['Item']
     Length.columns = ['Item']
     Weight.columns = ['Item']
     return Width, Length, Weight
 
 # Define model data, assigning all data to the Model
+@Profiled('Model data')
 def DefineModelData(Model, Width, Length, Weight):
     Model.Item = pyo.Set(initialize = range(0, len(Width)))
-    Model.Candidate = pyo.Set(initialize = range(0, 3 * len(Width) * len(Width)))
-    Model.Width = pyo.Param(Model.Item, within = pyo.NonNegativeIntegers, mutable = True)
-    Model.Length = pyo.Param(Model.Item, within = pyo.NonNegativeIntegers, mutable = True)
-    Model.Weight = pyo.Param(Model.Item, within = pyo.NonNegativeReals, mutable = True)
+    Model.Width = pyo.Param(Model.Item, within = pyo.NonNegativeIntegers, mutable = True, initialize = dict(enumerate(Width['Item'].tolist())))
+    Model.Length = pyo.Param(Model.Item, within = pyo.NonNegativeIntegers, mutable = True, initialize = dict(enumerate(Length['Item'].tolist())))
+    Model.Weight = pyo.Param(Model.Item, within = pyo.NonNegativeReals, mutable = True, initialize = dict(enumerate(Weight['Item'].tolist())))
 
     Model.Baseline = 0   # Total weighted area of all items
     for i in Model.Item:
-        Model.Width[i] = Width['Item'][i]
-        Model.Length[i] = Length['Item'][i]
-        Model.Weight[i] = Weight['Item'][i]
         Model.Baseline += Model.Width[i] * Model.Length[i] * Model.Weight[i]
         
-    # Define candidate product sizes using width and length of items, taking item width and lengths independently to enumerate all combinations
-    Model.CandidateWidth = pyo.Param(Model.Candidate, within = pyo.NonNegativeIntegers, mutable = True)
-    Model.CandidateLength = pyo.Param(Model.Candidate, within = pyo.NonNegativeIntegers, mutable = True)
-    Model.CandidateArea = pyo.Param(Model.Candidate, within = pyo.NonNegativeIntegers, mutable = True)
-    for i in Model.Item:   # All widths x lengths
-        for j in Model.Item:
-            Model.CandidateWidth[i * len(Width) + j] = Width['Item'][i]
-            Model.CandidateLength[i * len(Width) + j] = Length['Item'][j]
-            Model.CandidateArea[i * len(Width) + j] = Width['Item'][i] * Length['Item'][j]
-    for i in Model.Item:   # All widths x widths
-        for j in Model.Item:
-            Model.CandidateWidth[(len(Width) * len(Width)) + i * len(Width) + j] = Width['Item'][i]
-            Model.CandidateLength[(len(Width) * len(Width)) + i * len(Width) + j] = Width['Item'][j]
-            Model.CandidateArea[(len(Width) * len(Width)) + i * len(Width) + j] = Width['Item'][j] * Width['Item'][i]
-    for i in Model.Item:   # All lengths x lengths
-        for j in Model.Item:
-            Model.CandidateWidth[(2 * len(Width) * len(Width)) + i * len(Width) + j] = Length['Item'][i]
-            Model.CandidateLength[(2 * len(Width) * len(Width)) + i * len(Width) + j] = Length['Item'][j]
-            Model.CandidateArea[2 * (len(Width) * len(Width)) + i * len(Width) + j] = Length['Item'][j] * Length['Item'][i]
+    # Define candidate product sizes, keeping only the reduced set and loading each array into its Param in bulk
+    with ProfilePhase('Candidates'):
+        CandidateWidth, CandidateLength, CandidateArea = CandidateSizes(Width, Length)
+        Before = len(CandidateWidth)
+        CandidateWidth, CandidateLength, Fits = ReduceCandidates(CandidateWidth, CandidateLength, Width['Item'].to_numpy(), Length['Item'].to_numpy(), pyo.value(Model.Orders), Prune = PruneDominated)
+    CandidateArea = CandidateWidth * CandidateLength
+    Model.Candidate = pyo.Set(initialize = range(0, len(CandidateWidth)))
+    Model.CandidateWidth = pyo.Param(Model.Candidate, within = pyo.NonNegativeIntegers, mutable = True, initialize = dict(enumerate(CandidateWidth.tolist())))
+    Model.CandidateLength = pyo.Param(Model.Candidate, within = pyo.NonNegativeIntegers, mutable = True, initialize = dict(enumerate(CandidateLength.tolist())))
+    Model.CandidateArea = pyo.Param(Model.Candidate, within = pyo.NonNegativeIntegers, mutable = True, initialize = dict(enumerate(CandidateArea.tolist())))
+
+    # Sparse index of feasible (item, candidate) pairs, plus the feasible candidates for each item
+    Model.Fits = Fits   # Candidate x item, kept for building MIP starts
+    Pairs = np.argwhere(Fits.T)
+    Model.Feasible = pyo.Set(dimen = 2, initialize = [tuple(Pair) for Pair in Pairs.tolist()])
+    Model.ItemCandidates = pyo.Set(Model.Item, initialize = {i: np.flatnonzero(Fits[:, i]).tolist() for i in range(0, len(Width))})
+
+    n = len(Width)
+    After = len(CandidateWidth)
+    if Formulation == 'binary':
+        ItemRows, ItemVars = 2 * n + n + 1, n   # Fit rows, AllocateOnce and NumOrders. Orientation variables
+    else:
+        ItemRows, ItemVars = 4 * n + 2 * n + 1, 2 * n   # Disjunct rows, disjunctions, AllocateOnce and NumOrders. Indicator variables
+    if Verbose:
+        print(f'Candidates:   {Before:>12,.0f} -> {After:<12,.0f}')
+        print(f'Variables:    {Before + n * Before + ItemVars:>12,.0f} -> {After + len(Pairs) + ItemVars:<12,.0f}')
+        print(f'Constraints:  {n * Before + ItemRows:>12,.0f} -> {len(Pairs) + ItemRows:<12,.0f}\n')
 
 # Define model
-def DefineModel(Model):
+@Profiled('Define model')
+def DefineModel(Model, Form = None):   # Form is the formulation, if not Formulation
+    Form = Formulation if Form is None else Form
     Model.Select = pyo.Var(Model.Candidate, domain = pyo.Binary)
-    Model.Allocation = pyo.Var(Model.Item, Model.Candidate, within = pyo.Binary, initialize = 0)
+    Model.Allocation = pyo.Var(Model.Feasible, within = pyo.Binary, initialize = 0)
 
-    def portrait_rule(d, i):   # Original width|length order, as specified in the data
-        d.w = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateWidth[c] for c in Model.Candidate) >= Model.Width[i])
-        d.l = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateLength[c] for c in Model.Candidate) >= Model.Length[i])
-    Model.portrait = gdp.Disjunct(Model.Item, rule = portrait_rule)
-    
-    def landscape_rule(d, i):   # Rotated width|length order
-        d.w = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateWidth[c] for c in Model.Candidate) >= Model.Length[i])
-        d.l = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateLength[c] for c in Model.Candidate) >= Model.Width[i])
-    Model.landscape = gdp.Disjunct(Model.Item, rule = landscape_rule)
-    
-    def rotate_rule(Model, i):   # Use either portrait or landscape orientation for each item
-        return [Model.portrait[i], Model.landscape[i]]
-    Model.rotate = gdp.Disjunction(Model.Item, rule=rotate_rule)
+    if Form == 'binary':   # Orientation as a binary variable, with the item's width and length swapped linearly, so no disjunctions to transform
+        Model.Portrait = pyo.Var(Model.Item, domain = pyo.Binary)   # 1 = portrait, 0 = landscape
+        def rule_width(Model, i):
+            return sum(Model.Allocation[i, c] * Model.CandidateWidth[c] for c in Model.ItemCandidates[i]) >= Model.Width[i] * Model.Portrait[i] + Model.Length[i] * (1 - Model.Portrait[i])
+        Model.FitWidth = pyo.Constraint(Model.Item, rule = rule_width)
+        def rule_length(Model, i):
+            return sum(Model.Allocation[i, c] * Model.CandidateLength[c] for c in Model.ItemCandidates[i]) >= Model.Length[i] * Model.Portrait[i] + Model.Width[i] * (1 - Model.Portrait[i])
+        Model.FitLength = pyo.Constraint(Model.Item, rule = rule_length)
+    else:
+        def portrait_rule(d, i):   # Original width|length order, as specified in the data
+            d.w = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateWidth[c] for c in Model.ItemCandidates[i]) >= Model.Width[i])
+            d.l = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateLength[c] for c in Model.ItemCandidates[i]) >= Model.Length[i])
+        Model.portrait = gdp.Disjunct(Model.Item, rule = portrait_rule)
+        
+        def landscape_rule(d, i):   # Rotated width|length order
+            d.w = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateWidth[c] for c in Model.ItemCandidates[i]) >= Model.Length[i])
+            d.l = pyo.Constraint(expr=sum(Model.Allocation[i, c] * Model.CandidateLength[c] for c in Model.ItemCandidates[i]) >= Model.Width[i])
+        Model.landscape = gdp.Disjunct(Model.Item, rule = landscape_rule)
+        
+        def rotate_rule(Model, i):   # Use either portrait or landscape orientation for each item
+            return [Model.portrait[i], Model.landscape[i]]
+        Model.rotate = gdp.Disjunction(Model.Item, rule=rotate_rule)
     
     def rule_count(Model):   # Select the specified number of products that we want to order
         return sum(Model.Select[c] for c in Model.Candidate) == Model.Orders
@@ -148,71 +209,192 @@ def DefineModel(Model):
 
     def rule_only(Model, i, c):   # Allocate an item to a candidate only if that candidate is selected
         return Model.Allocation[i, c] <= Model.Select[c]
-    Model.SelectedOnly = pyo.Constraint(Model.Item, Model.Candidate, rule = rule_only)
+    Model.SelectedOnly = pyo.Constraint(Model.Feasible, rule = rule_only)
     
     def rule_once(Model, i):   # Each item is allocated to exactly one product
-        return sum(Model.Allocation[i, c] for c in Model.Candidate) == 1
+        return sum(Model.Allocation[i, c] for c in Model.ItemCandidates[i]) == 1
     Model.AllocateOnce = pyo.Constraint(Model.Item, rule = rule_once)
 
     def rule_Obj(Model):   # Minimize waste = Area of allocated product minus area of item, in total for all items
-        return sum(sum(Model.Allocation[i, c] * Model.CandidateArea[c] * Model.Weight[i] for c in Model.Candidate) for i in Model.Item) \
+        return sum(Model.Allocation[i, c] * Model.CandidateArea[c] * Model.Weight[i] for i, c in Model.Feasible) \
                - sum(Model.Width[i] * Model.Length[i] * Model.Weight[i] for i in Model.Item)
     Model.Obj = pyo.Objective(rule = rule_Obj, sense = pyo.minimize)
 
-    pyo.TransformationFactory('gdp.bigm').apply_to(Model)   # Transform the disjunction rules into a form that the solver can work with
+    with ProfilePhase('Transformation'):   # Transform the disjunction rules into a form that the solver can work with
+        if Form == 'bigm':
+            pyo.TransformationFactory('gdp.bigm').apply_to(Model, targets = [Model.rotate], bigM = TightBigM(Model))
+        elif Form == 'hull':
+            pyo.TransformationFactory('gdp.hull').apply_to(Model, targets = [Model.rotate])
 
+# Big-M values from the data, so that Pyomo doesn't have to estimate them (which is slow for large models, and gives looser Ms)
+# Each item is allocated to exactly one candidate that fits it, so a fit constraint's left side is at least the smallest width (or length)
+# of the item's candidates. An inactive constraint is relaxed to that value, so M is the right side less the smallest width (or length)
+def TightBigM(Model):
+    CandidateWidth = Values(Model.CandidateWidth)
+    CandidateLength = Values(Model.CandidateLength)
+    BigM = {}
+    for i in Model.Item:
+        Candidates = list(Model.ItemCandidates[i])
+        MinWidth, MinLength = CandidateWidth[Candidates].min(), CandidateLength[Candidates].min()
+        Width, Length = pyo.value(Model.Width[i]), pyo.value(Model.Length[i])
+        BigM[Model.portrait[i].w] = max(0, Width - MinWidth)
+        BigM[Model.portrait[i].l] = max(0, Length - MinLength)
+        BigM[Model.landscape[i].w] = max(0, Length - MinWidth)
+        BigM[Model.landscape[i].l] = max(0, Width - MinLength)
+    return BigM
+
+@Profiled('Output')
 def WriteOutput(Model, OrderSize, Results):
     Obj = pyo.value(Model.Obj())
-    Products = '['
-    for c in Model.Candidate:   # Collate list of selected product sizes
-        if np.isclose(pyo.value(Model.Select[c]), 1):   # Binary variable = 1, give-or-take small precision error
-            Products += str(pyo.value(Model.CandidateWidth[c])).rjust(6) + ' ' + str(pyo.value(Model.CandidateLength[c])).rjust(6) + ' '
-    Products += ']'
+    Candidates = list(Model.Candidate)
+    CandidateWidth = Values(Model.CandidateWidth).astype(int)
+    CandidateLength = Values(Model.CandidateLength).astype(int)
+    Selected = np.flatnonzero(np.isclose(Values(Model.Select), 1))   # Binary variable = 1, give-or-take small precision error
+    Products = '[' + ''.join(str(CandidateWidth[k]).rjust(6) + ' ' + str(CandidateLength[k]).rjust(6) + ' ' for k in Selected) + ']'   # List of selected product sizes
     print()
     print(f'Order size:   {OrderSize:<,.0f}')
     print(f'Objective:    {Obj:<,.0f} ({Obj / pyo.value(Model.Baseline):.2%} of baseline)')
     print(f'Products:     {Products}\n')
 
     pd.options.display.float_format = '{:,.0f}'.format
-    ItemsAllocated = pd.DataFrame()
-    
-    SelectedSizes = []   # Dataframe of solution
-    for c in Model.Select:
-        if np.isclose(pyo.value(Model.Select[c]), 1):
-            SelectedSizes.append(str(pyo.value(Model.CandidateWidth[c])) + 'x' + str(pyo.value(Model.CandidateLength[c])))
-            for i in Model.Item:
-                ItemsAllocated.at[i, c] = pyo.value(Model.Allocation[i, c])
-    ItemsAllocated.columns = SelectedSizes
-
-    ItemSizes = []   # Add item sizes to solution dataframe
-    for i in Model.Item:
-        ItemSizes.append(str(pyo.value(Model.Width[i])) + 'x' + str(pyo.value(Model.Length[i])))
-    ItemsAllocated['Item'] = ItemSizes
+    Allocation = ValueMatrix(Model.Allocation, list(Model.Item), [Candidates[k] for k in Selected])   # Item x selected product, all values in one pass
+    ItemsAllocated = pd.DataFrame(Allocation, columns = [str(CandidateWidth[k]) + 'x' + str(CandidateLength[k]) for k in Selected])
+    ItemsAllocated['Item'] = [str(w) + 'x' + str(l) for w, l in zip(Values(Model.Width).astype(int), Values(Model.Length).astype(int))]   # Add item sizes to solution dataframe
     pd.set_option('display.max_rows', None)
-    display(ItemsAllocated)
+    print(ItemsAllocated)
+    if OutputFile is not None:   # Also write the table to a file, e.g. for large instances where the printed table is hard to use
+        WriteTable(ItemsAllocated, CaseFileName(OutputFile, OrderSize))
 
-def Case(OrderSize, Width, Length, Weight):
+# Build and solve one order size. Phase marks the start of each phase, and Deadline (if given) limits the solver to the time left in an overall budget
+def Case(OrderSize, Width, Length, Weight, Phase = lambda Name: None, Deadline = None):
+    Phase('Build')
+    ProfileContext(OrderSize = OrderSize)
     Model = pyo.ConcreteModel(name = ModelName + ', Order size ' + str(OrderSize))
     print(Model.name.strip('\''))
     Model.Engine = SolverName
     Model.TimeLimit = TimeLimit
     Solver, Model = SetUpSolver(Model)
+    Model.Orders = OrderSize   # Needed by the candidate reduction, so set before the model data
     DefineModelData(Model, Width, Length, Weight)
-    Model.Orders = OrderSize
+    if UseCache:
+        Data, Family, Key = CacheKey(Model, Width, Length, Weight, Solver)
+        Cached = CachedSolution(Family, Key)
+        if Cached is not None:   # Same data and settings as an earlier run, so report its solution without building or solving the MIP
+            Phase('Output')
+            SolutionOnly(Model, *CachedProducts(Model, Cached), Cached['Objective'])
+            WriteOutput(Model, OrderSize, None)
+            WriteCached(Cached)
+            return Model, None
+    Start, Method = HeuristicSolution(Model, StartHeuristic), StartHeuristic
+    if UseCache:   # Start from the solution of the nearest cached instance instead, if that is better
+        Seed = NearestStart(Model, Family, Data)
+        if Seed is not None and (Start is None or Seed[2] < Start[2]):
+            Start, Method = Seed, 'nearest cached'
+    if HeuristicOnly:   # Report the heuristic solution, without building or solving the MIP
+        Phase('Output')
+        if Start is None:
+            print('No heuristic solution found\n')
+            return Model, None
+        SolutionOnly(Model, Start[0], Start[1], Start[2])
+        WriteOutput(Model, OrderSize, None)
+        WriteHeuristic(Start[2], None, Method)
+        return Model, None
+    if Portfolio is not None and not Neos:
+        Model.Variants = PortfolioModels(Model)
     DefineModel(Model)
+    if Start is not None and not Neos:   # MIP start for a local solver
+        SetSolution(Model, Start[0], Start[1])
+        for Variant in Model.Variants.values():
+            SetSolution(Variant, Start[0], Start[1])
+        Model.WarmStart = True
     WriteModelToFile(WriteFile, Model)
-    Results = CallSolver(Solver, Model)
+    Phase('Solve')
+    if Deadline is not None:   # Give the solver whatever is left of the overall budget
+        Model.TimeLimit = max(1, min(TimeLimit, Deadline - tm.time()))
+        if Queued and SolverName == 'appsi_highs':
+            Model.Options['time_limit'] = Model.TimeLimit
+        elif not Neos and SolverName == 'appsi_highs':
+            Solver.options['time_limit'] = Model.TimeLimit
+    Results, Model = CallSolver(Solver, Model)
+    Phase('Output')
     WriteOutput(Model, OrderSize, Results)
+    if Start is not None:
+        WriteHeuristic(Start[2], MipBound(Results), Method)
+    if UseCache:   # WriteOutput succeeded, so the model holds a solution. Only an optimal solve that wasn't stopped early is final
+        Final = str(Results.solver.termination_condition) == 'optimal' and Model.StoppedEarly is None
+        StoreSolution(Family, Key, Data, CacheRecord(Model, MipBound(Results), str(Results.solver.termination_condition)), MaxEntries = CacheEntries, Final = Final)
+    return Model, Results
+
+# Load, build and solve one order size, marking each phase. Run in a child process by RunWithDeadline, so that one budget covers the whole case
+def BudgetCase(Phase, Deadline, OrderSize):
+    Phase('Load data')
+    Width, Length, Weight = GetData(DataFile, DataWorksheet)
+    Model, Results = Case(OrderSize, Width, Length, Weight, Phase, Deadline)
+    return {'Objective': pyo.value(Model.Obj()) if hasattr(Model, 'Obj') else None}
+
+# Set the variables to a solution, e.g. as a MIP start: the selected candidates, and the candidate allocated to each item
+def SetSolution(Model, Selected, Choice):
+    Chosen = np.zeros(len(Model.Candidate), dtype = bool)
+    Chosen[Selected] = True
+    for c in Model.Candidate:
+        Model.Select[c].set_value(int(Chosen[c]))
+    for i, c in Model.Feasible:
+        Model.Allocation[i, c].set_value(int(Choice[i] == c))
+    for i in Model.Item:   # Choose the orientation of each item to match its allocated product
+        c = Choice[i]
+        Portrait = int(pyo.value(Model.CandidateWidth[c]) >= pyo.value(Model.Width[i]) and pyo.value(Model.CandidateLength[c]) >= pyo.value(Model.Length[i]))
+        if hasattr(Model, 'Portrait'):
+            Model.Portrait[i].set_value(Portrait)
+        elif hasattr(Model, 'portrait'):
+            Model.portrait[i].binary_indicator_var.set_value(Portrait)
+            Model.landscape[i].binary_indicator_var.set_value(1 - Portrait)
+
+# Best bound from the solver results, or None if there is none
+def MipBound(Results):
+    if Results is None:
+        return None
+    return Results.problem.lower_bound
+
+# Define the variables only, without the constraints, and set them to a solution, so that WriteOutput can report it without solving the MIP
+def SolutionOnly(Model, Selected, Choice, Objective):
+    Model.Select = pyo.Var(Model.Candidate, domain = pyo.Binary)
+    Model.Allocation = pyo.Var(Model.Feasible, within = pyo.Binary)
+    SetSolution(Model, Selected, Choice)
+    Model.Obj = pyo.Expression(expr = Objective)
+
+# Data and settings that identify a case in the solution cache. The settings include everything else that can change the solution
+def CacheKey(Model, Width, Length, Weight, Solver):
+    Settings = {'Model': ModelName, 'Formulation': Formulation, 'PruneDominated': PruneDominated, 'Orders': pyo.value(Model.Orders), 'StartHeuristic': StartHeuristic,
+                'Solver': SolverName, 'Neos': Neos, 'TimeLimit': TimeLimit, 'Options': Model.Options if Neos or Queued else dict(Solver.options),
+                'TargetGap': TargetGap, 'StallTime': StallTime, 'Supervised': Supervised, 'Portfolio': Portfolio}
+    return CoverageKey(Width, Length, Weight, Settings)
+
+# Settings and functions of this model, for running all the order sizes with coverage.py
+def ScriptParts():
+    return {'Name': ModelName, 'OrderSizes': range(ProductsMin, ProductsMax + 1), 'Solver': SolverName, 'TimeLimit': TimeLimit, 'StartHeuristic': StartHeuristic,
+            'Verbose': Verbose, 'SetUp': SetUpSolver, 'Data': DefineModelData, 'Define': DefineModel, 'Set': SetSolution, 'Output': WriteOutput,
+            'Bound': MipBound}
 
 def Main():
-    Timer('Start');
+    if Profile:
+        StartProfile(ProfileFile, Script = 'gdp', DataFile = DataFile, Solver = SolverName, TimeLimit = TimeLimit)
+    if Budget is not None:   # Each case loads its own data, so that the budget covers data load, build and solve
+        for OrderSize in range(ProductsMin, ProductsMax + 1):
+            WriteDeadlineReport(RunWithDeadline(BudgetCase, (OrderSize,), Budget))
+        return
     Width, Length, Weight = GetData(DataFile, DataWorksheet)
-    Timer('Setup');
-    for OrderSize in range(ProductsMin, ProductsMax + 1):   # Run multiple product cases, if required
-        Case(OrderSize, Width, Length, Weight)
-    Timer('Solved');
-    Timer('Finish');
-    WriteCheckpoints()
+    if Sweep:
+        SweepResults = RunSweep(Width, Length, Weight, ScriptParts(), SweepBudget, SweepWorkers, SweepThreads)
+        pd.set_option('display.max_rows', None)
+        print(SweepResults)
+    elif Incremental:
+        IncrementalCases(Width, Length, Weight, ScriptParts())
+    elif Queued:
+        QueueCases(Width, Length, Weight, ScriptParts())
+    else:
+        for OrderSize in range(ProductsMin, ProductsMax + 1):   # Run multiple product cases, if required
+            Case(OrderSize, Width, Length, Weight)
+    WriteProfile()
 
 # Globals
 
@@ -226,9 +408,46 @@ DataWorksheet = 'Data'
 Verbose = True
 LoadSolution = True
 TimeLimit = 3600   # seconds
+Formulation = 'bigm'   # Form of the portrait/landscape choice: 'bigm' (disjunctions, with tight Big-M values from the data), 'hull' (disjunctions, hull reformulation) or 'binary' (binary orientation variable, no disjunctions to transform)
+PruneDominated = False   # Drop candidates that are dominated by a smaller candidate fitting the same items
+Budget = None   # seconds for each case, covering data load, build and solve, or None for no overall limit
+TargetGap = None   # Stop the solve early once the relative gap is at most this, e.g. 0.01, read from the HiGHS log as it is written. None for no target (local HiGHS only, not with Supervised, Incremental or Sweep)
+StallTime = None   # Stop the solve early once the gap hasn't improved for this many seconds, e.g. 60. None for no limit
+SeriesFile = None   # Write the MIP progress (time, nodes, bound, incumbent, gap) to a CSV file as the solve runs, e.g. 'progress.csv'
+Supervised = False   # Solve in a monitored child process, and restart the solve with other settings if HiGHS hangs (local solver only, not with Sweep)
+HangWindow = 60   # seconds with no CPU use and no log output before a supervised solve is treated as hung
+HangRestarts = [{'random_seed': 1}, {'random_seed': 2}, {'random_seed': 3, 'presolve': 'off'}]   # Settings for each restart after a hang
+IncidentFile = 'incidents.jsonl'   # Record of each hang
+StartHeuristic = None   # Heuristic solution to start the MIP from: 'greedy' or 'kmeans' choice of products, improved by local search. None for no start
+HeuristicOnly = False   # Report the heuristic solution without solving the MIP, for a fast answer when no proof of optimality is needed (not with Incremental or Sweep)
+UseCache = False   # Report the cached solution of an earlier run with the same data and settings, and start from the nearest cached instance's solution. Turn off for benchmarking (not with Incremental or Sweep)
+CacheEntries = 100   # Solutions kept in the cache, in .cache/solutions in the working directory. The least recently used are removed
+OutputFile = None   # Also write the allocation table for each order size to a file, e.g. 'allocation.parquet' or 'allocation.csv' (order size is added to the name)
+Profile = False   # Record the wall time, CPU time and peak memory of each phase, e.g. data load, define model, solve
+ProfileFile = 'profile.jsonl'   # Profile records as JSON lines, appended to by each run
+Incremental = False   # Build the model once and re-solve it for each order size, with a persistent solver and MIP starts
 Iterations = 1
 ExtraCandidates = 0
 
+# Sweep options
+Sweep = False   # Solve the order sizes in parallel worker processes, rather than one after another
+SweepThreads = 1   # Solver threads for each order size
+SweepWorkers = max(1, os.cpu_count() // SweepThreads)   # Number of worker processes
+SweepBudget = 3600   # seconds, for the whole sweep
+
+# Portfolio options
+Portfolio = None   # Race these configurations at once in separate processes, taking the first to prove optimality, e.g. [{}, {'presolve': 'off'}, {'random_seed': 1}, {'Formulation': 'hull'}, {'Solver': 'cbc'}]. Each is HiGHS options, plus 'Formulation' and 'Solver' (skipped if not installed). None for one solve (local solver only, not with Supervised, Incremental, Sweep or Queued)
+PortfolioDelay = 10   # seconds to solve directly with the model's own settings before racing. The race only starts if that solve isn't optimal by then, as starting its processes takes a few seconds, and starts from that solve's incumbent with the rest of the time limit. 0 to always race
+PortfolioGrace = 10   # seconds allowed past the time limit for the configurations to stop
+PortfolioFile = 'portfolio.jsonl'   # Record of each race: the winning configuration and the outcome of each, for tuning the settings
+
+# Queue options
+Queued = False   # Solve on a local job queue (LocalSolverManager), with the same solve call as NEOS. The order sizes are built in turn and queued, so building overlaps solving (not with Supervised, Incremental or Sweep, and no cache except with Budget)
+QueueWorkers = None   # Solves at the same time, or None for one per QueueThreads CPUs
+QueueThreads = 1   # Solver threads for each solve
+QueueMemory = None   # MB of memory for each solve, which fails if it uses more, or None for no limit
+Manager = None   # The job queue, created by the first queued case
+
 # Solver options
 Neos = False
 SolverName = 'appsi_highs'
@@ -240,6 +459,6 @@ ModelFile = 'model-5c.gams'
 
 # Fixed
 ModelName = 'Paper coverage - Model 5c'
-Checkpoints = []   # List of time checkpoints
 
-Main()
+if __name__ == '__main__':   # Guard, so that sweep worker processes can import this file without running it
+    Main()
@@ -0,0 +1,273 @@
+# Electricity market - Model 1
+# Simple electricity market model. No network. Script version of Model-1-fixed-demand-no-network-v1.ipynb
+
+# Import dependencies
+
+import pyomo.environ as pyo
+from pyomo.contrib import appsi
+import pandas as pd
+import numpy as np
+import time as tm
+import os.path
+import sys
+import json
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Tools'))   # Shared helpers
+from profiler import StartProfile, ProfilePhase, Profiled, WriteProfile
+from solution import WriteChunk
+
+# Get data
+
+@Profiled('Load data')
+def GetData(DataFilename):
+    with open(DataFilename, 'r') as f:
+        Data = json.load(f)
+    return Data
+
+# Declarations
+
+@Profiled('Define model')
+def DefineModel(Data):
+    Model = pyo.ConcreteModel(name = 'Electricity market Model 1 - ' + Data['Name'])
+
+    Model.Demand = pyo.Param(within = pyo.NonNegativeReals, mutable = True, initialize = Data['Demand'])   # Mutable, so that scenarios can change it
+
+    Model.VarInitial = pyo.Param(within = pyo.NonNegativeReals, initialize = Data['VarInitial'])
+    Model.VarLBounds = pyo.Param(within = pyo.NonNegativeReals, initialize = Data['VarLBounds'])
+    Model.VarUBounds = pyo.Param(within = pyo.NonNegativeReals, initialize = Data['VarUBounds'])
+    Model.Engine = pyo.Param(within = pyo.Any, initialize = Data['Engine'])
+    Model.TimeLimit = pyo.Param(within = pyo.NonNegativeReals, initialize = Data['TimeLimit'])
+
+    Generators = Data['Generators']
+    Model.Generators = pyo.Set(initialize = list(Generators.keys()))                 # Pyomo Set rather than Python set
+
+    Model.VarCost = pyo.Param(Model.Generators, within = pyo.Reals, mutable = True)   # Reals, as a scenario may have negative costs
+    Model.GMin = pyo.Param(Model.Generators, within = pyo.NonNegativeReals, mutable = True)
+    Model.GMax = pyo.Param(Model.Generators, within = pyo.Reals, mutable = True)
+
+    for s in Model.Generators:
+        Model.VarCost[s] = Generators[s]['VarCost']
+        Model.GMin[s] = Generators[s]['GMin']
+        Model.GMax[s] = Generators[s]['GMax']
+
+    # Define model
+
+    Model.Dispatch = pyo.Var(Model.Generators, domain = pyo.NonNegativeReals, initialize = Model.VarInitial, bounds = (Model.VarLBounds, Model.VarUBounds))
+
+    def rule_demand(Model):
+        return sum(Model.Dispatch[s] for s in Model.Generators) == Model.Demand   # Total generation must meet demand
+    Model.MeetDemand = pyo.Constraint(rule = rule_demand)
+
+    def rule_mustrun(Model, S):
+        return Model.Dispatch[S] >= Model.GMin[S]   # Minimum dispatch for each generator. May include must run minimum
+    Model.MustRun = pyo.Constraint(Model.Generators, rule = rule_mustrun)
+
+    def rule_capacity(Model, S):
+        return Model.Dispatch[S] <= Model.GMax[S]   # Maximum dispatch for each generator
+    Model.MaxCapacity = pyo.Constraint(Model.Generators, rule = rule_capacity)
+
+    def rule_Obj(Model):
+        return sum(Model.VarCost[s] * Model.Dispatch[s] for s in Model.Generators)   # Total cost of dispatched generation
+    Model.Obj = pyo.Objective(rule = rule_Obj, sense = pyo.minimize)
+    return Model
+
+# Solve model
+
+def CallSolver(Model):
+    Solver = pyo.SolverFactory(pyo.value(Model.Engine))
+    Model.dual = pyo.Suffix(direction = pyo.Suffix.IMPORT)
+    if pyo.value(Model.Engine) == 'appsi_highs':
+        Solver.options['time_limit'] = pyo.value(Model.TimeLimit)
+        Solver.options['log_file'] = 'highs.log'
+        with ProfilePhase('Translate'):   # Translate the model to HiGHS first, so that translation is timed separately
+            Solver.set_instance(Model)
+    with ProfilePhase('Solve'):
+        Results = Solver.solve(Model, load_solutions = False, tee = False)
+    return Results
+
+# Process results and write output
+
+@Profiled('Output')
+def WriteOutput(Model, Results):
+    WriteSolution = False
+    Optimal = False
+    LimitStop = False
+    Condition = Results.solver.termination_condition
+
+    if Condition == pyo.TerminationCondition.optimal:
+        Optimal = True
+    if Condition == pyo.TerminationCondition.maxTimeLimit or Condition == pyo.TerminationCondition.maxIterations:
+        LimitStop = True
+    if Optimal or LimitStop:
+        try:
+            WriteSolution = True
+            Model.solutions.load_from(Results)                                     # Defer loading results until now, in case there is no solution to load
+            SolverData = Results.Problem._list
+            SolutionLB = SolverData[0].lower_bound
+            SolutionUB = SolverData[0].upper_bound
+        except:
+            WriteSolution = False
+
+    print(Model.name, '\n')
+    print('Status:', Results.solver.termination_condition)
+    print('Solver:', pyo.value(Model.Engine), '\n')
+
+    if LimitStop:                                                                  # Indicate how close we are to a solution
+        print('Objective bounds')
+        print('----------------')
+        if SolutionLB is None:
+            print('Lower:      None')
+        else:
+            print(f'Lower: {SolutionLB:9,.2f}')
+        if SolutionUB is None:
+            print('Upper:      None\n')
+        else:
+            print(f'Upper: {SolutionUB:9,.2f}\n')
+    if WriteSolution:
+        print(f'Total cost = ${Model.Obj():,.2f}\n')
+        if Verbose:
+            pd.options.display.float_format = "{:,.2f}".format
+            GenResults = pd.DataFrame()
+            for s in Model.Generators:
+                GenResults.loc[s, 'Dispatch'] = pyo.value(Model.Dispatch[s])
+            print(GenResults)
+
+            ConstraintStatus = pd.DataFrame(columns=['lSlack', 'uSlack', 'Dual'])
+            for c in Model.component_objects(pyo.Constraint, active = True):
+                for index in c:  # Allow for indexed contraints, like rule_capacity
+                    ConstraintStatus.loc[c[index].name] = [c[index].lslack(), c[index].uslack(), Model.dual[c[index]]]
+            print(ConstraintStatus)
+    else:
+        print('No solution loaded\n')
+        print('Model:')
+        Model.pprint()
+
+# Scenarios
+
+# Merit order dispatch for many scenarios at once: each generator runs at its minimum, then the rest of demand is met by the cheapest generators first
+# This is the optimal solution of the model, which has one demand constraint and bounds on each generator. The price is the cost of the marginal
+# generator, i.e. the dual of the demand constraint. Demand is one value per scenario, Cost is scenario x generator, Lower and Upper are per generator
+def MeritOrder(Demand, Cost, Lower, Upper):
+    Order = np.argsort(Cost, axis = 1, kind = 'stable')   # Cheapest first, in each scenario
+    Capacity = (Upper - Lower)[Order]   # Capacity above the minimum, in merit order
+    Above = np.cumsum(Capacity, axis = 1) - Capacity   # Capacity of the cheaper generators
+    Residual = Demand - Lower.sum()   # Demand left after the minimums
+    Feasible = (Residual >= 0) & (Residual <= Capacity.sum(axis = 1))
+    Fill = np.clip(Residual[:, None] - Above, 0, Capacity)
+    Dispatch = np.empty_like(Fill)
+    np.put_along_axis(Dispatch, Order, Fill, axis = 1)
+    Dispatch += Lower
+    Marginal = np.minimum((Above < Residual[:, None]).sum(axis = 1) - 1, Cost.shape[1] - 1).clip(0)   # Last generator in merit order that is needed
+    Price = np.take_along_axis(np.take_along_axis(Cost, Order, axis = 1), Marginal[:, None], axis = 1)[:, 0]
+    Dispatch[~Feasible] = np.nan
+    Price[~Feasible] = np.nan
+    return Dispatch, Price, Feasible
+
+# Dispatch for each scenario by re-solving the model on a persistent HiGHS instance. Only the changed demand and costs are passed to HiGHS,
+# which starts each solve from the previous optimal basis. A scenario with negative (or missing) demand is outside the Demand Param, so it is
+# marked infeasible without solving, as MeritOrder does. Negative costs are solved, as in MeritOrder
+def PersistentDispatch(Model, Solver, Demand, Cost):
+    Generators = list(Model.Generators)
+    Dispatch = np.full(Cost.shape, np.nan)
+    Price = np.full(len(Demand), np.nan)
+    for k in range(0, len(Demand)):
+        if not Demand[k] >= 0:   # Also catches NaN
+            continue
+        Model.Demand.set_value(Demand[k])
+        for j, g in enumerate(Generators):
+            Model.VarCost[g].set_value(Cost[k, j])
+        Results = Solver.solve(Model)
+        if Results.termination_condition == appsi.base.TerminationCondition.optimal:
+            Primals = Results.solution_loader.get_primals([Model.Dispatch[g] for g in Generators])
+            Dispatch[k] = [Primals[Model.Dispatch[g]] for g in Generators]
+            Price[k] = Results.solution_loader.get_duals([Model.MeetDemand])[Model.MeetDemand]
+    return Dispatch, Price, ~np.isnan(Price)
+
+# Persistent solver for the scenarios, with the model translated to HiGHS once
+def ScenarioSolver(Data):
+    Model = DefineModel(Data)
+    Solver = appsi.solvers.Highs()
+    Solver.config.time_limit = Data['TimeLimit']
+    Solver.config.load_solution = False
+    Solver.config.stream_solver = False
+    for Check in ['check_for_new_or_removed_constraints', 'check_for_new_or_removed_vars', 'check_for_new_or_removed_params', 'check_for_new_objective',
+                  'update_constraints', 'update_vars', 'update_named_expressions', 'update_objective']:
+        setattr(Solver.update_config, Check, False)   # Only the parameter values change between scenarios, so skip looking for other changes
+    with ProfilePhase('Translate'):
+        Solver.set_instance(Model)
+    return Model, Solver
+
+# Solve every scenario in the scenario file, reading and writing ScenarioChunk scenarios at a time, so the file can be larger than memory
+# The file has a Demand column and, optionally, a column for any generator (named as the generator) giving its VarCost in each scenario
+# Other generators keep their cost from the data file. Other columns, e.g. a scenario name, are copied to the output
+@Profiled('Scenarios')
+def RunScenarios(Data):
+    Generators = list(Data['Generators'])
+    BaseCost = np.array([Data['Generators'][g]['VarCost'] for g in Generators], dtype = np.float64)
+    Lower = np.maximum([Data['Generators'][g]['GMin'] for g in Generators], Data['VarLBounds']).astype(np.float64)   # Variable bounds also apply
+    Upper = np.minimum([Data['Generators'][g]['GMax'] for g in Generators], Data['VarUBounds']).astype(np.float64)
+    if ScenarioMethod not in ['merit', 'persistent']:
+        raise ValueError('Unknown scenario method, use merit or persistent: ' + str(ScenarioMethod))
+    if ScenarioMethod == 'persistent' or ScenarioCheck > 0:
+        Model, Solver = ScenarioSolver(Data)
+    Count, Infeasible, Checked, Difference = 0, 0, 0, 0.0
+    Started = tm.perf_counter()
+    for Chunk, Scenarios in enumerate(pd.read_csv(ScenarioFile, chunksize = ScenarioChunk), 1):
+        Demand = Scenarios['Demand'].to_numpy(dtype = np.float64)
+        Cost = np.tile(BaseCost, (len(Scenarios), 1))
+        for j, g in enumerate(Generators):
+            if g in Scenarios:
+                Cost[:, j] = Scenarios[g].to_numpy(dtype = np.float64)
+        if ScenarioMethod == 'merit':
+            Dispatch, Price, Feasible = MeritOrder(Demand, Cost, Lower, Upper)
+            if ScenarioCheck > 0:   # Compare the total cost of the first few scenarios in the chunk with the LP
+                k = min(ScenarioCheck, len(Demand))
+                LpDispatch, LpPrice, LpFeasible = PersistentDispatch(Model, Solver, Demand[:k], Cost[:k])
+                Both = Feasible[:k] & LpFeasible
+                Difference = max(Difference, np.abs((Dispatch[:k][Both] * Cost[:k][Both]).sum(axis = 1) - (LpDispatch[Both] * Cost[:k][Both]).sum(axis = 1)).max(initial = 0.0))
+                Checked += k
+        else:
+            Dispatch, Price, Feasible = PersistentDispatch(Model, Solver, Demand, Cost)
+        Solution = pd.DataFrame({'Demand': Demand, 'Status': np.where(Feasible, 'optimal', 'infeasible'), 'Cost': (Dispatch * Cost).sum(axis = 1), 'Price': Price}, index = Scenarios.index)   # Cost is NaN if infeasible
+        Table = pd.concat([Scenarios.drop(columns = ['Demand'] + [g for g in Generators if g in Scenarios]), Solution, pd.DataFrame(Dispatch, index = Scenarios.index, columns = Generators)], axis = 1)
+        Table.index.name = 'Scenario'
+        if ScenarioOutput is not None:
+            WriteChunk(Table, ScenarioOutput, Chunk)
+        Count += len(Scenarios)
+        Infeasible += int((~Feasible).sum())
+        if Verbose:
+            print(f'Chunk {Chunk:>6,.0f}: {Count:>12,.0f} scenarios, {Count / (tm.perf_counter() - Started):>12,.0f} per second')
+    Elapsed = tm.perf_counter() - Started
+    print(f'\nScenarios:   {Count:,.0f} ({ScenarioMethod}), of which {Infeasible:,.0f} infeasible')
+    print(f'Time:        {Elapsed:,.2f} seconds, {Count / max(Elapsed, 1e-9):,.0f} scenarios per second')
+    if Checked > 0:
+        print(f'Check:       {Checked:,.0f} scenarios also solved as an LP, largest difference in total cost ${Difference:,.6f}')
+
+def Main():
+    if Profile:
+        StartProfile(ProfileFile, Script = 'model-1', DataFile = DataFilename)
+    Data = GetData(DataFilename)
+    if ScenarioFile is not None:
+        RunScenarios(Data)
+    else:
+        Model = DefineModel(Data)
+        Results = CallSolver(Model)
+        WriteOutput(Model, Results)
+    WriteProfile()
+
+# Globals
+
+DataFilename = 'market-data-1.json'   # Can use data files 1 to 3
+Verbose = True
+Profile = False   # Record the wall time, CPU time and peak memory of each phase
+ProfileFile = 'profile.jsonl'   # Profile records as JSON lines, appended to by each run
+
+# Scenario options
+
+ScenarioFile = None   # CSV file of demand and cost scenarios to solve in a batch, rather than the single case in the data file, e.g. 'scenarios.csv'
+ScenarioMethod = 'merit'   # 'merit' dispatches all scenarios in a chunk at once, in merit order. 'persistent' re-solves the LP for each scenario on one HiGHS instance
+ScenarioChunk = 10000   # Scenarios read, solved and written at a time
+ScenarioOutput = None   # File for the dispatch, cost and price of each scenario, written a chunk at a time, e.g. 'dispatch.csv' or 'dispatch.parquet'
+ScenarioCheck = 0   # With 'merit', also solve this many scenarios of each chunk as an LP, and report the largest difference in total cost
+
+if __name__ == '__main__':
+    Main()
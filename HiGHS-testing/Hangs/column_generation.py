@@ -0,0 +1,280 @@
+# Wire cutting by column generation (Gilmore-Gomory), as an alternative to the assignment model in hangs.py
+# Uses the same data as hangs.py (Stock, Demand, MustUse, UseOne). Pieces of the same length are one demand row, and stock items with the same
+# length and must-use status are one stock type, so the model size depends on the number of distinct lengths rather than the number of pieces
+# The LP master is solved with highspy, with new cutting patterns priced by an unbounded knapsack (any number of each piece length, as the master
+# covers demand) solved by dynamic programming. Then the master is solved as an integer program over the patterns found, or over every pattern
+# for small instances, and the patterns are assigned to the stock items and pieces for reporting
+# The objective is the same as hangs.py: total off-cut, excluding the first stock item when UseOne is 0 (only the length cut from it counts)
+
+import functools
+import time
+import numpy as np
+import highspy
+from profiler import ProfilePhase
+
+# Lengths as whole numbers in units of their greatest common divisor, e.g. 10 mm, so that the knapsack table is as small as possible
+def ScaledLengths(Required, Lengths):
+    All = np.concatenate((Required, Lengths))
+    if not np.all(All == np.round(All)):
+        raise ValueError('Column generation needs whole number lengths')
+    All = All.astype(np.int64)
+    Unit = int(np.gcd.reduce(All))
+    return All[:len(Required)] // Unit, All[len(Required):] // Unit, Unit
+
+# Knapsack by dynamic programming: the most value from any number of copies of each item, with total weight <= each capacity up to Capacity
+# Each capacity is one vectorized step over the items that fit. Returns the best value and the item added last for each capacity (-1 if none)
+def Knapsack(Weights, Values, Capacity):
+    Items = np.flatnonzero((Values > 0) & (Weights <= Capacity))
+    Items = Items[np.argsort(Weights[Items], kind = 'stable')]   # By weight, so the items that fit each capacity are the first Fit[c]
+    w, v = Weights[Items].astype(np.int64), Values[Items]
+    Fit = np.searchsorted(w, np.arange(Capacity + 1), side = 'right')
+    Best = np.zeros(Capacity + 1)
+    Last = np.full(Capacity + 1, -1)
+    for c in range(int(w[0]) if len(w) > 0 else Capacity + 1, Capacity + 1):
+        Options = Best[c - w[:Fit[c]]] + v[:Fit[c]]
+        j = Options.argmax()
+        if Options[j] > Best[c - 1] + 1e-9:
+            Best[c] = Options[j]
+            Last[c] = Items[j]
+        else:
+            Best[c] = Best[c - 1]
+    return Best, Last
+
+# Counts of each item in the best knapsack for capacity c, traced back from the item added last
+def Pattern(Last, Weights, c):
+    Counts = np.zeros(len(Weights), dtype = np.int64)
+    while c > 0:
+        if Last[c] < 0:
+            c -= 1
+        else:
+            Counts[Last[c]] += 1
+            c -= int(Weights[Last[c]])
+    return Counts
+
+# Number of patterns with at most Bounds[i] of each item: Count[i, r] is the number of ways to cut items i onwards from room r, including none
+# Counted as floats, as the number can be far too large to enumerate
+def PatternCounts(Weights, Bounds, Capacity):
+    n = len(Weights)
+    Count = np.zeros((n + 1, Capacity + 1))
+    Count[n] = 1
+    for i in range(n - 1, -1, -1):
+        w = int(Weights[i])
+        for c in range(0, min(int(Bounds[i]), Capacity // w) + 1):
+            Count[i, c * w:] += Count[i + 1, :Capacity + 1 - c * w]
+    return Count
+
+# Every pattern with at most Bounds[i] of each item, as a Patterns x Items array of counts with the empty pattern first, by a recursive
+# generator memoized on (item, room left), so each (item, room) combination is generated once however many ways it is reached
+def AllPatterns(Weights, Bounds, Capacity):
+    n = len(Weights)
+
+    @functools.lru_cache(maxsize = None)
+    def Generate(i, Room):
+        if i == n:
+            return np.zeros((1, 0), dtype = np.int64)
+        Blocks = []
+        for c in range(0, min(int(Bounds[i]), Room // int(Weights[i])) + 1):
+            Rest = Generate(i + 1, Room - c * int(Weights[i]))
+            Blocks.append(np.column_stack((np.full(len(Rest), c, dtype = np.int64), Rest)))
+        return np.vstack(Blocks)
+
+    return Generate(0, Capacity)
+
+# Cost of a pattern in mm: the whole stock length, or only the length cut when the stock type is excluded from the objective
+def PatternCost(Counts, PieceLength, StockLength, Excluded):
+    if Excluded:
+        return float(Counts @ PieceLength)
+    return float(StockLength)
+
+# First fit decreasing: the pieces in decreasing length order are each cut from the first stock item opened that has room, else from the first
+# unopened stock item in Order that is long enough. Returns the stock item and counts of each piece length for each item opened, or None if they
+# don't all fit. Capacity is the length of each stock item in Order
+def FirstFitDecreasing(Weights, Demand, Capacity, Order):
+    Opened, Patterns = [], []
+    Room = np.zeros(len(Order), dtype = np.int64)
+    Unopened = np.ones(len(Order), dtype = bool)
+    for i in np.argsort(-Weights, kind = 'stable'):
+        for Copy in range(0, Demand[i]):
+            Fits = np.flatnonzero(Room[:len(Opened)] >= Weights[i])
+            if len(Fits) > 0:
+                k = Fits[0]
+            else:
+                Next = np.flatnonzero(Unopened & (Capacity >= Weights[i]))
+                if len(Next) == 0:
+                    return None
+                Unopened[Next[0]] = False
+                k = len(Opened)
+                Opened.append(Order[Next[0]])
+                Room[k] = Capacity[Next[0]]
+                Patterns.append(np.zeros(len(Weights), dtype = np.int64))
+            Room[k] -= Weights[i]
+            Patterns[k][i] += 1
+    return list(zip(Opened, Patterns))
+
+# Solve with column generation, within TimeLimit seconds in total, of which the integer master has at most MasterTimeLimit seconds
+# If there are at most MaxPatterns patterns that cut no more of each piece length than is needed, the integer master has every one of them,
+# so small instances are solved exactly (the patterns found alone may not include those of an optimal solution)
+# Returns the cuts as a Piece x Stock array, in the order of the data, with the stock items used and a lower bound on the off-cut
+def SolvePatterns(Data, TimeLimit, Verbose = False, LogFile = 'highs.log', MasterTimeLimit = 10, MaxIterations = 1000, Tolerance = 1e-6, MaxPatterns = 10**4):
+    Started = time.perf_counter()
+    Pieces = list(Data['Demand'].keys())
+    Stocks = list(Data['Stock'].keys())
+    Required = np.array([Data['Demand'][p]['Required'] for p in Pieces], dtype = np.float64)
+    Lengths = np.array([Data['Stock'][s]['Lengths'] for s in Stocks], dtype = np.float64)
+    MustUse = np.array([Data['Stock'][s]['MustUse'] for s in Stocks], dtype = np.int64)
+    Excluded = np.zeros(len(Stocks), dtype = bool)
+    Excluded[0] = Data['UseOne'][0] == 0   # First stock item isn't in the objective
+
+    # Demand rows: one for each distinct piece length. Stock types: one for each distinct (length, must use, excluded) stock item
+    PieceLength, PieceType, Demand = np.unique(Required, return_inverse = True, return_counts = True)
+    StockKeys, StockType = np.unique(np.column_stack((Lengths, MustUse, Excluded)), axis = 0, return_inverse = True)
+    StockType = StockType.ravel()
+    TypeLength, TypeMustUse, TypeExcluded = StockKeys[:, 0], StockKeys[:, 1] > 0, StockKeys[:, 2] > 0
+    Available = np.bincount(StockType, minlength = len(StockKeys))
+    Weights, Capacity, Unit = ScaledLengths(PieceLength, TypeLength)
+    n, m = len(PieceLength), len(StockKeys)
+
+    # Master: cover the demand for each piece length, and use each stock type between its must-use count and the number available
+    # Artificial columns, with a cost higher than any pattern per piece, make the first LP feasible. They are removed from the integer master
+    Solver = highspy.Highs()
+    Solver.setOptionValue('output_flag', False)
+    Solver.setOptionValue('threads', 1)
+    Inf = highspy.kHighsInf
+    Solver.addRows(n, Demand.astype(np.float64), np.full(n, Inf), 0, np.array([0], dtype = np.int32), np.array([], dtype = np.int32), np.array([]))
+    Solver.addRows(m, np.where(TypeMustUse, Available, 0).astype(np.float64), Available.astype(np.float64), 0, np.array([0], dtype = np.int32), np.array([], dtype = np.int32), np.array([]))
+    Big = 2 * float(Lengths.max())
+    Solver.addCols(n, np.full(n, Big), np.zeros(n), np.full(n, Inf), n, np.arange(n, dtype = np.int32), np.arange(n, dtype = np.int32), np.ones(n))
+    Patterns = []   # (stock type, counts of each piece length)
+    Empty = {}   # Empty pattern for each must-use stock type
+
+    def AddPattern(t, Counts):
+        Rows = np.append(np.flatnonzero(Counts), n + t).astype(np.int32)
+        Values = np.append(Counts[Counts > 0], 1).astype(np.float64)
+        Solver.addCol(PatternCost(Counts, PieceLength, TypeLength[t], TypeExcluded[t]), 0, Inf, len(Rows), Rows, Values)
+        Patterns.append((t, Counts))
+
+    for t in range(0, m):   # Initial patterns: each piece length on its own, as many as fit, and an empty pattern for must-use stock
+        for i in np.flatnonzero(Weights <= Capacity[t]):
+            Counts = np.zeros(n, dtype = np.int64)
+            Counts[i] = min(Demand[i], Capacity[t] // Weights[i])
+            AddPattern(t, Counts)
+        if TypeMustUse[t]:
+            Empty[t] = len(Patterns)
+            AddPattern(t, np.zeros(n, dtype = np.int64))
+
+    # Column generation: solve the LP master, then add the pattern with the most negative reduced cost for each stock type, until there are none
+    # The prices also give a Lagrangian lower bound: the demand at the piece prices, plus the most negative reduced cost (ignoring the stock
+    # type's dual) for as many of each stock type as can be used. Stop early when the bound rounds up to the LP objective, as the LP can't do better
+    Total = Required.sum()
+    RoundUp = lambda OffCut: Unit * np.ceil(OffCut / Unit - 1e-6)   # Off-cut is a whole number of length units
+    Bound = 0.0   # Off-cut can't be negative
+    LPSolution = None
+    Iterations = 0
+    Converged = False
+    with ProfilePhase('Column generation'):
+        while Iterations < MaxIterations and time.perf_counter() - Started < TimeLimit:
+            Iterations += 1
+            Solver.run()
+            if Solver.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+                break
+            LPObjective = Solver.getInfo().objective_function_value
+            LPSolution = np.array(Solver.getSolution().col_value)
+            Duals = np.array(Solver.getSolution().row_dual)
+            Price, TypePrice = np.maximum(Duals[:n], 0), Duals[n:]
+            Lower = Demand @ Price
+            New = []
+            Best, Last = Knapsack(Weights, Price, int(Capacity.max()))   # One table for all stock lengths, as the values are the same
+            for t in range(0, m):
+                if TypeExcluded[t]:   # Cost is the length cut, so the value of each piece is its price less its length
+                    ExcludedBest, ExcludedLast = Knapsack(Weights, Price - PieceLength, int(Capacity[t]))
+                    Counts = Pattern(ExcludedLast, Weights, int(Capacity[t]))
+                    Reduced = -ExcludedBest[Capacity[t]]
+                else:
+                    Counts = Pattern(Last, Weights, int(Capacity[t]))
+                    Reduced = TypeLength[t] - Best[Capacity[t]]
+                Lower += Reduced * (Available[t] if Reduced < 0 else TypeMustUse[t] * Available[t])
+                if Reduced - TypePrice[t] < -Tolerance * TypeLength[t] and Counts.any():
+                    New.append((t, Counts))
+            Bound = max(Bound, RoundUp(Lower - Total))
+            if len(New) == 0 or Bound >= RoundUp(LPObjective - Total):
+                Converged = True
+                break
+            for t, Counts in New:
+                AddPattern(t, Counts)
+    if Verbose:
+        print(f'Column generation: {Iterations:,.0f} iterations, {len(Patterns):,.0f} patterns, lower bound {Bound:,.0f} mm' + ('' if Converged else ' (not converged)'))
+
+    # Integer master over the patterns found, or also over every pattern within the demand if there are at most MaxPatterns, without the artificial
+    # columns. With every pattern, the integer master is exact. The starting solution rounds down the LP solution, then cuts the remaining pieces
+    # from the remaining stock items by first fit decreasing. The excluded item is used first, as only the length cut from it counts, then
+    # must-use items, then the longest. Must-use items that are still not used have the empty pattern
+    with ProfilePhase('Integer master'):
+        Count = PatternCounts(Weights, Demand, int(Capacity.max()))
+        Complete = (Count[0, Capacity] - 1).sum() <= MaxPatterns
+        if Complete:
+            for t in range(0, m):
+                for Counts in AllPatterns(Weights, Demand, int(Capacity[t]))[1:]:   # Not the empty pattern, which must-use types already have
+                    AddPattern(t, Counts)
+        if Verbose:
+            print(f'Integer master: {len(Patterns):,.0f} patterns' + (', including every pattern within the demand' if Complete else ''))
+        Rounded = np.zeros(len(Patterns), dtype = np.int64)
+        if LPSolution is not None:
+            Rounded[:len(LPSolution) - n] = np.floor(LPSolution[n:] + 1e-9)
+        Remaining = Demand.copy()
+        Unused = Available.copy()
+        for k in np.flatnonzero(Rounded):
+            Remaining = np.maximum(Remaining - Rounded[k] * Patterns[k][1], 0)
+            Unused[Patterns[k][0]] -= Rounded[k]
+        Order = []
+        for t in sorted(range(0, m), key = lambda t: (not TypeExcluded[t], not TypeMustUse[t], -TypeLength[t])):
+            Order += [t] * Unused[t]
+        FirstFit = FirstFitDecreasing(Weights, Remaining, Capacity[Order], Order)
+        if FirstFit is not None:
+            Starting = np.zeros(n + len(Patterns) + len(FirstFit))
+            Starting[n:n + len(Patterns)] = Rounded
+            for t, Counts in FirstFit:
+                Starting[n + len(Patterns)] = 1
+                Unused[t] -= 1
+                AddPattern(t, Counts)
+            for t in np.flatnonzero(TypeMustUse):
+                Starting[n + Empty[t]] += Unused[t]
+        Solver.changeColsBounds(n, np.arange(n, dtype = np.int32), np.zeros(n), np.zeros(n))
+        Columns = np.arange(n, n + len(Patterns), dtype = np.int32)
+        Solver.changeColsIntegrality(len(Columns), Columns, np.array([highspy.HighsVarType.kInteger] * len(Columns)))
+        Solver.setOptionValue('output_flag', True)   # Log the integer master to LogFile, and to the console if Verbose
+        Solver.setOptionValue('log_to_console', Verbose)
+        Solver.setOptionValue('log_file', LogFile)
+        Solver.setOptionValue('time_limit', max(1.0, min(MasterTimeLimit, TimeLimit - (time.perf_counter() - Started))))
+        Solver.setOptionValue('mip_rel_gap', 0)
+        if FirstFit is not None:
+            Start = highspy.HighsSolution()
+            Start.col_value = Starting.tolist()
+            Solver.setSolution(Start)
+        Solver.run()
+    Status = Solver.modelStatusToString(Solver.getModelStatus())
+    if Complete and Status == 'Optimal':   # The integer master's optimum is the least off-cut
+        Bound = max(Bound, RoundUp(Solver.getInfo().objective_function_value - Total))
+    Solution = {'Status': Status, 'Pieces': Pieces, 'Stocks': Stocks, 'Required': Required, 'Lengths': Lengths, 'Iterations': Iterations,
+                'Patterns': len(Patterns), 'Bound': Bound, 'Cuts': None, 'UseStock': None}
+    if Solver.getInfo().primal_solution_status != highspy.SolutionStatus.kSolutionStatusFeasible:
+        return Solution
+
+    # Assign each pattern used to a stock item of its type, and the pieces of each length to those patterns in order. Patterns on the excluded
+    # stock item are filled last, so any surplus pieces (the master covers demand, so can cut more than needed) come off that item first
+    Uses = np.round(np.array(Solver.getSolution().col_value)[n:]).astype(np.int64)
+    Cuts = np.zeros((len(Pieces), len(Stocks)))
+    UseStock = MustUse > 0
+    Waiting = [list(np.flatnonzero(PieceType == i)) for i in range(0, n)]   # Pieces of each length not yet assigned
+    Free = [list(np.flatnonzero(StockType == t)) for t in range(0, m)]   # Stock items of each type not yet assigned
+    for k in sorted(np.flatnonzero(Uses), key = lambda k: TypeExcluded[Patterns[k][0]]):
+        t, Counts = Patterns[k]
+        for Copy in range(0, Uses[k]):
+            s = Free[t].pop(0)
+            for i in np.flatnonzero(Counts):
+                Take = Waiting[i][:Counts[i]]
+                del Waiting[i][:Counts[i]]
+                Cuts[Take, s] = 1
+                UseStock[s] |= len(Take) > 0
+    Solution['Cuts'] = Cuts
+    Solution['UseStock'] = UseStock
+    return Solution
@@ -2,153 +2,461 @@
 
 from pyomo.environ import *
 import os.path
+import sys
 import json
+import time as tm
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'Tools'))   # Shared helpers
+from supervisor import WriteModelFile, RemoveModelFile, SolveModelFile, SupervisedSolve, LoadSolutionByName, WriteIncidents
+from profiler import StartProfile, ProfilePhase, Profiled, WriteProfile
+from solution import Values, ValueMatrix, WriteTable
+from heuristics import PackPieces, HeuristicGap
+from highs_log import WatchProgress, FinishWatch, StopRule, SeriesWriter
+from solution_cache import InstanceKey, CachedSolution, NearestSolution, StoreSolution
+from column_generation import SolvePatterns
+from portfolio import PortfolioSolve
 
 # Get data
 
-DataFilename = 'data-100.json'
-with open(DataFilename, 'r') as f:
-    Data = json.load(f)
-
-# Declare model components and initialize simple data structures
-
-Model = ConcreteModel(name = 'Wire cutting')
-
-Stock  = Data['Stock']
-Demand = Data['Demand']
-
-Model.P  = Set(initialize = list(Demand.keys()))
-Model.S  = Set(initialize = list(Stock.keys()))
-Model.S2 = Set(initialize = Model.S - Model.S.first())  # Exclude first stock item
+@Profiled('Load data')
+def GetData(DataFilename):
+    with open(DataFilename, 'r') as f:
+        Data = json.load(f)
+    return Data
 
-Model.UseOne   = Param(initialize = Data['UseOne'][0])
-Model.Required = Param(Model.P, mutable = True)
-Model.Lengths  = Param(Model.S, mutable = True)
-Model.MustUse  = Param(Model.S, mutable = True)
-
-Model.Cuts     = Var(Model.P, Model.S, domain = Binary, initialize = 0)
-Model.UseStock = Var(Model.S, domain = Binary, initialize = 0)
-
-# Populate remaining data structures
-
-for p in Model.P:    
-    Model.Required[p] = Demand[p]['Required']
-    
-for s in Model.S:
-    Model.Lengths[s] = Stock[s]['Lengths']
-    Model.MustUse[s] = Stock[s]['MustUse']
-
-# Define constraints and objective function
+# Constraints and objective function. Defined at the top level, rather than in DefineModel, so that the model can be pickled for a supervised solve
 
 def rule_offcut(Model, S):
-    return (Model.UseStock[S] * Model.Lengths[S]) - sum(Model.Required[p] * Model.Cuts[p, S] for p in Model.P) >= 0
-Model.cOffCut = Constraint(Model.S, rule = rule_offcut)
+    return (Model.UseStock[S] * Model.Lengths[S]) - sum(Model.Required[p] * Model.Cuts[p, S] for p in Model.StockPieces[S]) >= 0
 
 def rule_cuts(Model, P):
-    return sum(Model.Cuts[P, s] for s in Model.S) == 1
-Model.cCuts = Constraint(Model.P, rule = rule_cuts)
+    return sum(Model.Cuts[P, s] for s in Model.PieceStocks[P]) == 1
 
 def rule_OnlyIfUsing(Model, P, S):
     return Model.Cuts[P, S] <= Model.UseStock[S]
-Model.cIfUsing = Constraint(Model.P, Model.S, rule = rule_OnlyIfUsing)
 
 def rule_MustUse(Model, S):
     return Model.UseStock[S] >= Model.MustUse[S]
-Model.cMustUse = Constraint(Model.S, rule = rule_MustUse)
+
+def rule_Symmetry(Model, S, T):   # Use identical stock items in order
+    return Model.UseStock[S] >= Model.UseStock[T]
+
+def rule_LoadOrder(Model, S, T):   # Identical stock items in decreasing order of the length cut from them
+    return sum(Model.Required[p] * Model.Cuts[p, S] for p in Model.StockPieces[S]) >= sum(Model.Required[p] * Model.Cuts[p, T] for p in Model.StockPieces[T])
+
+def rule_LexOrder(Model, P, S, T):   # A piece can be cut from a stock item only if an earlier piece is cut from the previous identical item
+    return Model.Cuts[P, T] <= sum(Model.Cuts[q, S] for q in Model.EarlierPieces[P] if (q, S) in Model.PS)
 
 def rule_Obj(Model):
     if Model.UseOne == 0:
         StockInclude = Model.S2
     else:
         StockInclude = Model.S
-    return sum((Model.UseStock[s] * Model.Lengths[s]) - sum(Model.Required[p] * Model.Cuts[p, s] for p in Model.P) for s in StockInclude)
-Model.OffcutWaste= Objective(rule = rule_Obj, sense = minimize)
-
-# Solve model
-
-Solver = SolverFactory('appsi_highs')
-Solver.options['time_limit']  = 300
-Solver.options['mip_rel_gap'] = 0
-Solver.options['log_file'] = 'highs.log'
-Solver.options['threads'] = 1
-Results = Solver.solve(Model, load_solutions = False, tee = True)
-
-# Process results
-
-WriteOut  = False
-Optimal   = False
-LimitStop = False
-if Results.solver.termination_condition == TerminationCondition.optimal:
-    Optimal = True
-if Results.solver.termination_condition == TerminationCondition.maxTimeLimit or Results.solver.termination_condition == TerminationCondition.maxIterations:
-    LimitStop = True
-if Optimal or LimitStop:
-    try:
-        WriteOut = True
-        Model.solutions.load_from(Results)
-        SolverData = Results.Problem._list
-        SolutionLB = SolverData[0].lower_bound
-        SolutionUB = SolverData[0].upper_bound
-    except:
-        WriteOut = False
-#WriteOut   = True
-
-# Write solution
-
-print('Status:',  Results.solver.termination_condition, '\n')
-if LimitStop:
-    print('Objective bounds')
-    print('----------------')
-    print(f'Lower: {SolutionLB:9,.2f}')
-    print(f'Upper: {SolutionUB:9,.2f}\n')
-if WriteOut:
-    if Model.UseOne == 0:
+    return sum((Model.UseStock[s] * Model.Lengths[s]) - sum(Model.Required[p] * Model.Cuts[p, s] for p in Model.StockPieces[s]) for s in StockInclude)
+
+# Classes of identical stock items (same length and must-use status), as lists of stock positions in data order. Items in a class are
+# interchangeable, except the first stock item when UseOne is 0, as it is excluded from the objective
+
+def StockClasses(Data):
+    Classes = {}
+    for k, s in enumerate(Data['Stock']):
+        if Data['UseOne'][0] == 0 and k == 0:
+            continue
+        Classes.setdefault((Data['Stock'][s]['Lengths'], Data['Stock'][s]['MustUse']), []).append(k)
+    return list(Classes.values())
+
+# Reorder the identical stock items of a solution to satisfy the symmetry breaking constraints, so that it is accepted as a MIP start
+# Used items come first ('use'), in decreasing order of length cut ('load') or in order of their longest piece ('lex')
+
+def SymmetricOrder(Data, Cuts, UseStock):
+    Cuts, UseStock = Cuts.copy(), UseStock.copy()
+    if Symmetry == 'none':
+        return Cuts, UseStock
+    Required = np.array([Data['Demand'][p]['Required'] for p in Data['Demand']], dtype = np.float64)
+    Rank = np.empty(len(Required))
+    Rank[np.argsort(-Required, kind = 'stable')] = np.arange(len(Required))   # Same order as EarlierPieces in DefineModel
+    for Class in StockClasses(Data):
+        Used = UseStock[Class] > 0.5
+        if Symmetry == 'load':
+            Key = -(Required @ Cuts[:, Class])
+        elif Symmetry == 'lex':
+            Key = np.where(Cuts[:, Class] > 0.5, Rank[:, None], np.inf).min(axis = 0)
+        else:
+            Key = np.zeros(len(Class))
+        Order = np.lexsort((Key, ~Used))   # Used first, then by key
+        Cuts[:, Class] = Cuts[:, np.array(Class)[Order]]
+        UseStock[Class] = UseStock[np.array(Class)[Order]]
+    return Cuts, UseStock
+
+# Declare model components and initialize simple data structures, then define constraints and objective function
+
+@Profiled('Define model')
+def DefineModel(Data):
+    Model = ConcreteModel(name = 'Wire cutting')
+
+    Stock  = Data['Stock']
+    Demand = Data['Demand']
+
+    Model.P  = Set(initialize = list(Demand.keys()))
+    Model.S  = Set(initialize = list(Stock.keys()))
+    Model.S2 = Set(initialize = Model.S - Model.S.first())  # Exclude first stock item
+
+    Model.UseOne   = Param(initialize = Data['UseOne'][0])
+    Model.Required = Param(Model.P, mutable = True)
+    Model.Lengths  = Param(Model.S, mutable = True)
+    Model.MustUse  = Param(Model.S, mutable = True)
+
+    # Populate remaining data structures
+
+    for p in Model.P:
+        Model.Required[p] = Demand[p]['Required']
+
+    for s in Model.S:
+        Model.Lengths[s] = Stock[s]['Lengths']
+        Model.MustUse[s] = Stock[s]['MustUse']
+
+    # Sparse index of allowed (piece, stock) pairs: a piece can only be cut from a stock item that is at least as long
+
+    Allowed = [(p, s) for p in Demand for s in Stock if Demand[p]['Required'] <= Stock[s]['Lengths']]
+    Model.PS          = Set(dimen = 2, initialize = Allowed)
+    Model.PieceStocks = Set(Model.P, initialize = {p: [s for q, s in Allowed if q == p] for p in Demand})
+    Model.StockPieces = Set(Model.S, initialize = {s: [p for p, t in Allowed if t == s] for s in Stock})
+
+    # Stock items that are identical (same length and must-use status) are interchangeable, so order their use to break symmetry
+    # When UseOne is 0 the first stock item is excluded from the objective, so it is not interchangeable with the others
+    # Symmetry 'load' also orders identical items by the length cut from them. 'lex' instead orders them by their first piece, in decreasing
+    # length order: each piece is cut from the first identical item or from an item after one that has an earlier piece, so each
+    # assignment of pieces to identical items has one representative
+
+    Names = list(Stock)
+    Symmetric = [(Names[Class[k - 1]], Names[Class[k]]) for Class in StockClasses(Data) for k in range(1, len(Class))] if Symmetry != 'none' else []
+    Model.SymPairs = Set(dimen = 2, initialize = Symmetric)
+    Ranked = sorted(Demand, key = lambda p: -Demand[p]['Required'])   # Longest first, so the first pieces (that fix the most) are the hardest to place
+    Model.EarlierPieces = Set(Model.P, initialize = {p: Ranked[:k] for k, p in enumerate(Ranked)} if Symmetry == 'lex' else {})
+    Model.LexTriples = Set(dimen = 3, initialize = [(p, S, T) for S, T in Symmetric for p in Model.StockPieces[T]] if Symmetry == 'lex' else [])
+
+    Model.Cuts     = Var(Model.PS, domain = Binary, initialize = 0)
+    Model.UseStock = Var(Model.S, domain = Binary, initialize = 0)
+
+    if Verbose:
+        print(f'Piece-stock pairs: {len(Model.PS):,.0f} of {len(Model.P) * len(Model.S):,.0f}')
+        print(f'Symmetry pairs:    {len(Model.SymPairs):,.0f} ({Symmetry})\n')
+
+    Model.cOffCut = Constraint(Model.S, rule = rule_offcut)
+    Model.cCuts = Constraint(Model.P, rule = rule_cuts)
+    Model.cIfUsing = Constraint(Model.PS, rule = rule_OnlyIfUsing)
+    Model.cMustUse = Constraint(Model.S, rule = rule_MustUse)
+    Model.cSymmetry = Constraint(Model.SymPairs, rule = rule_Symmetry)
+    if Symmetry == 'load':
+        Model.cLoadOrder = Constraint(Model.SymPairs, rule = rule_LoadOrder)
+    Model.cLexOrder = Constraint(Model.LexTriples, rule = rule_LexOrder)
+    Model.OffcutWaste= Objective(rule = rule_Obj, sense = minimize)
+    return Model
+
+# Solve model, either directly, in a monitored child process, or as a race of several configurations
+
+def CallSolver(Model, WarmStart = False):
+    Options = {'time_limit': TimeLimit, 'mip_rel_gap': 0, 'log_file': 'highs.log', 'threads': 1}
+    Model.StoppedEarly = None   # Reason the solve was stopped early by the HiGHS log watcher, if it was
+    Model.Raced = False   # Whether the results come from a portfolio solve, so from a model file
+    if Supervised:
+        with ProfilePhase('Translate'):   # The child process solves a model file, as the model can't be sent to a spawned process
+            SolveFile = WriteModelFile(Model, WarmStart)
+        with ProfilePhase('Solve'):
+            Report = SupervisedSolve(SolveModelFile, ('appsi_highs', Options, SolveFile), HangRestarts, HangWindow, LogFile = Options['log_file'], IncidentFile = IncidentFile)
+        RemoveModelFile(SolveFile)
+        WriteIncidents(Report['Incidents'])
+        if Report['Status'] != 'finished':
+            raise RuntimeError('Supervised solve ' + Report['Status'] + ': ' + str(Report['Result']))
+        Results = Report['Result']
+    elif Portfolio is not None:   # Solve directly for PortfolioDelay seconds, then race unless that proves optimality
+        Model.Raced = True
+        with ProfilePhase('Solve'):   # Includes translation, as the solves are of a model file
+            Results, Model = PortfolioSolve(Model, 'appsi_highs', Options, Portfolio, TimeLimit, PortfolioDelay, PortfolioGrace, WarmStart,
+                                            Tee = Verbose, RaceFile = PortfolioFile, Context = {'Script': 'hangs', 'DataFile': DataFilename})
+    else:
+        Solver = SolverFactory('appsi_highs')
+        for Option, Value in Options.items():
+            Solver.options[Option] = Value
+        with ProfilePhase('Translate'):
+            Solver.set_instance(Model)
+        Watch = WatchSolve(Solver._solver_model, Options['log_file'])
+        with ProfilePhase('Solve'):
+            Results = Solver.solve(Model, load_solutions = False, tee = Verbose, warmstart = WarmStart)
+        if Watch is not None and FinishWatch(Watch) is not None:
+            Model.StoppedEarly = Watch['Reason']
+            print('Stopped early:', Watch['Reason'], '\n')
+    return Results
+
+# Watch the solve's progress in the HiGHS log file, to stop early and/or write a time series of progress, if either is wanted
+
+def WatchSolve(Highs, LogFile):
+    if TargetGap is None and StallTime is None and SeriesFile is None:
+        return None
+    return WatchProgress(Highs, LogFile, StopRule(TargetGap, StallTime), None if SeriesFile is None else SeriesWriter(SeriesFile))
+
+# Heuristic solution from the data, by first fit or best fit decreasing: Piece x Stock cuts, the stock items used, and the total off-cut
+# None if there is no heuristic (StartHeuristic is None) or the pieces don't fit
+
+def HeuristicSolution(Data):
+    if StartHeuristic is None:
+        return None
+    Required = np.array([Data['Demand'][p]['Required'] for p in Data['Demand']], dtype = np.float64)
+    Lengths = np.array([Data['Stock'][s]['Lengths'] for s in Data['Stock']], dtype = np.float64)
+    MustUse = np.array([Data['Stock'][s]['MustUse'] for s in Data['Stock']])
+    with ProfilePhase('Heuristic'):
+        Packed = PackPieces(Required, Lengths, MustUse, Data['UseOne'][0], StartHeuristic)
+    if Packed is None:
+        return None
+    Cuts = np.zeros((len(Required), len(Lengths)))
+    Cuts[np.arange(len(Required)), Packed[0]] = 1
+    return Cuts, Packed[1], TotalOffcut(Data['UseOne'][0], Required, Lengths, Cuts, Packed[1])
+
+# Set the variables to a heuristic solution, as a MIP start, with the identical stock items in the order that the symmetry breaking requires
+
+def SetSolution(Model, Data, Cuts, UseStock):
+    Cuts, UseStock = SymmetricOrder(Data, Cuts, UseStock)
+    Piece = {p: k for k, p in enumerate(Data['Demand'])}
+    Stock = {s: k for k, s in enumerate(Data['Stock'])}
+    for p, s in Model.PS:
+        Model.Cuts[p, s].set_value(int(Cuts[Piece[p], Stock[s]]))
+    for s in Model.S:
+        Model.UseStock[s].set_value(int(UseStock[Stock[s]]))
+
+# Print the heuristic off-cut, and its gap to the MIP bound if there is one
+
+def WriteHeuristic(Objective, Results, Rule):
+    Bound = None
+    if Results is not None:
+        Bound = Results.problem.lower_bound
+    Gap = HeuristicGap(Objective, Bound)
+    if Gap is None:
+        print(f'\nHeuristic off-cut = {Objective:7,.0f} mm ({Rule}, no MIP bound)')
+    else:
+        print(f'\nHeuristic off-cut = {Objective:7,.0f} mm ({Rule}, {Gap:.2%} gap to MIP bound {Bound:,.0f})')
+
+# Data and settings that identify an instance in the solution cache. The settings include everything else that can change the solution
+
+def CacheKey(Data):
+    Arrays = {'Required': np.array([Data['Demand'][p]['Required'] for p in Data['Demand']]),
+              'Lengths': np.array([Data['Stock'][s]['Lengths'] for s in Data['Stock']]),
+              'MustUse': np.array([Data['Stock'][s]['MustUse'] for s in Data['Stock']]),
+              'UseOne': np.array(Data['UseOne'][:1])}
+    Settings = {'Model': 'Wire cutting', 'Method': Method, 'TimeLimit': TimeLimit, 'StartHeuristic': StartHeuristic, 'Symmetry': Symmetry,
+                'TargetGap': TargetGap, 'StallTime': StallTime, 'Supervised': Supervised, 'Portfolio': Portfolio}
+    Family, Key = InstanceKey(Arrays, Settings)
+    return Arrays, Family, Key
+
+# Start from the solution of the nearest cached instance, if it is still feasible for this instance: Piece x Stock cuts, the stock items used, and the total off-cut
+
+def NearestStart(Data, Arrays, Family):
+    Near = NearestSolution(Family, Arrays)
+    if Near is None:
+        return None
+    Required, Lengths, MustUse = Arrays['Required'], Arrays['Lengths'], Arrays['MustUse']
+    Cuts = np.round(Near['Cuts'])[pd.Index(Near['Pieces']).get_indexer(list(Data['Demand']))][:, pd.Index(Near['Stocks']).get_indexer(list(Data['Stock']))]
+    UseStock = Near['UseStock'][pd.Index(Near['Stocks']).get_indexer(list(Data['Stock']))]
+    Fits = np.all(Cuts.sum(axis = 1) == 1) and np.all(Required @ Cuts <= UseStock * Lengths) and np.all(UseStock >= MustUse)
+    if not Fits:
+        return None
+    return Cuts, UseStock, TotalOffcut(Data['UseOne'][0], Required, Lengths, Cuts, UseStock)
+
+# Heuristic start, or the nearest cached instance's solution if that is better, with the rule that found it
+
+def StartSolution(Data):
+    Start, Rule = HeuristicSolution(Data), StartHeuristic
+    if UseCache:
+        Seed = NearestStart(Data, *CacheKey(Data)[:2])
+        if Seed is not None and (Start is None or Seed[2] < Start[2]):
+            Start, Rule = Seed, 'nearest cached'
+    return Start, Rule
+
+# Process results and write solution. Returns the solution, in the same form as from column generation, or None if no solution was loaded
+
+@Profiled('Output')
+def WriteOutput(Model, Results):
+    WriteOut  = False
+    Optimal   = False
+    LimitStop = False
+    if Results.solver.termination_condition == TerminationCondition.optimal:
+        Optimal = True
+    if Results.solver.termination_condition in [TerminationCondition.maxTimeLimit, TerminationCondition.maxIterations, TerminationCondition.resourceInterrupt]:   # Interrupted by an early stop
+        LimitStop = True
+    if Optimal or LimitStop:
+        try:
+            WriteOut = True
+            if Supervised or Model.Raced:   # The results come from a model file solved in a child process
+                WriteOut = LoadSolutionByName(Model, Results)
+            else:
+                Model.solutions.load_from(Results)
+            SolverData = Results.Problem._list
+            SolutionLB = SolverData[0].lower_bound
+            SolutionUB = SolverData[0].upper_bound
+        except:
+            WriteOut = False
+    #WriteOut   = True
+
+    print('Status:',  Results.solver.termination_condition, '\n')
+    if LimitStop:
+        print('Objective bounds')
+        print('----------------')
+        print(f'Lower: {SolutionLB:9,.2f}')
+        print(f'Upper: {SolutionUB:9,.2f}\n')
+    if WriteOut:
+        # All solution values in one pass, as Piece x Stock arrays in item number order. S and P defined as string in json file, so need to use str()
+        Pieces = [str(p) for p in range(1, len(Model.P) + 1)]
+        Stocks = [str(s) for s in range(1, len(Model.S) + 1)]
+        Cuts = ValueMatrix(Model.Cuts, Pieces, Stocks)
+        Required = Values(Model.Required)[pd.Index(list(Model.P)).get_indexer(Pieces)]
+        Lengths = Values(Model.Lengths)[pd.Index(list(Model.S)).get_indexer(Stocks)]
+        UseStock = np.round(Values(Model.UseStock)[pd.Index(list(Model.S)).get_indexer(Stocks)]) == 1
+        WriteCuts(value(Model.UseOne), Pieces, Stocks, Required, Lengths, Cuts, UseStock)
+        return {'Status': str(Results.solver.termination_condition), 'Pieces': Pieces, 'Stocks': Stocks, 'Required': Required, 'Lengths': Lengths,
+                'Bound': SolutionLB, 'Cuts': Cuts, 'UseStock': UseStock}
+    print('No solution loaded')
+    return None
+
+# Total off-cut of the used stock items, as in the objective function, from Piece x Stock cuts and the stock items used
+
+def TotalOffcut(UseOne, Required, Lengths, Cuts, UseStock):
+    OffCut = UseStock * Lengths - Required @ Cuts
+    if UseOne == 0:
+        OffCut = OffCut[1:]   # Exclude first stock item
+    return OffCut.sum()
+
+# Print the off-cut and waste, then the cut matrix. Also used by the column generation method
+
+def WriteCuts(UseOne, Pieces, Stocks, Required, Lengths, Cuts, UseStock):
+    if UseOne == 0:
         print('Excluding length 1')
     else:
         print('Including length 1')
-    print(f'Total off-cut = {Model.OffcutWaste():7,.0f} mm')
+    OffcutWaste = TotalOffcut(UseOne, Required, Lengths, Cuts, UseStock)
+    print(f'Total off-cut = {OffcutWaste:7,.0f} mm')
 
-    TotalLength = 0
-    for p in Model.P:
-        TotalLength += value(Model.Required[p])
+    TotalLength = Required.sum()
     print(f'Total length  = {TotalLength:7,.0f} mm')
-    WastePct = Model.OffcutWaste() / TotalLength * 100
+    WastePct = OffcutWaste / TotalLength * 100
     print(f'Waste         = {WastePct:7,.2f} %')
-    
-    Cut_matrix = '\n'
-    Cut_matrix += 11 * ' ' + 'Stock\n'
-    Cut_matrix += 'Piece' + 7 * ' '
-    for s in range(1, len(Model.S) + 1):                 # Stock item numbers
-        Cut_matrix += str(s).rjust(4) + 4 * ' '
-    Cut_matrix += '\n'
-    Cut_matrix += (8 * (len(Model.S) - 1) + 16) * '-'    # Header underline
-    Cut_matrix += '\n'
-    for p in range(1, len(Model.P) + 1):                 # Piece item numbers
-        Cut_matrix += str(p).rjust(5) + 10 * ' '
-        for s in range(1, len(Model.S) + 1):
-            if round(value(Model.Cuts[str(p), str(s)]),0) == 1:   # S and P defined as string in json file, so need to use str()
-                Output = 'x'
-            else:
-                Output = '-'
-            Cut_matrix += Output + 7 * ' '
+
+    OffCut = Lengths - Required @ Cuts                   # Length of off-cut
+    Cell = 7 * ' '
+    if PrintMatrix:
+        Cut_matrix = '\n'
+        Cut_matrix += 11 * ' ' + 'Stock\n'
+        Cut_matrix += 'Piece' + 7 * ' '
+        Cut_matrix += ''.join(s.rjust(4) + 4 * ' ' for s in Stocks)   # Stock item numbers
         Cut_matrix += '\n'
-    Cut_matrix += (8 * (len(Model.S) - 1) + 16) * '-'    # Footer underline
-    Cut_matrix += '\n'
-    Cut_matrix += 'Use:' + 11 * ' '
-    for s in Model.S:                                    # Item used
-        if round(value(Model.UseStock[s]), 0) == 1:
-            Cut_matrix += 'x' + 7 * ' '
+        Cut_matrix += (8 * (len(Stocks) - 1) + 16) * '-'    # Header underline
+        Cut_matrix += '\n'
+        Marks = np.where(np.round(Cuts) == 1, 'x' + Cell, '-' + Cell)
+        Cut_matrix += ''.join(p.rjust(5) + 10 * ' ' + ''.join(Row) + '\n' for p, Row in zip(Pieces, Marks))   # Piece item numbers
+        Cut_matrix += (8 * (len(Stocks) - 1) + 16) * '-'    # Footer underline
+        Cut_matrix += '\n'
+        Cut_matrix += 'Use:' + 11 * ' '
+        Cut_matrix += ''.join(np.where(UseStock, 'x' + Cell, '-' + Cell))   # Item used
+        Cut_matrix += '\nOff-cut '
+        Cut_matrix += ''.join(f'{RemainingLength:7,.0f}'.rjust(8) for RemainingLength in OffCut)
+        print(Cut_matrix)
+    if OutputFile is not None:   # Also write the cut matrix to a file, with rows for stock use and off-cut, e.g. for large instances
+        CutTable = pd.DataFrame((np.round(Cuts) == 1).astype(int), index = Pieces, columns = Stocks)
+        CutTable.loc['Use'] = UseStock.astype(int)
+        CutTable.loc['Off-cut'] = np.round(OffCut).astype(int)   # mm
+        WriteTable(CutTable, OutputFile)
+
+# Process a solution that has no Pyomo model: from column generation, or from the solution cache
+
+@Profiled('Output')
+def WritePatternOutput(Data, Solution):
+    print('Status:', Solution['Status'], '\n')
+    if Solution['Cuts'] is None:
+        print('No solution loaded')
+        return
+    Upper = TotalOffcut(Data['UseOne'][0], Solution['Required'], Solution['Lengths'], Solution['Cuts'], Solution['UseStock'])
+    print('Objective bounds')   # The integer master only uses the patterns found, so it may not be optimal
+    print('----------------')
+    if Solution['Bound'] is None:
+        print('Lower:      None')
+    else:
+        print(f'Lower: {Solution["Bound"] + 0.0:9,.2f}')
+    print(f'Upper: {Upper:9,.2f}\n')
+    WriteCuts(Data['UseOne'][0], Solution['Pieces'], Solution['Stocks'], Solution['Required'], Solution['Lengths'], Solution['Cuts'], Solution['UseStock'])
+
+def Main():
+    if Profile:
+        StartProfile(ProfileFile, Script = 'hangs', DataFile = DataFilename, TimeLimit = TimeLimit, Method = Method)
+    Data = GetData(DataFilename)
+    if UseCache:
+        Arrays, Family, Key = CacheKey(Data)
+        Cached = CachedSolution(Family, Key)
+        if Cached is not None:   # Same data and settings as an earlier run, so report its solution without solving
+            print('Cached solution from an earlier run')
+            WritePatternOutput(Data, Cached)
+            WriteProfile()
+            return
+    Solution, StoppedEarly = None, None
+    if HeuristicOnly:   # Report the heuristic solution, without building or solving a model
+        Start, Rule = StartSolution(Data)
+        if Start is None:
+            print('No heuristic solution found')
         else:
-            Cut_matrix += '-' + 7 * ' '
-    Cut_matrix += '\nOff-cut '
-    for s in Model.S:                                    # Length of off-cut
-        UsedLength = 0
-        for p in Model.P:
-            UsedLength += value(Model.Cuts[str(p), str(s)]) * value(Model.Required[p])
-        RemainingLength = value(Model.Lengths[s]) - UsedLength
-        Cut_matrix += f'{RemainingLength:7,.0f}'.rjust(8)
-    print(Cut_matrix)
-else:
-    print('No solution loaded')
+            Required = np.array([Data['Demand'][p]['Required'] for p in Data['Demand']], dtype = np.float64)
+            Lengths = np.array([Data['Stock'][s]['Lengths'] for s in Data['Stock']], dtype = np.float64)
+            WriteCuts(Data['UseOne'][0], list(Data['Demand']), list(Data['Stock']), Required, Lengths, Start[0], Start[1])
+            WriteHeuristic(Start[2], None, Rule)
+    elif Method == 'patterns':
+        Solution = SolvePatterns(Data, TimeLimit, Verbose)
+        WritePatternOutput(Data, Solution)
+        if Solution['Cuts'] is None:
+            Solution = None
+    else:
+        Start, Rule = StartSolution(Data)
+        Model = DefineModel(Data)
+        if Start is not None:
+            SetSolution(Model, Data, Start[0], Start[1])
+        Results = CallSolver(Model, WarmStart = Start is not None)
+        StoppedEarly = Model.StoppedEarly
+        Solution = WriteOutput(Model, Results)
+        if Start is not None:
+            WriteHeuristic(Start[2], Results, Rule)
+        if WriteFile:
+            Model.write()
+    if UseCache and Solution is not None:   # Only an optimal solve that wasn't stopped early is final
+        Final = Solution['Status'].lower() == 'optimal' and StoppedEarly is None
+        StoreSolution(Family, Key, Arrays, Solution, MaxEntries = CacheEntries, Final = Final)
+    WriteProfile()
+
+# Globals
+
+DataFilename = 'data-100.json'
+TimeLimit = 300   # seconds
+Verbose = True
+WriteFile = True   # Write the model to a file, in the default format
+OutputFile = None   # Also write the cut matrix to a file, e.g. 'cuts.parquet' or 'cuts.csv'
+PrintMatrix = True   # Print the cut matrix, which has a column for each stock item. Turn off for large instances, and use OutputFile instead
+
+# Options
+
+StartHeuristic = 'best fit'   # Heuristic solution to start the assignment model from: 'first fit' or 'best fit' decreasing, or None for no start
+HeuristicOnly = False   # Report the heuristic solution without solving a model, for a fast answer when no proof of optimality is needed
+Symmetry = 'use'   # Symmetry breaking for identical stock items in the assignment model: 'use' (use them in order), 'load' (also in decreasing order of length cut), 'lex' (also in order of their first piece) or 'none'. Method 'patterns' has no such symmetry, as it counts patterns rather than assigning them to items
+Method = 'assignment'   # 'assignment' solves the Cuts[P, S] model. 'patterns' uses column generation, which scales to thousands of pieces (Supervised not used)
+UseCache = False   # Report the cached solution of an earlier run with the same data and settings, and start from the nearest cached instance's solution. Turn off for benchmarking
+CacheEntries = 100   # Solutions kept in the cache, in .cache/solutions in the working directory. The least recently used are removed
+TargetGap = None   # Stop the solve early once the relative gap is at most this, e.g. 0.01, read from the HiGHS log as it is written. None for no target (not with Supervised)
+StallTime = None   # Stop the solve early once the gap hasn't improved for this many seconds, e.g. 60. None for no limit
+SeriesFile = None   # Write the MIP progress (time, nodes, bound, incumbent, gap) to a CSV file as the solve runs, e.g. 'progress.csv'
+Supervised = False   # Solve in a monitored child process, and restart the solve with other settings if HiGHS hangs
+HangWindow = 60   # seconds with no CPU use and no log output before the solve is treated as hung
+HangRestarts = [{'random_seed': 1}, {'random_seed': 2}, {'random_seed': 3, 'presolve': 'off'}]   # Settings for each restart after a hang
+IncidentFile = 'incidents.jsonl'   # Record of each hang
+Portfolio = None   # Race these configurations at once in separate processes, taking the first to prove optimality, e.g. [{}, {'presolve': 'off'}, {'random_seed': 1}, {'Solver': 'cbc'}]. Each is HiGHS options, plus 'Solver' (skipped if not installed). None for one solve (not with Supervised)
+PortfolioDelay = 10   # seconds to solve directly with the model's own settings before racing. The race only starts if that solve isn't optimal by then, as starting its processes takes a few seconds, and starts from that solve's incumbent with the rest of the time limit. 0 to always race
+PortfolioGrace = 10   # seconds allowed past the time limit for the configurations to stop
+PortfolioFile = 'portfolio.jsonl'   # Record of each race: the winning configuration and the outcome of each, for tuning the settings
+Profile = False   # Record the wall time, CPU time and peak memory of each phase
+ProfileFile = 'profile.jsonl'   # Profile records as JSON lines, appended to by each run
 
-Model.write()
\ No newline at end of file
+if __name__ == '__main__':   # Guard, so that a supervised solve can import this file in its child process without running it
+    Main()
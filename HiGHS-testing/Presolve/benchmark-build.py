@@ -0,0 +1,100 @@
+# Benchmark of model build time and peak memory for model-3-cloud.py: Pyomo backend (default and LowMemory builds) vs matrix backend
+# Each case runs in a fresh Python process, so that peak memory is measured for that case alone
+# Usage: python benchmark-build.py [sizes...] [--no-prune]
+
+# Import dependencies
+import pyomo.environ as pyo
+from pyomo.contrib import appsi
+import pandas as pd
+import numpy as np
+import time as tm
+import importlib.util
+import subprocess
+import json
+import sys
+import os
+import psutil
+import highspy
+
+# Import model-3-cloud.py as a module (its name isn't a valid identifier, so it can't be imported directly)
+def LoadModelModule():
+    Spec = importlib.util.spec_from_file_location('model3', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model-3-cloud.py'))
+    Module = importlib.util.module_from_spec(Spec)
+    Spec.loader.exec_module(Module)
+    return Module
+
+# Peak resident memory of this process, in bytes
+def PeakMemory():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024   # Linux reports kB
+    except ImportError:   # Windows
+        return psutil.Process().memory_info().peak_wset
+
+# Random items with sizes similar to the sample data
+def RandomItems(n, Seed = 0):
+    rng = np.random.default_rng(Seed)
+    Width = pd.DataFrame({'Item': rng.integers(500, 1000, n)})
+    Length = pd.DataFrame({'Item': rng.integers(400, 700, n)})
+    Weight = pd.DataFrame({'Item': rng.random(n) / n})
+    return Width, Length, Weight
+
+# Build one case, up to and including passing the model to HiGHS, but without solving. Backend 'lean' is the pyomo backend with LowMemory
+# The objective is then evaluated at the heuristic solution, which is the same for every backend if they build the same model
+def BuildCase(Backend, n, Prune):
+    Module = LoadModelModule()
+    Module.Verbose = False
+    Module.PruneDominated = Prune
+    Module.LowMemory = Backend == 'lean'
+    Width, Length, Weight = RandomItems(n)
+    Start = tm.perf_counter()
+    Model = pyo.ConcreteModel()
+    Model.TimeLimit = 60
+    Model.Orders = Orders
+    Module.DefineModelData(Model, Width, Length, Weight)
+    if Backend in ['pyomo', 'lean']:
+        Module.DefineModel(Model)
+        Solver = appsi.solvers.Highs()
+        Solver.set_instance(Model)   # Translation from Pyomo to HiGHS
+        Columns, Rows = Model.nvariables(), Model.nconstraints()
+    else:
+        Module.DefineModelMatrix(Model)
+        Solver = highspy.Highs()
+        Solver.setOptionValue('output_flag', False)
+        Solver.passModel(Model.Matrix)
+        Columns, Rows = Model.Matrix.num_col_, Model.Matrix.num_row_
+    Build = tm.perf_counter() - Start
+    Peak = PeakMemory()
+    Heuristic = Module.HeuristicSolution(Model, 'greedy')   # Whatever the script's StartHeuristic
+    Module.SetSolution(Model, Heuristic[0], Heuristic[1])
+    if Backend == 'matrix':
+        Objective = np.concatenate((Module.Values(Model.Select), Module.Values(Model.Allocation))) @ Model.Matrix.col_cost_ + Model.Matrix.offset_
+    else:
+        Objective = pyo.value(Model.Obj)
+    return {'Backend': Backend, 'Items': n, 'Prune': Prune, 'Columns': Columns, 'Rows': Rows, 'Build (s)': Build, 'Peak RSS (MB)': Peak / 2**20, 'Objective': Objective}
+
+def Main():
+    Prune = '--no-prune' not in sys.argv
+    Sizes = [int(a) for a in sys.argv[1:] if a.isdigit()] or [60, 150]
+    Rows = []
+    for n in Sizes:
+        for Backend in ['pyomo', 'lean', 'matrix']:
+            Child = subprocess.run([sys.executable, __file__, 'child', Backend, str(n), str(Prune)], capture_output = True, text = True, check = True)
+            Rows.append(json.loads(Child.stdout.strip().splitlines()[-1]))
+    pd.options.display.float_format = '{:,.2f}'.format
+    Table = pd.DataFrame(Rows)
+    print(Table.to_string(index = False))
+    print()
+    for n, Case in Table.groupby('Items', sort = False):   # LowMemory build compared with the default pyomo build
+        Default, Lean = Case.set_index('Backend').loc['pyomo'], Case.set_index('Backend').loc['lean']
+        print(f'n = {n}: LowMemory peak RSS {Lean["Peak RSS (MB)"]:,.1f} MB vs {Default["Peak RSS (MB)"]:,.1f} MB '
+              f'({1 - Lean["Peak RSS (MB)"] / Default["Peak RSS (MB)"]:.1%} less), objective {"identical" if np.isclose(Lean["Objective"], Default["Objective"], rtol = 1e-12) else "different"}')   # Up to rounding, as the baseline is summed in another order
+
+# Globals
+Orders = 6
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'child':
+        print(json.dumps(BuildCase(sys.argv[2], int(sys.argv[3]), sys.argv[4] == 'True')))
+    else:
+        Main()
@@ -0,0 +1,278 @@
+# Shared parts of the paper coverage models, GDP/gdp.py and HiGHS-testing/Presolve/model-3-cloud.py. The models differ in whether items can
+# rotate (gdp.py has a portrait/landscape choice, model 3 doesn't), and in how they are defined, solved and reported, which each script passes in
+# The ways of running all the order sizes take Script, the script's settings and functions from its ScriptParts(): Name, OrderSizes, Solver,
+# TimeLimit, StartHeuristic and Verbose, and the functions SetUp(Model) (returning the solver and model), Data(Model, Width, Length, Weight)
+# and Define(Model) to build the model, Set(Model, Selected, Choice) to set a solution, Output(Model, OrderSize, Results) to write it and
+# Bound(Results) for the MIP bound, or None
+
+import multiprocessing as mp
+import os
+import sys
+import time as tm
+import numpy as np
+import pandas as pd
+import pyomo.environ as pyo
+from pyomo.contrib import appsi
+from profiler import ProfileContext, ProfilePhase
+from solution import Values, ValueMatrix
+from heuristics import CoverProducts, CoverFromProducts, HeuristicGap
+from supervisor import LoadSolutionByName
+from solution_cache import InstanceKey, NearestSolution
+
+# Candidates
+
+# Enumerate candidate product sizes using width and length of items, taking item width and lengths independently to enumerate all combinations
+# Returns arrays in the same order as the element-by-element loops: all widths x lengths, then if items can Rotate, all widths x widths and
+# all lengths x lengths
+def CandidateSizes(Width, Length, Rotate = True):
+    ItemWidth = Width['Item'].to_numpy()
+    ItemLength = Length['Item'].to_numpy()
+    n = len(ItemWidth)
+    CandidateWidth = np.repeat(ItemWidth, n)
+    CandidateLength = np.tile(ItemLength, n)
+    if Rotate:
+        CandidateWidth = np.concatenate((CandidateWidth, np.repeat(ItemWidth, n), np.repeat(ItemLength, n)))
+        CandidateLength = np.concatenate((CandidateLength, np.tile(ItemWidth, n), np.tile(ItemLength, n)))
+    CandidateArea = CandidateWidth * CandidateLength
+    return CandidateWidth, CandidateLength, CandidateArea
+
+# Flag candidates that are dominated by another candidate that fits every item they fit, with no more area
+# Candidates are ranked by area (then by number of items fitted), so a dominated candidate always has a better-ranked dominator
+def DominatedCandidates(Sizes, Fits, ChunkSize = 512):
+    Area = Sizes[:, 0] * Sizes[:, 1]
+    Order = np.lexsort((-Fits.sum(axis = 1), Area))
+    Rank = np.empty(len(Area), dtype = np.int64)
+    Rank[Order] = np.arange(len(Area))
+    Covered = Fits.astype(np.float32)
+    Uncovered = (~Fits).astype(np.float32)
+    Dominated = np.zeros(len(Area), dtype = bool)
+    for Start in range(0, len(Area), ChunkSize):   # Chunked, so the candidate x candidate matrix is never held in full
+        End = min(Start + ChunkSize, len(Area))
+        Missing = Covered[Start:End] @ Uncovered.T   # Number of items that row candidate fits but column candidate does not
+        Dominated[Start:End] = ((Missing == 0) & (Rank[None, :] < Rank[Start:End, None])).any(axis = 1)
+    return Dominated
+
+# Reduce the candidate set before the model is built: merge identical sizes, drop sizes that fit no item, and if Prune, drop dominated sizes
+# An item fits a candidate in its original orientation, or also turned if items can Rotate. Returns the sizes and the candidate x item fits
+# A stage is skipped if it would leave fewer candidates than the number of products we want to order
+def ReduceCandidates(CandidateWidth, CandidateLength, ItemWidth, ItemLength, Orders, Rotate = True, Prune = False):
+    Sizes = np.unique(np.column_stack((CandidateWidth, CandidateLength)), axis = 0)   # Merge identical (width, length) pairs
+    Fits = (Sizes[:, [0]] >= ItemWidth) & (Sizes[:, [1]] >= ItemLength)   # Candidate x item, portrait
+    if Rotate:
+        Fits |= (Sizes[:, [0]] >= ItemLength) & (Sizes[:, [1]] >= ItemWidth)   # or landscape
+    Useful = Fits.any(axis = 1)
+    if Useful.sum() >= Orders:
+        Sizes, Fits = Sizes[Useful], Fits[Useful]
+    if Prune:
+        Keep = ~DominatedCandidates(Sizes, Fits)
+        if Keep.sum() >= Orders:
+            Sizes, Fits = Sizes[Keep], Fits[Keep]
+    return Sizes[:, 0], Sizes[:, 1], Fits
+
+# Starts
+
+# Heuristic solution for the model's order size: the selected candidates, the candidate allocated to each item and the objective
+# None if there is no heuristic (Method is None, otherwise 'greedy' or 'kmeans') or it doesn't find a solution
+def HeuristicSolution(Model, Method):
+    if Method is None:
+        return None
+    with ProfilePhase('Heuristic'):
+        return CoverProducts(Model.Fits, Values(Model.CandidateArea), Values(Model.Weight), Values(Model.Width), Values(Model.Length), pyo.value(Model.Orders), Method)
+
+# Print the heuristic objective, and its gap to the MIP bound if there is one
+def WriteHeuristic(Objective, Bound, Method):
+    Gap = HeuristicGap(Objective, Bound)
+    if Gap is None:
+        print(f'\nHeuristic:    {Objective:<,.0f} ({Method}, no MIP bound)')
+    else:
+        print(f'\nHeuristic:    {Objective:<,.0f} ({Method}, {Gap:.2%} gap to MIP bound {Bound:,.0f})')
+
+# Extend the solution for one order size into a MIP start for the next order size, by adding the extra candidate that most reduces the objective
+# Returns the selected candidates and the candidate allocated to each item, or None if there is no extra candidate
+def ExtendedSolution(Model):
+    Area = Values(Model.CandidateArea)
+    Weight = Values(Model.Weight)
+    Selected = Values(Model.Select) > 0.5
+    if Selected.all():   # No extra candidate available
+        return None
+    Cost = np.where(Model.Fits, Area[:, None] * Weight[None, :], np.inf)   # Candidate x item cost of each allocation
+    Current = Cost[Selected].min(axis = 0)   # Cost of each item with the products already selected
+    Total = np.minimum(Cost, Current).sum(axis = 1)   # Total cost if each candidate is added
+    Total[Selected] = np.inf
+    Selected[np.argmin(Total)] = True
+    Choice = np.where(Selected[:, None], Cost, np.inf).argmin(axis = 0)   # Allocate each item to its cheapest selected product
+    return np.flatnonzero(Selected), Choice
+
+# Solution cache
+
+# Data and settings that identify a case in the solution cache. The script's settings include everything else that can change the solution
+def CoverageKey(Width, Length, Weight, Settings):
+    Data = {'Width': Width['Item'].to_numpy(), 'Length': Length['Item'].to_numpy(), 'Weight': Weight['Item'].to_numpy()}
+    Family, Key = InstanceKey(Data, Settings)
+    return Data, Family, Key
+
+# Solution as stored in the cache: the selected product sizes and the product of each item, rather than candidate numbers, as
+# these are what a nearby instance (with a different candidate set) can start from. Also the objective, MIP bound and status
+def CacheRecord(Model, Bound, Status):
+    Candidates = list(Model.Candidate)
+    Selected = np.flatnonzero(np.isclose(Values(Model.Select), 1))
+    Allocation = ValueMatrix(Model.Allocation, list(Model.Item), [Candidates[k] for k in Selected])
+    return {'Products': np.column_stack((Values(Model.CandidateWidth)[Selected], Values(Model.CandidateLength)[Selected])).astype(int),
+            'Choice': Allocation.argmax(axis = 1),
+            'Objective': pyo.value(Model.Obj()),
+            'Bound': Bound,
+            'Status': Status}
+
+# Selected candidates and the candidate of each item, for a cached solution of this exact instance, so the product sizes are all candidates
+def CachedProducts(Model, Cached):
+    Sizes = pd.Index(list(zip(Values(Model.CandidateWidth).astype(int), Values(Model.CandidateLength).astype(int))))
+    Selected = Sizes.get_indexer([tuple(Product) for Product in Cached['Products'].tolist()])
+    return Selected, Selected[Cached['Choice']]
+
+# Start from the solution of the nearest cached instance: its product sizes, matched to this instance's candidates and improved by local search
+def NearestStart(Model, Family, Data):
+    Near = NearestSolution(Family, Data)
+    if Near is None:
+        return None
+    with ProfilePhase('Heuristic'):
+        return CoverFromProducts(Model.Fits, Values(Model.CandidateArea), Values(Model.Weight), Values(Model.Width), Values(Model.Length),
+                                 Values(Model.CandidateWidth), Values(Model.CandidateLength), Near['Products'], pyo.value(Model.Orders))
+
+# Print the status and MIP bound of a cached solution
+def WriteCached(Cached):
+    if Cached['Bound'] is None:
+        print(f'\nCached:       {Cached["Status"]} solution from an earlier run, no MIP bound')
+    else:
+        print(f'\nCached:       {Cached["Status"]} solution from an earlier run, MIP bound {Cached["Bound"]:,.0f}')
+
+# Running all the order sizes
+
+# Solve all order sizes on one model: build the model and translate it to HiGHS once, then update the number of orders and re-solve
+# Each solve is warm started from the previous order size's solution, extended with the best extra candidate. Uses a local HiGHS only
+def IncrementalCases(Width, Length, Weight, Script):
+    Model = pyo.ConcreteModel(name = Script['Name'] + ', Incremental')
+    Model.Orders = pyo.Param(within = pyo.NonNegativeIntegers, mutable = True, initialize = max(Script['OrderSizes']))   # Candidate reduction keeps enough candidates for the largest order size
+    Script['Data'](Model, Width, Length, Weight)
+    Script['Define'](Model)
+    Solver = appsi.solvers.Highs()   # Persistent solver, so only the changes are passed to HiGHS on each re-solve
+    Solver.config.time_limit = Script['TimeLimit']
+    Solver.config.stream_solver = Script['Verbose']
+    Solver.config.load_solution = False
+    Solver.config.warmstart = False   # Nothing to start from on the first solve
+    Solver.config.logfile = 'highs.log'
+    with ProfilePhase('Translate'):
+        Solver.set_instance(Model)
+    for OrderSize in Script['OrderSizes']:
+        print(Script['Name'] + ', Order size ' + str(OrderSize))
+        ProfileContext(OrderSize = OrderSize)
+        Model.Orders.set_value(OrderSize)
+        if OrderSize == min(Script['OrderSizes']):   # Later order sizes start from the previous solution
+            Start = HeuristicSolution(Model, Script['StartHeuristic'])
+            if Start is not None:
+                Script['Set'](Model, Start[0], Start[1])
+                Solver.config.warmstart = True
+        with ProfilePhase('Solve'):   # Includes passing the changes to HiGHS
+            Results = Solver.solve(Model)
+        if Results.best_feasible_objective is None:
+            print('No solution found\n')
+            continue
+        Results.solution_loader.load_vars()
+        Script['Output'](Model, OrderSize, Results)
+        if OrderSize < max(Script['OrderSizes']):
+            Extended = ExtendedSolution(Model)
+            if Extended is not None:
+                Script['Set'](Model, Extended[0], Extended[1])
+            Solver.config.warmstart = True
+
+# Build each order size in turn and queue its solve on the local job queue, so that building the next order size overlaps solving the
+# earlier ones. Then wait for each solve in order, load its solution and write the output. Each model starts from its heuristic solution
+# The script's SetUp returns the job queue as the solver, when its Queued setting is on
+def QueueCases(Width, Length, Weight, Script):
+    Jobs = []
+    for OrderSize in Script['OrderSizes']:
+        ProfileContext(OrderSize = OrderSize)
+        Model = pyo.ConcreteModel(name = Script['Name'] + ', Order size ' + str(OrderSize))
+        Model.Engine = Script['Solver']
+        Model.TimeLimit = Script['TimeLimit']
+        Solver, Model = Script['SetUp'](Model)
+        if Script['Solver'] == 'appsi_highs':
+            Model.Options['log_file'] = 'highs-' + str(OrderSize) + '.log'   # Separate log for each order size, as the solves run at the same time
+        Model.Orders = OrderSize
+        Script['Data'](Model, Width, Length, Weight)
+        Script['Define'](Model)
+        Start = HeuristicSolution(Model, Script['StartHeuristic'])
+        if Start is not None:
+            Script['Set'](Model, Start[0], Start[1])
+        with ProfilePhase('Queue'):
+            Jobs.append((Model, Start, Solver.queue(Model, solver = Model.Engine, options = Model.Options, warmstart = Start is not None, tee = False)))
+    for Model, Start, Job in Jobs:
+        print(Model.name.strip('\''))
+        try:
+            with ProfilePhase('Wait'):   # Time the parent waits for the solve, after building all the models
+                Results = Job.result()
+        except (MemoryError, RuntimeError) as Error:
+            print('Solve failed:', Error, '\n')
+            continue
+        if not LoadSolutionByName(Model, Results):
+            print('No solution:', Results.solver.termination_condition, '\n')
+            continue
+        Script['Output'](Model, pyo.value(Model.Orders), Results)
+        if Start is not None:
+            WriteHeuristic(Start[2], Script['Bound'](Results), Script['StartHeuristic'])
+
+# Sweep worker set-up: receive the script's parts and the data once per worker process, rather than once per order size
+# Workers run at the same time, so their output is dropped
+def SweepInit(Script, Width, Length, Weight):
+    global SweepData
+    SweepData = (Script, Width, Length, Weight)
+    sys.stdout = open(os.devnull, 'w')
+
+# Solve one order size in a sweep worker, with its own solver instance using Threads threads, returning one row of the results table
+def SweepCase(OrderSize, Deadline, Threads):
+    Start = tm.perf_counter()
+    Row = {'Order size': OrderSize, 'Status': 'skipped', 'Objective': np.nan, 'Bound': np.nan, 'Gap': np.nan, 'Runtime': 0.0}
+    Remaining = Deadline - tm.time()
+    if Remaining < 1:   # Time budget already used up by other order sizes
+        return Row
+    Script, Width, Length, Weight = SweepData
+    ProfileContext(OrderSize = OrderSize)
+    Model = pyo.ConcreteModel(name = Script['Name'] + ', Order size ' + str(OrderSize))
+    Model.Engine = Script['Solver']
+    Model.TimeLimit = min(Script['TimeLimit'], Remaining)
+    Solver, Model = Script['SetUp'](Model)
+    if Script['Solver'] == 'appsi_highs':
+        Solver.options['threads'] = Threads
+        Solver.options['log_file'] = 'highs-' + str(OrderSize) + '.log'   # Separate log for each order size, as the workers run at the same time
+    Model.Orders = OrderSize
+    Script['Data'](Model, Width, Length, Weight)
+    Script['Define'](Model)
+    Heuristic = HeuristicSolution(Model, Script['StartHeuristic'])
+    if Heuristic is not None:
+        Script['Set'](Model, Heuristic[0], Heuristic[1])
+    with ProfilePhase('Solve'):
+        Results = Solver.solve(Model, load_solutions = False, tee = False, warmstart = Heuristic is not None)
+    Row['Status'] = str(Results.solver.termination_condition)
+    Row['Objective'] = Results.problem.upper_bound
+    Row['Bound'] = Results.problem.lower_bound
+    if np.isfinite(Row['Objective']) and Row['Objective'] != 0:
+        Row['Gap'] = max(0, (Row['Objective'] - Row['Bound']) / abs(Row['Objective']))
+    Row['Runtime'] = tm.perf_counter() - Start
+    return Row
+
+# Solve all order sizes in parallel, in Workers processes with Threads solver threads each, within an overall time budget of Budget seconds
+# Uses a local solver only. Order sizes that haven't started when the budget runs out are skipped. Workers still running shortly after the
+# budget are stopped
+def RunSweep(Width, Length, Weight, Script, Budget, Workers, Threads):
+    Grace = 10   # seconds allowed past the budget for solvers to stop at their own time limit
+    Deadline = tm.time() + Budget
+    Pool = mp.Pool(processes = Workers, initializer = SweepInit, initargs = (Script, Width, Length, Weight))
+    Jobs = {OrderSize: Pool.apply_async(SweepCase, (OrderSize, Deadline, Threads)) for OrderSize in Script['OrderSizes']}
+    Rows = []
+    for OrderSize, Job in Jobs.items():
+        try:
+            Rows.append(Job.get(timeout = max(0, Deadline + Grace - tm.time())))
+        except mp.TimeoutError:
+            Rows.append({'Order size': OrderSize, 'Status': 'stopped', 'Objective': np.nan, 'Bound': np.nan, 'Gap': np.nan, 'Runtime': np.nan})
+    Pool.terminate()
+    Pool.join()
+    return pd.DataFrame(Rows).set_index('Order size')
@@ -0,0 +1,73 @@
+# Run a case (load data, build and solve) within one wall-clock budget
+# The case runs in a child process, so it can be stopped at the deadline even while HiGHS is in presolve, where HiGHS doesn't check its own time limit
+
+import multiprocessing as mp
+import os.path
+import queue
+import time as tm
+from highs_log import LastProgress
+
+# Runs in the child process: call the target, sending each phase mark and the final result to the parent
+def DeadlineChild(Messages, Target, Deadline, Args):
+    def Phase(Name):   # Mark the start of a phase
+        Messages.put(('Phase', Name, tm.time()))
+    try:
+        Result = Target(Phase, Deadline, *Args)
+        Messages.put(('Result', Result, tm.time()))
+    except Exception as Error:
+        Messages.put(('Error', repr(Error), tm.time()))
+
+# Run Target(Phase, Deadline, *Args) in a child process, stopping it at the deadline if it hasn't finished
+# Target calls Phase(Name) at the start of each phase, and should give HiGHS a time limit that ends at the deadline
+# Returns a dict of: Status ('finished', 'deadline' or 'error'), the target's Result (or error message), the best Incumbent and Bound
+# from the last progress line in the HiGHS log (which is all there is if the deadline was hit), and the seconds spent in each phase
+def RunWithDeadline(Target, Args, Budget, LogFile = 'highs.log', Poll = 0.1):
+    Start = tm.time()
+    Deadline = Start + Budget
+    Messages = mp.Queue()
+    Child = mp.Process(target = DeadlineChild, args = (Messages, Target, Deadline, Args))
+    Child.start()
+    Marks = [('Start-up', Start)]
+    Status, Result = 'deadline', None
+    while Status == 'deadline' and tm.time() < Deadline:
+        try:
+            Kind, Value, Time = Messages.get(timeout = max(0.001, min(Poll, Deadline - tm.time())))
+        except queue.Empty:
+            if not Child.is_alive() and Messages.empty():
+                Status, Result = 'error', 'Child process ended without a result'
+                Marks.append(('End', tm.time()))
+            continue
+        if Kind == 'Phase':
+            Marks.append((Value, Time))
+        else:
+            Status, Result = ('finished' if Kind == 'Result' else 'error'), Value
+            Marks.append(('End', Time))
+    if Status == 'deadline':
+        Child.terminate()
+        Marks.append(('End', tm.time()))
+    Child.join()
+
+    Progress = None
+    if LogFile is not None and os.path.exists(LogFile) and os.path.getmtime(LogFile) >= Start:   # Ignore a log left over from an earlier run
+        Progress = LastProgress(LogFile)
+    Phases = {Marks[k][0]: Marks[k + 1][1] - Marks[k][1] for k in range(0, len(Marks) - 1)}
+    return {'Status': Status,
+            'Result': Result,
+            'Incumbent': None if Progress is None else Progress['Incumbent'],
+            'Bound': None if Progress is None else Progress['Bound'],
+            'Phases': Phases,
+            'Elapsed': Marks[-1][1] - Start}
+
+# Print the outcome of RunWithDeadline, with the time spent in each phase
+def WriteDeadlineReport(Report):
+    print(f'\nStatus:       {Report["Status"]}')
+    if Report['Incumbent'] is not None:
+        print(f'Incumbent:    {Report["Incumbent"]:<,.2f}')
+        print(f'Bound:        {Report["Bound"]:<,.2f}')
+    if Report['Status'] == 'error':
+        print('Error:       ', Report['Result'])
+    print('\nPhase         Seconds')
+    print('---------------------')
+    for Phase, Seconds in Report['Phases'].items():
+        print(f'{Phase:12}{Seconds:9,.1f}')
+    print(f'{"Total":12}{Report["Elapsed"]:9,.1f}')
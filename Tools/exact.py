@@ -0,0 +1,112 @@
+# Exact solvers for special cases that don't need a general MIP solver, with a check for whether a case has the structure they need
+# Each returns None when the case doesn't have that structure, so the caller can fall back to building and solving the MIP
+
+import numpy as np
+
+# Paper coverage (no rotation): the items' sizes are nested if, sorted by width, their lengths don't decrease, e.g. all items have the same width,
+# which makes the problem one-dimensional. Then each item fits within every larger item. Returns the sorted order, or None if not nested
+def NestedOrder(ItemWidth, ItemLength):
+    Order = np.lexsort((ItemLength, ItemWidth))
+    if np.all(np.diff(np.asarray(ItemLength)[Order]) >= 0):
+        return Order
+    return None
+
+# One layer of the partition dynamic program: Cost[t] = min over s < t of Previous[s] + Area[t] * (Total[t] - Total[s]), for t from First
+# The best split s doesn't decrease with t (the cost is Monge, as Area and Total both increase), so each half of the targets only
+# searches its side of the middle target's best split. That is O(m log m) per layer rather than O(m^2). Up to DenseLimit pairs, all the
+# (split, target) pairs are evaluated at once instead, which is faster in NumPy than the loop over targets
+def PartitionLayer(Previous, Area, Total, First, DenseLimit = 2**22):
+    m = len(Area) - 1
+    if (m + 1) ** 2 <= DenseLimit:
+        Values = Previous[None, :] + Area[:, None] * (Total[:, None] - Total[None, :])   # Target x split
+        Values[np.triu_indices(m + 1)] = np.inf   # Split must be before the target
+        Split = Values.argmin(axis = 1)
+        Cost = Values[np.arange(m + 1), Split]
+        Cost[:First] = np.inf
+        return Cost, Split
+    Cost, Split = np.full(m + 1, np.inf), np.zeros(m + 1, dtype = np.int64)
+    Stack = [(First, m, First - 1, m - 1)]   # Targets from, to, and the range of splits to search
+    while len(Stack) > 0:
+        Low, High, SplitLow, SplitHigh = Stack.pop()
+        if Low > High:
+            continue
+        t = (Low + High) // 2
+        s = np.arange(SplitLow, min(SplitHigh, t - 1) + 1)
+        Values = Previous[s] + Area[t] * (Total[t] - Total[s])
+        Best = int(np.argmin(Values))
+        Cost[t], Split[t] = Values[Best], s[Best]
+        Stack.append((Low, t - 1, SplitLow, Split[t]))
+        Stack.append((t + 1, High, Split[t], SplitHigh))
+    return Cost, Split
+
+# Optimal partition of sorted sizes into k contiguous groups, where each group is covered by its largest size. Area is the area of each
+# size (not decreasing) and Weight the total weight of the items of each size. Returns the last size of each group and the total covered area
+def OptimalPartition(Area, Weight, k):
+    m = len(Area)
+    Area = np.concatenate(([0.0], np.asarray(Area, dtype = np.float64)))   # 1-based, so Total[t] is the weight of sizes 1..t
+    Total = np.concatenate(([0.0], np.cumsum(Weight, dtype = np.float64)))
+    Cost = np.full(m + 1, np.inf)
+    Cost[0] = 0.0
+    Splits = []
+    for j in range(1, k + 1):
+        Cost, Split = PartitionLayer(Cost, Area, Total, j)
+        Splits.append(Split)
+    Last, t = [], m
+    for j in range(k - 1, -1, -1):   # Walk back through the splits to find the end of each group
+        Last.append(t - 1)
+        t = Splits[j][t]
+    return np.array(Last[::-1]), Cost[m]
+
+# Paper coverage with nested item sizes, solved exactly by dynamic programming: choosing Orders products is then an optimal partition of the
+# sorted distinct sizes into contiguous groups, each covered by a product of its largest size. Returns the product sizes (Orders x 2), the
+# product (row) of each item and the objective (weighted area of products less weighted area of items), or None if the sizes aren't
+# nested or there are fewer distinct sizes than Orders
+def NestedCoverage(ItemWidth, ItemLength, Weight, Orders):
+    ItemWidth, ItemLength, Weight = np.asarray(ItemWidth), np.asarray(ItemLength), np.asarray(Weight, dtype = np.float64)
+    if NestedOrder(ItemWidth, ItemLength) is None:
+        return None
+    Sizes, Size = np.unique(np.column_stack((ItemWidth, ItemLength)), axis = 0, return_inverse = True)   # Sorted by width then length, so also nested
+    Size = Size.ravel()
+    if len(Sizes) < Orders:
+        return None
+    Last, Covered = OptimalPartition(Sizes[:, 0].astype(np.float64) * Sizes[:, 1], np.bincount(Size, weights = Weight, minlength = len(Sizes)), Orders)
+    Group = np.searchsorted(Last, np.arange(len(Sizes)))   # Group of each distinct size: the first group whose last size is at least as large
+    return Sizes[Last], Group[Size], Covered - np.sum(ItemWidth.astype(np.float64) * ItemLength * Weight)
+
+# Every way of buying up to n items of k types, as rows of counts sorted by the number of items, and where the rows of each number of items start
+def Mixes(n, k):
+    Mix = np.indices((n + 1,) * k).reshape(k, -1).T
+    Items = Mix.sum(axis = 1)
+    Order = np.argsort(Items, kind = 'stable')
+    Order = Order[Items[Order] <= n]
+    return Mix[Order], np.searchsorted(Items[Order], np.arange(0, n + 2))
+
+# Balanced purchase, e.g. the DMC boat model: buy whole numbers of each type, at most Budget in total cost, at least MinCount items and at least
+# MinCapacity in total capacity, with the same number n from each of two suppliers, for the most profit. The budget bounds n, so every mix of
+# each supplier's types up to that bound is listed once, and for each n every pair of mixes of n items is checked at once
+# Returns the count of each type and the profit, or None if there aren't two suppliers, a cost isn't positive (so n isn't bounded),
+# a supplier has more than MaxPoints mixes to list, or it is infeasible
+def BalancedPurchase(Cost, Capacity, Profit, Supplier, Budget, MinCount, MinCapacity, MaxPoints = 10**6):
+    Cost, Capacity, Profit, Supplier = np.asarray(Cost, dtype = np.float64), np.asarray(Capacity, dtype = np.float64), np.asarray(Profit, dtype = np.float64), np.asarray(Supplier)
+    Suppliers = np.unique(Supplier)
+    if len(Suppliers) != 2 or np.any(Cost <= 0):
+        return None
+    Types = [np.flatnonzero(Supplier == s) for s in Suppliers]
+    Most = int(np.floor(Budget / sum(Cost[t].min() for t in Types)))   # n of each, with the cheapest type of each supplier
+    if Most < 0 or max((Most + 1) ** len(t) for t in Types) > MaxPoints:
+        return None
+    (A, AStart), (B, BStart) = Mixes(Most, len(Types[0])), Mixes(Most, len(Types[1]))
+    ACost, ACapacity, AProfit = A @ Cost[Types[0]], A @ Capacity[Types[0]], A @ Profit[Types[0]]   # Of each mix
+    BCost, BCapacity, BProfit = B @ Cost[Types[1]], B @ Capacity[Types[1]], B @ Profit[Types[1]]
+    Best, BestCounts = -np.inf, None
+    for n in range(int(np.ceil(MinCount / 2)), Most + 1):
+        a, b = slice(AStart[n], AStart[n + 1]), slice(BStart[n], BStart[n + 1])
+        Feasible = (ACost[a, None] + BCost[None, b] <= Budget + 1e-9) & (ACapacity[a, None] + BCapacity[None, b] >= MinCapacity - 1e-9)
+        Total = np.where(Feasible, AProfit[a, None] + BProfit[None, b], -np.inf)
+        i, j = np.unravel_index(np.argmax(Total), Total.shape)
+        if Total[i, j] > Best:
+            Best, BestCounts = Total[i, j], np.zeros(len(Cost), dtype = np.int64)
+            BestCounts[Types[0]], BestCounts[Types[1]] = A[a][i], B[b][j]
+    if BestCounts is None:
+        return None
+    return BestCounts, Best
@@ -0,0 +1,71 @@
+# Fast loader for data in Excel files
+# Opens each workbook once, reads all the requested ranges, and caches the result as a compact .npz file next to the workbook.
+# Repeat runs with an unchanged workbook read the cache and skip openpyxl entirely.
+
+import hashlib
+import os.path
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.utils.cell import range_boundaries
+
+CacheFolder = '.cache'   # Created next to each workbook
+
+# Find the worksheet and cell coordinates of a range, given either a defined name or an address like 'Sheet'!A1:B2 or A1:B2
+def RangeAddress(wb, Worksheet, Range):
+    if Range in wb.defined_names:
+        for Title, Coord in wb.defined_names[Range].destinations:   # A named range has a single destination
+            return Title, Coord
+    if '!' in Range:
+        Title, Coord = Range.rsplit('!', 1)
+        return Title.strip('\''), Coord
+    return Worksheet, Range
+
+# Read ranges from a workbook, returning a dict of 2D lists of cell values
+def ReadWorkbook(ExcelFile, Worksheet, Ranges):
+    wb = load_workbook(filename = ExcelFile, read_only = True, data_only = True)   # Cached formula results, not the formulas
+    Data = {}
+    for Range in Ranges:
+        Title, Coord = RangeAddress(wb, Worksheet, Range)
+        min_col, min_row, max_col, max_row = range_boundaries(Coord.replace('$', ''))
+        Data[Range] = [list(Row) for Row in wb[Title].iter_rows(min_row, max_row, min_col, max_col, values_only = True)]
+    wb.close()
+    return Data
+
+# Convert one column of cell values to an array: integer or float if the values are all numeric, otherwise text
+def ColumnArray(Values):
+    if all(isinstance(v, (int, float)) or v is None for v in Values):
+        if all(isinstance(v, int) for v in Values):
+            return np.array(Values, dtype = np.int64)
+        return np.array([np.nan if v is None else v for v in Values], dtype = np.float64)
+    return np.array(['' if v is None else str(v) for v in Values], dtype = np.str_)
+
+# Name of the cache file for a workbook and set of ranges
+def CacheFile(ExcelFile, Worksheet, Ranges):
+    Key = hashlib.sha1(repr((os.path.abspath(ExcelFile), Worksheet, list(Ranges))).encode()).hexdigest()[:16]
+    Stem = os.path.splitext(os.path.basename(ExcelFile))[0]
+    return os.path.join(os.path.dirname(os.path.abspath(ExcelFile)), CacheFolder, Stem + '-' + Key + '.npz')
+
+# Load ranges from an Excel file, returning a dict of DataFrames with columns numbered from 0, like pd.DataFrame(rows)
+# Ranges can be defined names, or addresses on the given Worksheet. The cache is keyed by file path and range names,
+# and is used only if the workbook's modification time and size match those stored with it
+def LoadRanges(ExcelFile, Ranges, Worksheet = None, UseCache = True):
+    Stamp = os.stat(ExcelFile)
+    Cache = CacheFile(ExcelFile, Worksheet, Ranges)
+    if UseCache and os.path.exists(Cache):
+        with np.load(Cache) as Stored:
+            if Stored['__mtime__'] == Stamp.st_mtime_ns and Stored['__size__'] == Stamp.st_size:
+                return {Range: pd.DataFrame({j: Stored[Range + '|' + str(j)] for j in range(0, int(Stored[Range + '|columns']))}) for Range in Ranges}
+
+    Arrays = {'__mtime__': np.int64(Stamp.st_mtime_ns), '__size__': np.int64(Stamp.st_size)}
+    Frames = {}
+    for Range, Rows in ReadWorkbook(ExcelFile, Worksheet, Ranges).items():
+        Columns = [ColumnArray(list(Values)) for Values in zip(*Rows)]
+        Frames[Range] = pd.DataFrame(dict(enumerate(Columns)))
+        Arrays[Range + '|columns'] = np.int64(len(Columns))
+        for j, Column in enumerate(Columns):
+            Arrays[Range + '|' + str(j)] = Column
+    if UseCache:
+        os.makedirs(os.path.dirname(Cache), exist_ok = True)
+        np.savez(Cache, **Arrays)
+    return Frames
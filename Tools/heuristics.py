@@ -0,0 +1,160 @@
+# Fast heuristics that find good feasible solutions for the wire cutting and paper coverage models, in milliseconds
+# Used to give HiGHS a MIP start, or on their own when a good solution is enough and no proof of optimality is needed
+
+import numpy as np
+
+# Wire cutting: cut the pieces in decreasing length order, each from an open stock item with room for it, else from a newly opened stock item
+# 'first fit' uses the first item opened that has room, 'best fit' uses the item with the least room left. Must-use items, and the first item
+# when UseOne is 0 (its off-cut doesn't count), are open from the start. Other items are opened longest first
+# Returns the stock item (position) of each piece, and whether each stock item is used, or None if the pieces don't all fit
+def PackPieces(Required, Lengths, MustUse, UseOne, Rule = 'best fit'):
+    if Rule not in ['first fit', 'best fit']:
+        raise ValueError('Unknown packing rule, use first fit or best fit: ' + str(Rule))
+    Room = np.asarray(Lengths, dtype = np.float64).copy()
+    Opened = np.full(len(Room), np.inf)   # Order in which each item was opened, inf if not open
+    Start = np.flatnonzero(np.asarray(MustUse) > 0)
+    if UseOne == 0:
+        Start = np.union1d([0], Start)
+    Opened[Start] = np.arange(len(Start))
+    Closed = [s for s in np.argsort(-Room, kind = 'stable') if s not in Start]   # Items to open, longest first
+    Stock = np.full(len(Required), -1)
+    for p in np.argsort(-np.asarray(Required), kind = 'stable'):
+        Fits = np.flatnonzero(np.isfinite(Opened) & (Room >= Required[p]))
+        if len(Fits) == 0:
+            New = [s for s in Closed if Room[s] >= Required[p]]
+            if len(New) == 0:
+                return None
+            Closed.remove(New[0])
+            Opened[New[0]] = np.isfinite(Opened).sum()
+            Fits = np.array([New[0]])
+        if Rule == 'first fit':
+            s = Fits[np.argmin(Opened[Fits])]
+        else:
+            s = Fits[np.argmin(Room[Fits])]
+        Stock[p] = s
+        Room[s] -= Required[p]
+    return Stock, np.isfinite(Opened)
+
+# Paper coverage: Candidate x item cost of allocating each item to each candidate product (weighted area), inf where the candidate doesn't fit
+def CoverageCost(Fits, Area, Weight):
+    return np.where(Fits, np.asarray(Area, dtype = np.float64)[:, None] * np.asarray(Weight, dtype = np.float64)[None, :], np.inf)
+
+# Allocate each item to its cheapest selected product. Returns the product (candidate) of each item and the total cost
+def Allocate(Cost, Selected):
+    Choice = np.asarray(Selected)[Cost[Selected].argmin(axis = 0)]
+    return Choice, Cost[Choice, np.arange(Cost.shape[1])].sum()
+
+# Cost with a large finite penalty in place of inf, so that a selection that doesn't fit every item can still be compared and improved
+def Penalized(Cost):
+    Finite = np.isfinite(Cost)
+    if not Finite.any():
+        raise ValueError('No candidate product fits any item, so there is no cost to penalize from')
+    return np.where(Finite, Cost, Cost[Finite].max() * (Cost.shape[1] + 1))
+
+# Greedy: start with the product that gives the least total cost on its own (or with the given products), then add the product that most reduces the total cost
+def GreedyProducts(Cost, Orders, Selected = None):
+    Cost = Penalized(Cost)
+    if Selected is None or len(Selected) == 0:
+        Selected = [int(np.argmin(Cost.sum(axis = 1)))]
+    Selected = list(Selected)
+    Current = Cost[Selected].min(axis = 0)
+    while len(Selected) < min(Orders, len(Cost)):
+        Total = np.minimum(Cost, Current).sum(axis = 1)
+        Total[Selected] = np.inf
+        Selected.append(int(np.argmin(Total)))
+        Current = np.minimum(Current, Cost[Selected[-1]])
+    return np.array(Selected)
+
+# k-means style: cluster the items by size (short side, long side) with k-means++ starting centres, give each cluster the product with the least
+# cost for its items, then repeat: allocate each item to its cheapest product, and choose each cluster's product again, until nothing changes
+def KMeansProducts(Cost, ItemWidth, ItemLength, Orders, Seed = 0, Iterations = 20):
+    rng = np.random.default_rng(Seed)
+    Cost = Penalized(Cost)
+    Sizes = np.column_stack((np.minimum(ItemWidth, ItemLength), np.maximum(ItemWidth, ItemLength))).astype(np.float64)
+    k = min(Orders, len(Sizes), len(Cost))
+    Centres = [Sizes[rng.integers(len(Sizes))]]
+    for j in range(1, k):
+        Distance = ((Sizes[:, None, :] - np.array(Centres)[None, :, :]) ** 2).sum(axis = 2).min(axis = 1)
+        Centres.append(Sizes[rng.choice(len(Sizes), p = Distance / Distance.sum())] if Distance.sum() > 0 else Sizes[rng.integers(len(Sizes))])
+    Cluster = ((Sizes[:, None, :] - np.array(Centres)[None, :, :]) ** 2).sum(axis = 2).argmin(axis = 1)
+    Selected = None
+    for Iteration in range(0, Iterations):
+        Products = []
+        for j in range(0, k):   # Product with the least cost for each cluster's items, not already chosen for another cluster
+            Total = Cost[:, Cluster == j].sum(axis = 1)
+            Total[Products] = np.inf
+            Products.append(int(np.argmin(Total)))
+        if Selected is not None and set(Products) == set(Selected.tolist()):
+            break
+        Selected = np.array(Products)
+        Cluster = Cost[Selected].argmin(axis = 0)
+    return Selected
+
+# Local search: swap a selected product for an unselected one, taking the swap that most reduces the total cost, until no swap improves it
+# For each selected product, the cost of every possible replacement is evaluated at once, from each item's best and second best products
+def LocalSearch(Cost, Selected, MaxSwaps = 1000):
+    Cost = Penalized(Cost)
+    Selected = np.array(Selected)
+    Columns = np.arange(Cost.shape[1])
+    for Swap in range(0, MaxSwaps):
+        Sorted = np.argsort(Cost[Selected], axis = 0)
+        First = Cost[Selected[Sorted[0]], Columns]
+        Second = Cost[Selected[Sorted[1]], Columns] if len(Selected) > 1 else np.full(len(Columns), np.inf)
+        Current = First.sum()
+        Best, Out, In = Current, None, None
+        for k in range(0, len(Selected)):
+            Without = np.where(Sorted[0] == k, Second, First)   # Each item's cost with product k removed
+            Total = np.minimum(Cost, Without).sum(axis = 1)
+            Total[Selected] = np.inf
+            c = int(np.argmin(Total))
+            if Total[c] < Best - 1e-9 * abs(Current):
+                Best, Out, In = Total[c], k, c
+        if Out is None:
+            break
+        Selected[Out] = In
+    return Selected
+
+# Paper coverage heuristic: choose Orders products by 'greedy' or 'kmeans', improve them by local search, and allocate each item
+# Returns the selected candidates, the candidate allocated to each item and the objective (weighted waste), or None if an item doesn't fit
+def CoverProducts(Fits, Area, Weight, ItemWidth, ItemLength, Orders, Method = 'greedy', Seed = 0):
+    if not np.asarray(Fits).any(axis = 0).all():   # An item that no candidate fits, so no selection covers every item
+        return None
+    Cost = CoverageCost(Fits, Area, Weight)
+    if Method == 'greedy':
+        Selected = GreedyProducts(Cost, Orders)
+    elif Method == 'kmeans':
+        Selected = KMeansProducts(Cost, ItemWidth, ItemLength, Orders, Seed)
+    else:
+        raise ValueError('Unknown coverage heuristic, use greedy or kmeans: ' + str(Method))
+    return CoverSolution(Cost, Selected, Weight, ItemWidth, ItemLength)
+
+# Paper coverage start from known product sizes, e.g. the solution of a similar instance. Each product is matched to the smallest candidate
+# that is at least as large (in either orientation), then the selection is made up to Orders by greedy and improved by local search
+def CoverFromProducts(Fits, Area, Weight, ItemWidth, ItemLength, CandidateWidth, CandidateLength, Products, Orders):
+    if not np.asarray(Fits).any(axis = 0).all():   # An item that no candidate fits, so no selection covers every item
+        return None
+    Cost = CoverageCost(Fits, Area, Weight)
+    Area = np.asarray(Area, dtype = np.float64)
+    Selected = []
+    for w, l in Products[:Orders]:
+        Covers = ((CandidateWidth >= w) & (CandidateLength >= l)) | ((CandidateWidth >= l) & (CandidateLength >= w))
+        Covers[Selected] = False
+        if Covers.any():
+            Selected.append(int(np.flatnonzero(Covers)[np.argmin(Area[Covers])]))
+    return CoverSolution(Cost, GreedyProducts(Cost, Orders, Selected), Weight, ItemWidth, ItemLength)
+
+# Improve a selection by local search and allocate each item, returning the same as CoverProducts
+def CoverSolution(Cost, Selected, Weight, ItemWidth, ItemLength):
+    Selected = np.sort(LocalSearch(Cost, Selected))
+    Choice, Total = Allocate(Cost, Selected)
+    if not np.isfinite(Total):
+        return None
+    return Selected, Choice, Total - np.sum(np.asarray(ItemWidth) * np.asarray(ItemLength) * np.asarray(Weight))
+
+# Relative gap of a heuristic objective to a lower bound, e.g. the MIP bound, or None if there's no bound
+def HeuristicGap(Objective, Bound):
+    if Bound is None or not np.isfinite(Bound):
+        return None
+    if Objective == 0:
+        return 0.0
+    return max(0.0, (Objective - Bound) / abs(Objective))
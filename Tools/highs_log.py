@@ -0,0 +1,163 @@
+# Parsing of the HiGHS log file
+# HiGHS writes one line of its MIP progress table each time the bound or incumbent changes, and periodically otherwise
+
+import math
+import time
+import os
+import re
+
+# Src  Proc. InQueue |  Leaves   Expl. | BestBound       BestSol              Gap |   Cuts   InLp Confl. | LpIters     Time
+ProgressPattern = re.compile(r'^\s*([A-Za-z])?\s+(\d+)\s+(\d+)\s+(\d+)\s+([\d.]+)%\s+(\S+)\s+(\S+)\s+(\S+)\s+(\d+)\s+(\d+)\s+(\d+)\s+(\d+)\s+([\d.]+)s\s*$')
+
+# Convert a gap value from the log, which can be a percentage, 'inf' or 'Large'
+def GapValue(Text):
+    if Text.endswith('%'):
+        return float(Text[:-1]) / 100
+    return math.inf
+
+# Parse one line of the MIP progress table, returning a dict, or None if the line is not a progress line
+def ParseProgressLine(Line):
+    Match = ProgressPattern.match(Line)
+    if Match is None:
+        return None
+    Source, Nodes, InQueue, Leaves, Explored, Bound, Incumbent, Gap, Cuts, InLp, Conflicts, LpIters, Time = Match.groups()
+    return {'Source': Source or '',   # Letter showing where a new incumbent came from, e.g. H heuristic, T B&B leaf
+            'Nodes': int(Nodes),
+            'Explored': float(Explored) / 100,
+            'Bound': float(Bound),   # float() accepts 'inf' and '-inf'
+            'Incumbent': float(Incumbent),
+            'Gap': GapValue(Gap),
+            'LpIters': int(LpIters),
+            'Time': float(Time)}
+
+# Last progress line in a log file, or None if there isn't one yet. Reads the file line by line, rather than all at once
+def LastProgress(LogFile):
+    Last = None
+    try:
+        with open(LogFile, 'r') as f:
+            for Line in f:
+                Progress = ParseProgressLine(Line)
+                if Progress is not None:
+                    Last = Progress
+    except FileNotFoundError:
+        pass
+    return Last
+
+# MIP has 2326 rows; 2187 cols; 8738 nonzeros; 2187 integer variables (2187 binary)
+SizePattern = re.compile(r'^(MIP|LP)\s+has (\d+) rows?; (\d+) cols?; (\d+) nonzeros?')
+NodesPattern = re.compile(r'^Nodes\s+\d+$')   # Nodes line of the solving report, e.g. 'Nodes             1'
+
+# Summary of the last solve in a log file: model type and size, status, objective, bound, gap and branch-and-bound nodes. Values not in the log are None
+# A MIP solve ends with a 'Solving report' block, while an LP solve ends with 'Model status' and 'Objective value' lines
+def SolveSummary(LogFile):
+    Summary = {'Type': None, 'Rows': None, 'Cols': None, 'Nonzeros': None, 'Status': None, 'Objective': None, 'Bound': None, 'Gap': None, 'Nodes': None}
+    try:
+        with open(LogFile, 'r') as f:
+            for Line in f:
+                Match = SizePattern.match(Line)
+                if Match is not None:   # Start of a new solve
+                    Summary = {'Type': Match.group(1), 'Rows': int(Match.group(2)), 'Cols': int(Match.group(3)), 'Nonzeros': int(Match.group(4)),
+                               'Status': None, 'Objective': None, 'Bound': None, 'Gap': None, 'Nodes': None}
+                    continue
+                Field = Line.strip()
+                if Field.startswith('Status ') or Field.startswith('Model status'):
+                    Summary['Status'] = Field.split(':')[-1].strip() if ':' in Field else Field[len('Status'):].strip()
+                elif Field.startswith('Primal bound') or Field.startswith('Objective value'):
+                    Summary['Objective'] = float(Field.split()[-1])
+                elif Field.startswith('Dual bound'):
+                    Summary['Bound'] = float(Field.split()[-1])
+                elif Field.startswith('Gap '):
+                    Summary['Gap'] = GapValue(Field.split()[1])
+                elif NodesPattern.match(Field) is not None:   # Not the header of the progress lines, which also starts with Nodes
+                    Summary['Nodes'] = int(Field.split()[-1])
+    except FileNotFoundError:
+        pass
+    if Summary['Type'] == 'LP' and Summary['Status'] == 'Optimal':   # An LP has no separate bound
+        Summary['Bound'], Summary['Gap'] = Summary['Objective'], 0.0
+    return Summary
+
+# Incremental reader of the progress lines in a log file that HiGHS is still writing. Returns a function that, each time it is called, returns
+# the progress lines written since the last call. Only the unread part of the file is read, and a partial last line is kept until it is complete
+# FromEnd skips what is already in the file, e.g. earlier solves, as HiGHS appends to its log file. If the file is truncated, reading starts again
+def ProgressReader(LogFile, FromEnd = False):
+    State = {'Position': os.path.getsize(LogFile) if FromEnd and os.path.exists(LogFile) else 0, 'Partial': ''}
+    def Read():
+        try:
+            with open(LogFile, 'r') as f:
+                f.seek(0, 2)
+                if f.tell() < State['Position']:   # Truncated
+                    State['Position'], State['Partial'] = 0, ''
+                f.seek(State['Position'])
+                Text = State['Partial'] + f.read()
+                State['Position'] = f.tell()
+        except FileNotFoundError:
+            return []
+        Lines = Text.split('\n')
+        State['Partial'] = Lines.pop()   # Empty if the text ends with a complete line
+        return [Progress for Progress in map(ParseProgressLine, Lines) if Progress is not None]
+    return Read
+
+# Iterator over the progress lines of a log file as they are written, e.g. from a solve in another thread or process
+# Checks the file every Poll seconds, and ends once Running() returns False and the rest of the file has been read
+def FollowProgress(LogFile, Running, Poll = 0.5):
+    Read = ProgressReader(LogFile)
+    while True:
+        Active = Running()   # Checked before reading, so that nothing written before the solve ends is missed
+        yield from Read()
+        if not Active:
+            return
+        time.sleep(Poll)
+
+# Early stopping rule for a MIP solve. Returns a function of a progress line that returns the reason to stop, or None to carry on
+# Stops when the gap is at most TargetGap, or when the gap hasn't improved for StallTime seconds of solve time. None turns a test off
+def StopRule(TargetGap = None, StallTime = None):
+    State = {'Gap': math.inf, 'Since': 0.0}
+    def Check(Progress):
+        if TargetGap is not None and Progress['Gap'] <= TargetGap:
+            return f'gap {Progress["Gap"]:.2%} is within the target of {TargetGap:.2%}'
+        if Progress['Gap'] < State['Gap']:
+            State['Gap'], State['Since'] = Progress['Gap'], Progress['Time']
+        elif StallTime is not None and math.isfinite(State['Gap']) and Progress['Time'] - State['Since'] >= StallTime:
+            return f'gap {State["Gap"]:.2%} has not improved for {StallTime:,.0f} seconds'
+        return None
+    return Check
+
+# Writer of a compact time series of the progress lines, as CSV. Returns a function that appends one progress line to the file
+def SeriesWriter(SeriesFile):
+    with open(SeriesFile, 'w') as f:
+        f.write('Time,Nodes,Bound,Incumbent,Gap\n')
+    def Write(Progress):
+        with open(SeriesFile, 'a') as f:
+            f.write(f'{Progress["Time"]},{Progress["Nodes"]},{Progress["Bound"]:.10g},{Progress["Incumbent"]:.10g},{Progress["Gap"]:.6g}\n')
+    return Write
+
+# Watch the progress of a MIP solve on a highspy.Highs object, from its log file, and stop the solve when Rule gives a reason to stop
+# The log is read from HiGHS's own MIP interrupt callback, at most every Poll seconds, so no other thread is needed. OnProgress (if given)
+# is called with each progress line, e.g. a SeriesWriter. Returns a dict whose 'Reason' is set if the solve was stopped early
+# The solve is stopped by cutting its time limit to zero, rather than by an interrupt, so it ends as a time limit stop with its best solution,
+# which Pyomo loads as usual. Call before the solve starts, so that only the new part of the log is read
+def WatchProgress(Highs, LogFile, Rule = None, OnProgress = None, Poll = 0.5):
+    Read = ProgressReader(LogFile, FromEnd = True)
+    Watch = {'Reason': None, 'Progress': None, 'Checked': 0.0, 'Read': Read, 'OnProgress': OnProgress}
+    def Check(Event):
+        if Watch['Reason'] is not None or time.monotonic() - Watch['Checked'] < Poll:
+            return
+        Watch['Checked'] = time.monotonic()
+        for Progress in Read():
+            Watch['Progress'] = Progress
+            if OnProgress is not None:
+                OnProgress(Progress)
+            if Rule is not None and Watch['Reason'] is None:
+                Watch['Reason'] = Rule(Progress)
+        if Watch['Reason'] is not None:
+            Highs.setOptionValue('time_limit', 0.0)
+    Highs.cbMipInterrupt.subscribe(Check)
+    return Watch
+
+# After the solve, pass the rest of the progress lines to OnProgress, as the last lines are written after the last check. Returns the reason for an early stop, or None
+def FinishWatch(Watch):
+    for Progress in Watch['Read']():
+        Watch['Progress'] = Progress
+        if Watch['OnProgress'] is not None:
+            Watch['OnProgress'](Progress)
+    return Watch['Reason']
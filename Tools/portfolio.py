@@ -0,0 +1,168 @@
+# Portfolio solve: race several solver configurations on the same problem at once, each in its own process, and take the first to prove optimality
+# Runtime can differ hugely between configurations on the same instance (e.g. presolve on or off, see HiGHS-testing/Presolve/readme.md),
+# and which is fastest is hard to predict, so racing them gets close to the fastest. Each race is recorded, to show which settings win
+# A configuration is a dict of solver options, plus 'Solver' for a solver other than the model's own (e.g. 'glpk' or 'cbc', if installed)
+# and any model settings that the caller handles, e.g. 'Formulation' in gdp.py. {} is the model's own solver and settings
+# The solves are of model files (see supervisor.py), so the race works with any process start method
+
+import time as tm
+import datetime as dt
+import json
+import concurrent.futures as cf
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.opt import SolverResults, SolverStatus
+from solver_manager import LocalSolverManager
+from supervisor import WriteModelFile, RemoveModelFile, SolveModelFile, LoadSolutionByName
+
+ModelSettings = ['Solver', 'Formulation']   # Configuration keys that aren't solver options
+
+# Configurations whose solver is installed, so they can run here
+def AvailableConfigurations(Portfolio, Engine):
+    Available = []
+    for Settings in Portfolio:
+        if pyo.SolverFactory(Settings.get('Solver', Engine)).available(exception_flag = False):
+            Available.append(Settings)
+        else:
+            print('Portfolio: skipping', Settings, 'as', Settings.get('Solver', Engine), 'is not installed')
+    return Available
+
+# Time limit option of a solver, as the option names differ between solvers
+def TimeLimitOptions(Solver, TimeLimit):
+    if 'highs' in Solver:
+        return {'time_limit': TimeLimit}
+    elif Solver == 'glpk':
+        return {'tmlim': int(np.ceil(TimeLimit))}
+    elif Solver == 'cbc':
+        return {'sec': TimeLimit}
+    print('Portfolio: unknown solver when setting the time limit:', Solver)
+    return {}
+
+# Solver and options for a configuration, with a limit of TimeLimit. Base is the model's own options, used for the model's own solver.
+# Another solver gets only its time limit, as the option names differ between solvers, plus the options given in the configuration
+def ConfigurationOptions(Settings, Engine, Base, TimeLimit):
+    Solver = Settings.get('Solver', Engine)
+    Options = {Option: Value for Option, Value in Settings.items() if Option not in ModelSettings}
+    if Solver == Engine:
+        return Solver, {**Base, **TimeLimitOptions(Solver, TimeLimit), **Options}
+    return Solver, {**TimeLimitOptions(Solver, TimeLimit), **Options}
+
+# Objective of the solution in Results, or None if there isn't one (the models here all minimize)
+def Incumbent(Results):
+    if Results is None or len(Results.solution) == 0 or not np.isfinite(Results.problem.upper_bound):
+        return None
+    return Results.problem.upper_bound
+
+# Race the jobs, each a tuple of (Settings, ModelFile, Solver, Options), with one worker process each and Threads solver threads each
+# Returns as soon as one proves optimality (or infeasibility), stopping the rest. If none has by the Deadline (time.time()), or all finish
+# without, the winner is the one with the best incumbent. Returns a dict of: Status ('proved', 'best' or 'none'), the Winner (index into Jobs,
+# or None), its Results, the Elapsed seconds, and the Outcomes of all jobs (Settings, Status, Objective, Runtime). Target is for testing
+def RaceSolve(Jobs, Deadline, Threads = 1, MemoryLimit = None, Target = SolveModelFile, StartMethod = None):
+    Start = tm.time()
+    Manager = LocalSolverManager(len(Jobs), Threads, MemoryLimit, Target = Target, StartMethod = StartMethod)
+    Futures = {}
+    for k, (Settings, ModelFile, Solver, Options) in enumerate(Jobs):
+        if 'highs' in Solver:
+            Options = {**Options, 'threads': Threads}
+        Futures[Manager.QueueJob(({}, Solver, Options, ModelFile, False))] = k
+    Outcomes = [{'Settings': Job[0], 'Status': 'stopped', 'Objective': None, 'Runtime': None} for Job in Jobs]
+    Results = [None] * len(Jobs)
+    Winner, Status = None, 'none'
+    Pending = set(Futures)
+    while len(Pending) > 0 and Winner is None:
+        Done, Pending = cf.wait(Pending, timeout = max(0, Deadline - tm.time()), return_when = cf.FIRST_COMPLETED)
+        if len(Done) == 0:   # Deadline
+            break
+        for Future in Done:
+            k = Futures[Future]
+            Outcomes[k]['Runtime'] = round(tm.time() - Start, 2)
+            try:
+                Results[k] = Future.result()
+            except (MemoryError, RuntimeError) as Error:
+                Outcomes[k]['Status'] = 'error: ' + str(Error)
+                continue
+            Condition = Results[k].solver.termination_condition
+            Outcomes[k]['Status'] = str(Condition)
+            Outcomes[k]['Objective'] = Incumbent(Results[k])
+            if Winner is None and Condition in [pyo.TerminationCondition.optimal, pyo.TerminationCondition.infeasible]:
+                Winner, Status = k, 'proved'
+    Manager.shutdown()
+    if Winner is None:
+        Finished = [k for k in range(0, len(Jobs)) if Outcomes[k]['Objective'] is not None]
+        if len(Finished) > 0:
+            Winner, Status = min(Finished, key = lambda k: Outcomes[k]['Objective']), 'best'
+    return {'Status': Status, 'Winner': Winner, 'Results': None if Winner is None else Results[Winner], 'Elapsed': round(tm.time() - Start, 2), 'Outcomes': Outcomes}
+
+# MIP start for a model file from solution values by variable name, as values by the file's column labels
+def StartFromValues(ModelFile, Values):
+    return {Label: Values[Name]['Value'] for Label, Name in ModelFile['Names'].items() if Name in Values}
+
+# Portfolio solve of Model with Engine and its Options: solve directly with the model's own settings for up to Delay seconds, then, unless
+# that proves optimality, race the configurations in Portfolio, starting from the direct solve's incumbent. Starting the race's processes takes
+# a few seconds, which is longer than many solves take in full. Both count against TimeLimit, and the race gets Grace seconds more to stop
+# Variants: models for configurations with another 'Formulation', by name, where Formulation is Model's own. Each HiGHS configuration writes
+# its own log file, and the race is recorded in RaceFile with Context (e.g. script and data file). Target and StartMethod are for testing
+# Returns the results with the best solution found (or none, if no solve found one) and the model they are for, with the solution loaded
+def PortfolioSolve(Model, Engine, Options, Portfolio, TimeLimit, Delay = 10, Grace = 10, WarmStart = False, Variants = None, Formulation = None,
+                   Tee = False, RaceFile = None, Context = None, Target = SolveModelFile, StartMethod = None):
+    Start = tm.time()
+    Files = {id(Model): WriteModelFile(Model, WarmStart)}
+    Quick = None
+    if Delay > 0:
+        Quick = Target({}, Engine, {**Options, **TimeLimitOptions(Engine, min(Delay, TimeLimit))}, Files[id(Model)], Tee)
+        if Quick.solver.termination_condition in [pyo.TerminationCondition.optimal, pyo.TerminationCondition.infeasible]:
+            RemoveModelFile(Files[id(Model)])
+            LoadSolutionByName(Model, Quick)
+            return Quick, Model
+    Remaining = max(1, TimeLimit - (tm.time() - Start))
+    Jobs, Models = [], []
+    for k, Settings in enumerate(AvailableConfigurations(Portfolio, Engine)):
+        Variant = (Variants or {}).get(Settings.get('Formulation', Formulation), Model)
+        if id(Variant) not in Files:
+            Files[id(Variant)] = WriteModelFile(Variant, WarmStart)
+        ModelFile = Files[id(Variant)]
+        if Incumbent(Quick) is not None:   # Start from the direct solve's incumbent, which HiGHS completes for variables a variant doesn't share
+            ModelFile = {**ModelFile, 'Start': StartFromValues(ModelFile, Quick.solution(0).variable)}
+        Solver, JobOptions = ConfigurationOptions(Settings, Engine, {**Options, 'log_file': 'highs-portfolio-' + str(k) + '.log'}, Remaining)
+        Jobs.append((Settings, ModelFile, Solver, JobOptions))
+        Models.append(Variant)
+    Race = RaceSolve(Jobs, tm.time() + Remaining + Grace, Target = Target, StartMethod = StartMethod)
+    for ModelFile in Files.values():
+        RemoveModelFile(ModelFile)
+    WriteRace(Race)
+    if RaceFile is not None:
+        RecordRace(Race, RaceFile, **(Context or {}), Quick = Incumbent(Quick))
+    if Incumbent(Quick) is not None and (Incumbent(Race['Results']) is None or Incumbent(Quick) < Incumbent(Race['Results'])):
+        print('Portfolio: the direct solve has the best solution')
+        Results, Model = Quick, Model
+    elif Race['Winner'] is not None:
+        Results, Model = Race['Results'], Models[Race['Winner']]
+    else:   # No solution, so report how the direct solve ended, or that there is none
+        Results = Quick
+        if Results is None:
+            Results = SolverResults()
+            Results.solver.termination_condition = pyo.TerminationCondition.noSolution
+            Results.solver.status = SolverStatus.aborted
+    LoadSolutionByName(Model, Results)
+    return Results, Model
+
+# Print the outcome of each configuration in a race, marking the winner
+def WriteRace(Race):
+    print('\nPortfolio    Status                Objective     Runtime  Settings')
+    print('----------------------------------------------------------------------')
+    for k, Outcome in enumerate(Race['Outcomes']):
+        Objective = '' if Outcome['Objective'] is None else f'{Outcome["Objective"]:,.2f}'
+        Runtime = '' if Outcome['Runtime'] is None else f'{Outcome["Runtime"]:,.1f}'
+        print(f'{"winner" if k == Race["Winner"] else "":9}    {Outcome["Status"][:20]:20}  {Objective:>9}  {Runtime:>10}  {Outcome["Settings"]}')
+    print()
+
+# Append a race to RaceFile (JSON lines), with Context such as the script, data file and order size, for later tuning of the settings
+def RecordRace(Race, RaceFile, **Context):
+    Record = {'Time': dt.datetime.now().isoformat(timespec = 'seconds'),
+              **Context,
+              'Status': Race['Status'],
+              'Winner': None if Race['Winner'] is None else Race['Outcomes'][Race['Winner']]['Settings'],
+              'Elapsed': Race['Elapsed'],
+              'Outcomes': Race['Outcomes']}
+    with open(RaceFile, 'a') as f:
+        f.write(json.dumps(Record, default = str) + '\n')
@@ -0,0 +1,126 @@
+# Per-phase profiling: wall time, CPU time and peak memory of each phase of a run, written as JSON lines so that runs can be compared
+# across data sizes and solver settings. Phases can be marked with a context manager, a decorator, or checkpoints (for flat scripts)
+# Profiling is off until StartProfile is called. When off, ProfilePhase returns a shared do-nothing context manager and Checkpoint returns
+# immediately, so the cost is one test of a flag
+
+import contextlib
+import functools
+import datetime as dt
+import json
+import time as tm
+import psutil
+
+Enabled = False
+ProfileFile = None
+Context = {}   # Added to each record, e.g. data file and order size
+Records = []   # Records of this run, for WriteProfile
+Stack = []   # Open phases, innermost last
+OpenCheckpoint = None
+Disabled = contextlib.nullcontext()
+Process = psutil.Process()
+
+# Start profiling, appending a record for each phase to File (or only keeping them in memory if File is None)
+# Context items, e.g. Script = 'gdp', are added to every record
+def StartProfile(File = 'profile.jsonl', **RunContext):
+    global Enabled, ProfileFile, Context, Records
+    Enabled, ProfileFile, Records = True, File, []
+    Context = {'Run': dt.datetime.now().isoformat(timespec = 'seconds'), **RunContext}
+
+# Change the items added to each record from now on, e.g. ProfileContext(OrderSize = 6). An item set to None is removed
+def ProfileContext(**Items):
+    if Enabled:
+        Context.update(Items)
+        for Item in [k for k, v in Items.items() if v is None]:
+            del Context[Item]
+
+# Peak resident memory, in bytes. On Linux this is since the last ResetPeak, otherwise since the process started
+def PeakMemory():
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for Line in f:
+                if Line.startswith('VmHWM:'):
+                    return int(Line.split()[1]) * 1024
+    except OSError:
+        pass
+    Memory = Process.memory_info()
+    return getattr(Memory, 'peak_wset', Memory.rss)   # peak_wset is Windows only
+
+# Reset the peak memory to the current memory, so that the peak of each phase is measured separately (Linux only)
+def ResetPeak():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+# Record one phase. Use ProfilePhase, Profiled or Checkpoint rather than calling this directly
+@contextlib.contextmanager
+def PhaseRecord(Name):
+    Peak = PeakMemory()
+    for Outer in Stack:   # The outer phases keep the peak so far, as it is about to be reset
+        Outer['Peak'] = max(Outer['Peak'], Peak)
+    ResetPeak()
+    Frame = {'Name': Name, 'Peak': Process.memory_info().rss}
+    Stack.append(Frame)
+    Path = '/'.join(Item['Name'] for Item in Stack)   # e.g. Define model/Bigm transformation
+    StartWall, StartCpu = tm.perf_counter(), tm.process_time()
+    try:
+        yield
+    finally:
+        Wall, Cpu = tm.perf_counter() - StartWall, tm.process_time() - StartCpu
+        Frame['Peak'] = max(Frame['Peak'], PeakMemory())
+        Stack.pop()
+        if Stack:
+            Stack[-1]['Peak'] = max(Stack[-1]['Peak'], Frame['Peak'])
+        Record = {**Context,
+                  'Phase': Path,
+                  'Wall (s)': round(Wall, 4),
+                  'CPU (s)': round(Cpu, 4),   # All threads of this process, so can be more than the wall time when HiGHS uses several threads
+                  'RSS (MB)': round(Process.memory_info().rss / 2**20, 1),
+                  'Peak RSS (MB)': round(Frame['Peak'] / 2**20, 1)}
+        Records.append(Record)
+        if ProfileFile is not None:
+            with open(ProfileFile, 'a') as f:
+                f.write(json.dumps(Record) + '\n')
+
+# Context manager for one phase: with ProfilePhase('Solve'): ...
+def ProfilePhase(Name):
+    if not Enabled:
+        return Disabled
+    return PhaseRecord(Name)
+
+# Decorator that records each call of a function as a phase, named after the function unless Name is given
+def Profiled(Name = None):
+    def Decorator(Function):
+        Label = Name or Function.__name__
+        @functools.wraps(Function)
+        def Wrapper(*Args, **Kwargs):
+            if not Enabled:
+                return Function(*Args, **Kwargs)
+            with PhaseRecord(Label):
+                return Function(*Args, **Kwargs)
+        return Wrapper
+    return Decorator
+
+# End the current checkpoint phase (if any) and start a new one, like the old Timer(). Checkpoint(None) ends the current phase
+# For flat scripts, where wrapping each section in a with block would mean indenting the whole script
+def Checkpoint(Name):
+    global OpenCheckpoint
+    if not Enabled:
+        return
+    if OpenCheckpoint is not None:
+        OpenCheckpoint.__exit__(None, None, None)
+        OpenCheckpoint = None
+    if Name is not None:
+        OpenCheckpoint = PhaseRecord(Name)
+        OpenCheckpoint.__enter__()
+
+# Print the phases recorded in this run, like the old WriteCheckpoints()
+def WriteProfile():
+    if not Enabled:
+        return
+    Checkpoint(None)
+    print('\nPhase                                  Wall (s)   CPU (s)   Peak RSS (MB)')
+    print('--------------------------------------------------------------------------')
+    for Record in Records:
+        print(f'{Record["Phase"]:36}{Record["Wall (s)"]:11,.2f}{Record["CPU (s)"]:10,.2f}{Record["Peak RSS (MB)"]:16,.1f}')
@@ -0,0 +1,51 @@
+# Bulk extraction of a solution from a Pyomo model into NumPy arrays, for building output tables without a Python call per element
+# Reads the values directly from the variable data, in one pass over each component, rather than calling pyo.value() on each element
+
+import os.path
+import numpy as np
+import pandas as pd
+
+# Values of an indexed Var or Param as a NumPy array, in the component's index order. A variable without a value is NaN
+def Values(Component):
+    Raw = (getattr(Data, 'value', Data) for Data in Component.values())   # Immutable Params hold plain numbers rather than data objects
+    return np.fromiter((np.nan if v is None else v for v in Raw), dtype = np.float64, count = len(Component))
+
+# Values of a Var or Param indexed by (row, column) pairs as a dense Rows x Columns array, with Missing where a pair isn't in the index
+# Rows and Columns are lists of index labels, which can be a subset of the component's rows or columns, e.g. only the selected candidates
+def ValueMatrix(Component, Rows, Columns, Missing = 0.0):
+    Keys = list(Component.keys())
+    Matrix = np.full((len(Rows), len(Columns)), Missing, dtype = np.float64)
+    if len(Keys) == 0:
+        return Matrix
+    RowLabels, ColumnLabels = zip(*Keys)
+    r = pd.Index(Rows).get_indexer(list(RowLabels))   # Position of each key's row, or -1 if not wanted
+    c = pd.Index(Columns).get_indexer(list(ColumnLabels))
+    Wanted = (r >= 0) & (c >= 0)
+    Matrix[r[Wanted], c[Wanted]] = Values(Component)[Wanted]
+    return Matrix
+
+# Write a table to a Parquet or CSV file, depending on the file extension. Parquet needs pyarrow or fastparquet
+def WriteTable(Table, FileName):
+    Extension = os.path.splitext(FileName)[1].lower()
+    if Extension == '.parquet':
+        Table.to_parquet(FileName)
+    elif Extension == '.csv':
+        Table.to_csv(FileName)
+    else:
+        raise ValueError('Unknown table file type, use .parquet or .csv: ' + FileName)
+
+# File name for one case's table, e.g. allocation.csv -> allocation-6.csv for order size 6
+def CaseFileName(FileName, Case):
+    Stem, Extension = os.path.splitext(FileName)
+    return Stem + '-' + str(Case) + Extension
+
+# Write one chunk of a table that is written in parts, e.g. scenario results that are too many to hold at once. Chunks are numbered from 1
+# A CSV file gets each chunk appended, with the header only for the first. Parquet files can't be appended to, so each chunk is a separate file
+def WriteChunk(Table, FileName, Chunk):
+    Extension = os.path.splitext(FileName)[1].lower()
+    if Extension == '.parquet':
+        Table.to_parquet(CaseFileName(FileName, Chunk))
+    elif Extension == '.csv':
+        Table.to_csv(FileName, mode = 'w' if Chunk == 1 else 'a', header = Chunk == 1)
+    else:
+        raise ValueError('Unknown table file type, use .parquet or .csv: ' + FileName)
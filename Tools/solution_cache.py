@@ -0,0 +1,99 @@
+# On-disk cache of solved instances, keyed by a fingerprint of the data arrays and every setting that affects the solution
+# A repeat run with unchanged data and settings reads the stored solution, rather than building and solving the model again.
+# Each entry also keeps its data, so that a run on a nearby instance (same settings and sizes, slightly different data) can start
+# from the solution of the closest stored instance. The cache holds at most MaxEntries entries, removing the least recently used first
+
+import hashlib
+import pickle
+import json
+import glob
+import os
+import numpy as np
+
+CacheFolder = os.path.join('.cache', 'solutions')   # In the working directory
+
+# Hash of the settings and the data arrays' names, types and shapes, plus (if Contents) the data values
+def Digest(Data, Settings, Contents):
+    Hash = hashlib.sha256(json.dumps(Settings, sort_keys = True, default = str).encode())
+    for Name in sorted(Data):
+        Array = np.ascontiguousarray(Data[Name])
+        Hash.update((Name + '|' + str(Array.dtype) + '|' + str(Array.shape)).encode())
+        if Contents:
+            Hash.update(Array.tobytes())
+    return Hash.hexdigest()
+
+# Fingerprints of an instance: the family (settings and data sizes) of instances that can seed each other, and the key of this exact instance
+# Data is a dict of arrays, Settings a dict of everything else that affects the solution, e.g. model variant, order size and solver options
+def InstanceKey(Data, Settings):
+    return Digest(Data, Settings, False)[:16], Digest(Data, Settings, True)[:32]
+
+# Cache file of an entry. The family is part of the name, so that finding the nearest instance only reads entries of the same family
+def EntryFile(Family, Key, Folder):
+    return os.path.join(Folder, Family + '-' + Key + '.pkl')
+
+# Read one cache file, or None if it is missing or unreadable, e.g. written by an interrupted run
+def ReadEntry(File):
+    try:
+        with open(File, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+
+# Stored final solution of this exact instance, or None. A hit marks the entry as recently used. Entries that aren't final (e.g. the
+# solve was stopped early or hit the time limit) aren't returned, so the instance is solved again, but they can still seed a nearby instance
+def CachedSolution(Family, Key, Folder = CacheFolder):
+    File = EntryFile(Family, Key, Folder)
+    Entry = ReadEntry(File)
+    if Entry is None or not Entry.get('Final', False):
+        return None
+    os.utime(File)
+    return Entry
+
+# Relative distance between two instances' data: total absolute difference over total absolute value, or inf if the arrays don't match
+def Distance(Data, Other):
+    if sorted(Data) != sorted(Other):
+        return np.inf
+    Difference, Size = 0.0, 0.0
+    for Name in Data:
+        a, b = np.asarray(Data[Name], dtype = np.float64), np.asarray(Other[Name], dtype = np.float64)
+        if a.shape != b.shape:
+            return np.inf
+        Difference += np.abs(a - b).sum()
+        Size += np.abs(b).sum()
+    return Difference / Size if Size > 0 else (0.0 if Difference == 0 else np.inf)
+
+# Stored solution of the closest instance in the same family, within MaxDistance, or None. Used to seed the solver, not as the answer
+def NearestSolution(Family, Data, Folder = CacheFolder, MaxDistance = 0.25):
+    Best, Nearest = MaxDistance, None
+    for File in glob.glob(os.path.join(Folder, Family + '-*.pkl')):
+        Entry = ReadEntry(File)
+        if Entry is None:
+            continue
+        d = Distance(Data, Entry['Data'])
+        if d <= Best:
+            Best, Nearest = d, Entry
+    return Nearest
+
+# Store a solution with its data, then remove the least recently used entries beyond MaxEntries
+# Solution is a dict of whatever the model needs to report or seed from it, e.g. status, objective, bound and variable values
+# Final is whether it can be reported as the answer to a repeat run, i.e. the solve finished (optimal), rather than being stopped early
+# Written to a temporary file and renamed, so that an interrupted run never leaves a partial entry
+def StoreSolution(Family, Key, Data, Solution, Folder = CacheFolder, MaxEntries = 100, Final = True):
+    os.makedirs(Folder, exist_ok = True)
+    File = EntryFile(Family, Key, Folder)
+    Entry = dict(Solution)
+    Entry['Final'] = Final
+    Entry['Data'] = {Name: np.asarray(Array) for Name, Array in Data.items()}
+    with open(File + '.tmp', 'wb') as f:
+        pickle.dump(Entry, f, protocol = pickle.HIGHEST_PROTOCOL)
+    os.replace(File + '.tmp', File)
+    Evict(Folder, MaxEntries)
+
+# Remove the least recently used entries (oldest modification time, as a hit touches the file) until at most MaxEntries remain
+def Evict(Folder = CacheFolder, MaxEntries = 100):
+    Files = sorted(glob.glob(os.path.join(Folder, '*.pkl')), key = os.path.getmtime)
+    for File in Files[:max(0, len(Files) - MaxEntries)]:
+        try:
+            os.remove(File)
+        except OSError:   # Already removed, e.g. by another run
+            pass
@@ -0,0 +1,176 @@
+# Local job queue of solves, with the same solve call as Pyomo's NEOS solver manager, so a model can use either with the same code
+# A pool of at most Workers worker processes solves the queued models in turn, each with Threads solver threads and a memory budget. Workers are
+# started when first needed and reused for later jobs. Each model is written to a model file that a worker solves, so models with rules defined
+# inside functions, which can't be pickled, work with any process start method (spawn on Windows)
+# queue() returns at once with a future, so the caller can build the next model while earlier ones solve. Also a local stand-in for NEOS when testing
+
+import multiprocessing as mp
+import concurrent.futures as cf
+import collections
+import threading
+import os
+import time as tm
+import psutil
+from supervisor import WriteModelFile, RemoveModelFile, SolveModelFile, LoadSolutionByName
+
+# Runs in each worker process: call Target with the arguments of each job the parent sends, sending back the result, until sent None
+def PoolWorker(Connection, Target):
+    while True:
+        try:
+            Job = Connection.recv()
+        except EOFError:   # Parent has gone
+            break
+        if Job is None:
+            break
+        Id, Args = Job
+        Connection.send(('Started', Id, psutil.Process().memory_full_info().uss))   # Memory before the job, so the parent can limit what the job adds
+        try:
+            Connection.send(('Result', Id, Target(*Args)))
+        except MemoryError:
+            Connection.send(('Error', Id, MemoryError('Solve ran out of memory')))
+        except Exception as Error:
+            Connection.send(('Error', Id, RuntimeError(repr(Error))))
+    Connection.close()
+
+class LocalSolverManager:
+    # Workers: solves at once (default: one per Threads CPUs). Threads: solver threads per solve (HiGHS only, GLPK is single threaded)
+    # MemoryLimit: MB of memory per solve, above what the worker used before it, which is stopped with a MemoryError if it uses more. None for no limit
+    # Target: function the workers call with the arguments of each job, SolveModelFile for queued models. StartMethod: multiprocessing start method, None for the platform's default
+    def __init__(self, Workers = None, Threads = 1, MemoryLimit = None, Poll = 0.1, Target = SolveModelFile, StartMethod = None):
+        self.Workers = Workers or max(1, os.cpu_count() // Threads)
+        self.Threads = Threads
+        self.MemoryLimit = MemoryLimit
+        self.Poll = Poll
+        self.Target = Target
+        self.Context = mp.get_context(StartMethod)
+        self.Waiting = collections.deque()   # Jobs not yet sent to a worker: dict of Id, Args, Future
+        self.Pool = []   # Worker processes: dict of Process, Connection, Monitor, Job (None when idle) and Base (memory before the job)
+        self.Jobs = 0   # Jobs queued so far, to number them
+        self.Lock = threading.Lock()
+        self.Monitor = None
+
+    # Queue a solve of Model, returning a future for the solver results (as from SolverFactory.solve, with load_solutions = False)
+    # The model is written to a model file as it is now, so it can be changed or used for the next case straight away. Load the solution with LoadSolutionByName
+    def queue(self, Model, solver = 'appsi_highs', options = None, warmstart = False, tee = False):
+        Options = dict(options or {})
+        if 'highs' in solver:
+            Options['threads'] = self.Threads
+        ModelFile = WriteModelFile(Model, warmstart)
+        Future = self.QueueJob(({}, solver, Options, ModelFile, tee))
+        Future.add_done_callback(lambda Future: RemoveModelFile(ModelFile))   # Also when cancelled or stopped
+        return Future
+
+    # Solve and wait for the results, loading the solution into Model if load_solutions. Same call as SolverManagerFactory('neos').solve
+    def solve(self, Model, load_solutions = True, tee = False, solver = 'appsi_highs', options = None, warmstart = False):
+        Results = self.queue(Model, solver, options, warmstart, tee).result()
+        if load_solutions:
+            LoadSolutionByName(Model, Results)
+        return Results
+
+    # Queue a job that a worker runs as Target(*Args), returning a future for its result. Args must pickle
+    def QueueJob(self, Args):
+        Future = cf.Future()
+        with self.Lock:
+            self.Jobs += 1
+            self.Waiting.append({'Id': self.Jobs, 'Args': Args, 'Future': Future})
+            if self.Monitor is None or not self.Monitor.is_alive():
+                self.Monitor = threading.Thread(target = self.Watch, daemon = True)
+                self.Monitor.start()
+        return Future
+
+    # Runs in a thread of the parent process while there are jobs: send waiting jobs to idle workers, pass each job's result to its future,
+    # and stop jobs that are over the memory limit
+    def Watch(self):
+        while True:
+            with self.Lock:
+                self.Dispatch()
+                Busy = [Worker for Worker in self.Pool if Worker['Job'] is not None]
+                if len(Busy) == 0 and len(self.Waiting) == 0:
+                    self.Monitor = None
+                    return
+                for Worker in Busy:
+                    self.Check(Worker)
+            tm.sleep(self.Poll)
+
+    # Send waiting jobs to idle workers, starting workers up to the pool size. Jobs cancelled while waiting are dropped, so never run
+    def Dispatch(self):
+        for Worker in [Worker for Worker in self.Pool if Worker['Job'] is None and not Worker['Process'].is_alive()]:   # Ended while idle
+            self.StopWorker(Worker)
+        while len(self.Waiting) > 0:
+            Worker = next((Worker for Worker in self.Pool if Worker['Job'] is None), None)
+            if Worker is None:
+                if len(self.Pool) >= self.Workers:
+                    return
+                Worker = self.StartWorker()
+            Job = self.Waiting.popleft()
+            if not Job['Future'].set_running_or_notify_cancel():
+                continue
+            Worker['Base'] = None
+            Worker['Connection'].send((Job['Id'], Job['Args']))
+            Worker['Job'] = Job
+
+    # Start a worker process, with a two-way pipe for jobs and results
+    def StartWorker(self):
+        Connection, WorkerConnection = self.Context.Pipe()
+        Process = self.Context.Process(target = PoolWorker, args = (WorkerConnection, self.Target), daemon = True)
+        Process.start()
+        WorkerConnection.close()
+        Worker = {'Process': Process, 'Connection': Connection, 'Monitor': psutil.Process(Process.pid), 'Job': None, 'Base': None}
+        self.Pool.append(Worker)
+        return Worker
+
+    # Check the job of a busy worker, passing on its result once it has finished
+    def Check(self, Worker):
+        Job = Worker['Job']
+        try:
+            while Worker['Connection'].poll():
+                Kind, Id, Value = Worker['Connection'].recv()
+                if Kind == 'Started':
+                    Worker['Base'] = Value
+                    continue
+                Worker['Job'] = None
+                if Kind == 'Result':
+                    Job['Future'].set_result(Value)
+                else:
+                    Job['Future'].set_exception(Value)
+                return
+        except EOFError:   # Ended without sending a result, e.g. killed by the operating system. A new worker is started when needed
+            self.StopWorker(Worker)
+            Job['Future'].set_exception(RuntimeError('Solver process ended without a result'))
+            return
+        if self.MemoryLimit is not None and Worker['Base'] is not None:
+            try:
+                Memory = Worker['Monitor'].memory_full_info().uss   # Memory of the worker itself, not the pages it shares with other processes
+            except psutil.Error:
+                return   # Ended, so the next poll gets its result
+            if Memory - Worker['Base'] > self.MemoryLimit * 2**20:
+                self.StopWorker(Worker)
+                Job['Future'].set_exception(MemoryError(f'Solve used {(Memory - Worker["Base"]) / 2**20:,.0f} MB, more than the limit of {self.MemoryLimit:,.0f} MB'))
+
+    # Kill a worker and remove it from the pool
+    def StopWorker(self, Worker):
+        Worker['Process'].kill()
+        Worker['Process'].join()
+        Worker['Connection'].close()
+        self.Pool.remove(Worker)
+
+    # Stop all jobs that haven't finished: waiting jobs are cancelled, and running jobs end with an error. Idle workers are stopped too
+    def shutdown(self):
+        with self.Lock:
+            while len(self.Waiting) > 0:
+                self.Waiting.popleft()['Future'].cancel()
+            for Worker in list(self.Pool):
+                if Worker['Job'] is None:
+                    try:
+                        Worker['Connection'].send(None)
+                        Worker['Process'].join(timeout = 5)
+                    except (OSError, ValueError):
+                        pass
+                    if Worker['Process'].is_alive():
+                        Worker['Process'].kill()
+                    Worker['Connection'].close()
+                    self.Pool.remove(Worker)
+                else:
+                    Job = Worker['Job']
+                    self.StopWorker(Worker)
+                    Job['Future'].set_exception(RuntimeError('Solver manager shut down'))
@@ -0,0 +1,259 @@
+# Supervised solve: run a solve in a child process, watch it for hangs, and restart it with different settings if it hangs
+# A hang is when the solver process uses almost no CPU and writes nothing to its log for a whole window (see HiGHS-testing/Hangs/readme.md)
+
+import multiprocessing as mp
+import os
+import tempfile
+import time as tm
+import datetime as dt
+import json
+import numpy as np
+import psutil
+import highspy
+import pyomo.environ as pyo
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.opt import SolverResults, SolverStatus
+from highs_log import LastProgress
+
+# Runs in the child process: call the target with the settings for this attempt, sending the result to the parent
+# Uses a pipe rather than a queue, so that a result that can't be pickled is reported as an error rather than lost
+def SupervisedChild(Connection, Target, Settings, Args):
+    try:
+        Connection.send(('Result', Target(Settings, *Args)))
+    except Exception as Error:
+        Connection.send(('Error', repr(Error)))
+    Connection.close()
+
+# Write Model to an LP file that a child process can solve, so the model itself isn't sent to the child. A model built with rules defined
+# inside functions can't be pickled, so it can only be copied to a child process by fork, which Windows and macOS don't use by default
+# Returns a dict of: the File, the Names of the Pyomo variable in each column of the file, and the variable values as a Start (if WarmStart)
+def WriteModelFile(Model, WarmStart = False, Folder = None):
+    Handle, FileName = tempfile.mkstemp(prefix = 'model-', suffix = '.lp', dir = Folder)
+    os.close(Handle)
+    FileName, SymbolId = Model.write(FileName, io_options = {'symbolic_solver_labels': False})   # Short labels, so a smaller file
+    Symbols = Model.solutions.symbol_map.pop(SymbolId).bySymbol   # Not kept, as the solution is loaded by name
+    Names = {Label: Component.name for Label, Component in Symbols.items() if Component.ctype is pyo.Var}
+    Start = None
+    if WarmStart:
+        Start = {Label: Symbols[Label].value for Label in Names if Symbols[Label].value is not None}
+    return {'File': FileName, 'Names': Names, 'Start': Start}
+
+# Delete a model file written by WriteModelFile
+def RemoveModelFile(ModelFile):
+    try:
+        os.remove(ModelFile['File'])
+    except OSError:
+        pass
+
+# Pyomo termination condition for each HiGHS model status, as Pyomo's own HiGHS interface reports them
+HighsConditions = {'kOptimal': pyo.TerminationCondition.optimal,
+                   'kInfeasible': pyo.TerminationCondition.infeasible,
+                   'kUnboundedOrInfeasible': pyo.TerminationCondition.infeasibleOrUnbounded,
+                   'kUnbounded': pyo.TerminationCondition.unbounded,
+                   'kTimeLimit': pyo.TerminationCondition.maxTimeLimit,
+                   'kIterationLimit': pyo.TerminationCondition.maxIterations,
+                   'kSolutionLimit': pyo.TerminationCondition.maxIterations,
+                   'kObjectiveBound': pyo.TerminationCondition.minFunctionValue,
+                   'kObjectiveTarget': pyo.TerminationCondition.minFunctionValue,
+                   'kInterrupt': pyo.TerminationCondition.resourceInterrupt,
+                   'kMemoryLimit': pyo.TerminationCondition.resourceInterrupt}
+
+# Solver results of a HiGHS solve of a model file, in the same form as from SolverFactory.solve, with the solution keyed by Pyomo variable name
+def HighsResults(Highs, Names):
+    Info = Highs.getInfo()
+    Lp = Highs.getLp()
+    Condition = HighsConditions.get(Highs.getModelStatus().name, pyo.TerminationCondition.error)
+    Results = SolverResults()
+    Results.solver.termination_condition = Condition
+    if Condition == pyo.TerminationCondition.optimal:
+        Results.solver.status = SolverStatus.ok
+    elif Condition == pyo.TerminationCondition.error:
+        Results.solver.status = SolverStatus.error
+    else:
+        Results.solver.status = SolverStatus.aborted if Condition in [pyo.TerminationCondition.maxTimeLimit, pyo.TerminationCondition.maxIterations,
+                                pyo.TerminationCondition.minFunctionValue, pyo.TerminationCondition.resourceInterrupt] else SolverStatus.warning
+    Maximize = Lp.sense_ == highspy.ObjSense.kMaximize
+    Feasible = Info.primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+    Objective = Info.objective_function_value if Feasible else (-np.inf if Maximize else np.inf)
+    if len(Lp.integrality_) > 0 and any(Type != highspy.HighsVarType.kContinuous for Type in Lp.integrality_):
+        Bound = Info.mip_dual_bound
+    else:
+        Bound = Objective if Condition == pyo.TerminationCondition.optimal else (np.inf if Maximize else -np.inf)
+    Results.problem.sense = pyo.maximize if Maximize else pyo.minimize
+    Results.problem.upper_bound, Results.problem.lower_bound = (Bound, Objective) if Maximize else (Objective, Bound)
+    if Feasible:
+        Solution = Results.solution.add()
+        for Label, Value in zip(Lp.col_names_, Highs.getSolution().col_value):
+            if Label in Names:
+                Solution.variable[Names[Label]] = {'Value': Value}
+    return Results
+
+# Pyomo model of an LP file, as a column variable for each column of the file (by label) and a constraint for each row
+def FileModel(FileName):
+    Highs = highspy.Highs()
+    Highs.setOptionValue('output_flag', False)
+    Highs.readModel(FileName)
+    Lp = Highs.getLp()
+    Matrix = Lp.a_matrix_
+    Start, Index, Value = np.array(Matrix.start_), np.array(Matrix.index_), np.array(Matrix.value_)
+    Outer = np.repeat(np.arange(len(Start) - 1), np.diff(Start))
+    Rows, Columns = (Outer, Index) if Matrix.format_ == highspy.MatrixFormat.kRowwise else (Index, Outer)
+    Order = np.argsort(Rows, kind = 'stable')
+    RowStart = np.searchsorted(Rows[Order], np.arange(0, Lp.num_row_ + 1))
+    Integer = [len(Lp.integrality_) > 0 and Lp.integrality_[j] != highspy.HighsVarType.kContinuous for j in range(0, Lp.num_col_)]
+    Bound = lambda Value: None if np.isinf(Value) else Value
+
+    Model = pyo.ConcreteModel()
+    Model.x = pyo.Var(range(0, Lp.num_col_), bounds = lambda m, j: (Bound(Lp.col_lower_[j]), Bound(Lp.col_upper_[j])),
+                      domain = lambda m, j: pyo.Integers if Integer[j] else pyo.Reals)
+    def rule_row(Model, i):
+        Terms = Order[RowStart[i]:RowStart[i + 1]]
+        Expression = LinearExpression(constant = 0, linear_coefs = list(Value[Terms]), linear_vars = [Model.x[j] for j in Columns[Terms]])
+        return (Bound(Lp.row_lower_[i]), Expression, Bound(Lp.row_upper_[i]))
+    Model.Row = pyo.Constraint(range(0, Lp.num_row_), rule = rule_row)
+    Costs = [j for j in range(0, Lp.num_col_) if Lp.col_cost_[j] != 0]
+    Model.Obj = pyo.Objective(expr = LinearExpression(constant = Lp.offset_, linear_coefs = [Lp.col_cost_[j] for j in Costs], linear_vars = [Model.x[j] for j in Costs]),
+                              sense = pyo.maximize if Lp.sense_ == highspy.ObjSense.kMaximize else pyo.minimize)
+    return Model, {Lp.col_names_[j]: Model.x[j] for j in range(0, Lp.num_col_)}
+
+# Solve a model file written by WriteModelFile, adding the settings for this attempt to the solver options. Use as the Target of SupervisedSolve
+# HiGHS solvers read the file directly. Other solvers solve a Pyomo model of the file. Load the solution into the model with LoadSolutionByName
+def SolveModelFile(Settings, Engine, Options, ModelFile, Tee = False):
+    Options = {**Options, **Settings}
+    Start = ModelFile['Start']
+    if 'highs' in Engine:
+        Highs = highspy.Highs()
+        Highs.setOptionValue('log_to_console', Tee)
+        for Option, Value in Options.items():
+            Highs.setOptionValue(Option, Value)
+        Highs.readModel(ModelFile['File'])
+        if Start:   # Partial MIP start from the values given, which HiGHS completes
+            Column = {Label: j for j, Label in enumerate(Highs.getLp().col_names_)}
+            Labels = [Label for Label in Start if Label in Column]
+            Highs.setSolution(len(Labels), np.array([Column[Label] for Label in Labels], dtype = np.int32), np.array([Start[Label] for Label in Labels], dtype = np.float64))
+        Highs.run()
+        return HighsResults(Highs, ModelFile['Names'])
+
+    Model, Columns = FileModel(ModelFile['File'])
+    Solver = pyo.SolverFactory(Engine)
+    for Option, Value in Options.items():
+        Solver.options[Option] = Value
+    if Start and Solver.warm_start_capable():
+        for Label, Value in Start.items():
+            if Label in Columns:
+                Columns[Label].set_value(Value, skip_validation = True)
+        Results = Solver.solve(Model, load_solutions = False, tee = Tee, warmstart = True)
+    else:
+        Results = Solver.solve(Model, load_solutions = False, tee = Tee)
+    Found = len(Results.solution) > 0
+    if Found:
+        Model.solutions.load_from(Results)
+    Results.solution.clear()
+    Results._smap = None   # Refers to the Pyomo model of the file, which isn't returned
+    if Found:
+        Solution = Results.solution.add()
+        for Label, Variable in Columns.items():
+            if Label in ModelFile['Names'] and Variable.value is not None:
+                Solution.variable[ModelFile['Names'][Label]] = {'Value': Variable.value}
+    return Results
+
+# Load the solution in Results into Model, matching variables by name
+# Needed because the results come from a model file solved in another process, so Model.solutions.load_from() doesn't recognise the variables
+def LoadSolutionByName(Model, Results):
+    if Results is None or len(Results.solution) == 0:
+        return False
+    Values = Results.solution(0).variable
+    for Variable in Model.component_data_objects(pyo.Var):
+        if Variable.name in Values:
+            Variable.set_value(Values[Variable.name]['Value'], skip_validation = True)
+    return True
+
+# CPU seconds used by a process and its children, or None if it has ended
+def CpuSeconds(Process):
+    try:
+        Total = sum(Process.cpu_times()[:2])
+        for Child in Process.children(recursive = True):
+            Total += sum(Child.cpu_times()[:2])
+        return Total
+    except psutil.Error:
+        return None
+
+# Size of the log file, which grows while the solver makes progress
+def LogSize(LogFile):
+    try:
+        return os.path.getsize(LogFile)
+    except OSError:
+        return 0
+
+# Run Target(Settings, *Args) in a child process, where Settings is {} for the first attempt, then each item of Restarts in turn after a hang
+# The child is hung if, for Window seconds, it uses less than CpuThreshold of one CPU and its log file doesn't change. It is then killed and restarted
+# Each hang is recorded as an incident, and appended to IncidentFile (JSON lines) if given
+# Target and Args are sent to the child, so must pickle: use SolveModelFile with a model file rather than the model. StartMethod is the
+# multiprocessing start method (None for the platform's default, which is spawn on Windows)
+# Returns a dict of: Status ('finished', 'error' or 'hung' if every attempt hung), the target's Result (or error message), the Settings of the last attempt and the Incidents
+def SupervisedSolve(Target, Args, Restarts, Window = 60, LogFile = 'highs.log', CpuThreshold = 0.05, Poll = 1, IncidentFile = None, StartMethod = None):
+    Context = mp.get_context(StartMethod)
+    Incidents = []
+    Attempts = [{}] + list(Restarts)
+    for Attempt, Settings in enumerate(Attempts, start = 1):
+        Start = tm.time()
+        Receiver, Sender = Context.Pipe(duplex = False)
+        Child = Context.Process(target = SupervisedChild, args = (Sender, Target, Settings, Args))
+        Child.start()
+        Sender.close()
+        Monitor = psutil.Process(Child.pid)
+        LastSample, LastActive = Start, Start
+        LastCpu, LastSize = CpuSeconds(Monitor) or 0, LogSize(LogFile)
+        Kind, Value = None, None
+        while Kind is None:
+            try:
+                if Receiver.poll(Poll):
+                    Kind, Value = Receiver.recv()
+                    continue
+            except EOFError:   # Ended without sending a result
+                Kind, Value = 'Error', 'Child process ended without a result'
+                continue
+            Now = tm.time()
+            Cpu, Size = CpuSeconds(Monitor), LogSize(LogFile)
+            if Cpu is None or not Child.is_alive():
+                continue   # The next poll gets the result, or EOFError
+            if Cpu - LastCpu > CpuThreshold * (Now - LastSample) or Size != LastSize:
+                LastActive = Now
+            LastSample, LastCpu, LastSize = Now, Cpu, Size
+            if Now - LastActive > Window:
+                Kind = 'Hang'
+        if Kind != 'Hang':
+            Child.join()
+            Receiver.close()
+            return {'Status': 'finished' if Kind == 'Result' else 'error', 'Result': Value, 'Settings': Settings, 'Incidents': Incidents}
+
+        Memory = Monitor.memory_info().rss
+        Child.kill()
+        Child.join()
+        Receiver.close()
+        Progress = LastProgress(LogFile)
+        Incident = {'Attempt': Attempt,
+                    'Settings': Settings,
+                    'Started': dt.datetime.fromtimestamp(Start).isoformat(timespec = 'seconds'),
+                    'Run time': round(tm.time() - Start, 1),   # seconds, up to when the hang was detected
+                    'Silent for': round(tm.time() - LastActive, 1),   # seconds without CPU use or log output
+                    'Memory (MB)': round(Memory / 2**20, 1),
+                    'Log time': None if Progress is None else Progress['Time'],   # solver time of the last progress line in the log
+                    'Incumbent': None if Progress is None else Progress['Incumbent'],
+                    'Bound': None if Progress is None else Progress['Bound'],
+                    'Restarting': Attempt < len(Attempts)}
+        Incidents.append(Incident)
+        print(f'\nHang detected on attempt {Attempt} after {Incident["Run time"]:,.1f} s' + (f', restarting with {Attempts[Attempt]}' if Incident['Restarting'] else ''))
+        if IncidentFile is not None:
+            with open(IncidentFile, 'a') as f:
+                f.write(json.dumps(Incident) + '\n')
+    return {'Status': 'hung', 'Result': None, 'Settings': Settings, 'Incidents': Incidents}
+
+# Print the incidents recorded by SupervisedSolve
+def WriteIncidents(Incidents):
+    if len(Incidents) == 0:
+        return
+    print('\nAttempt  Started              Run time  Silent for  Memory (MB)  Settings')
+    print('-----------------------------------------------------------------------------')
+    for Incident in Incidents:
+        print(f'{Incident["Attempt"]:7}  {Incident["Started"]}  {Incident["Run time"]:8,.1f}  {Incident["Silent for"]:10,.1f}  {Incident["Memory (MB)"]:11,.1f}  {Incident["Settings"]}')
@@ -0,0 +1,17 @@
+# Shared set up for the checks: the shared helpers in Tools, and loading a script (some have a hyphen in their name) as a module
+# Scripts only run their Main when run directly, so loading one just defines its functions and globals
+
+import importlib.util
+import os.path
+import sys
+
+Root = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(Root, 'Tools'))
+
+# Load a script by its path from the repository root, as a module named after its file
+def LoadScript(Path):
+    Name = os.path.splitext(os.path.basename(Path))[0].replace('-', '_')
+    Spec = importlib.util.spec_from_file_location(Name, os.path.join(Root, Path))
+    Module = importlib.util.module_from_spec(Spec)
+    Spec.loader.exec_module(Module)
+    return Module
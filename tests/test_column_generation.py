@@ -0,0 +1,63 @@
+# Checks of HiGHS-testing/Hangs/column_generation.py: the pricing knapsack and the pattern enumeration against brute force on small random
+# cases, and the column generation method against the assignment model in hangs.py on small generated instances
+
+import itertools
+import os.path
+import sys
+import numpy as np
+import pyomo.environ as pyo
+from conftest import LoadScript, Root
+
+sys.path.append(os.path.join(Root, 'HiGHS-testing', 'Hangs'))   # hangs.py imports column_generation from its own folder
+sys.path.append(os.path.join(Root, 'Benchmark'))
+import generators
+column_generation = LoadScript(os.path.join('HiGHS-testing', 'Hangs', 'column_generation.py'))
+hangs = LoadScript(os.path.join('HiGHS-testing', 'Hangs', 'hangs.py'))
+
+# Most value from any number of copies of each item within the capacity, by trying every combination of counts
+def BruteKnapsack(Weights, Values, Capacity):
+    Best = 0.0
+    for Counts in itertools.product(*[range(0, Capacity // int(w) + 1) for w in Weights]):
+        if np.dot(Counts, Weights) <= Capacity:
+            Best = max(Best, np.dot(Counts, Values))
+    return Best
+
+def test_Knapsack():
+    Random = np.random.default_rng(4)
+    for Case in range(0, 30):
+        n = int(Random.integers(1, 5))
+        Weights = Random.integers(2, 9, n)
+        Values = np.round(Random.uniform(-0.2, 1, n), 3)   # Some items have no value, so are left out
+        Capacity = int(Random.integers(1, 20))
+        Best, Last = column_generation.Knapsack(Weights, Values, Capacity)
+        for c in range(0, Capacity + 1):
+            assert np.isclose(Best[c], BruteKnapsack(Weights, Values, c))
+            Counts = column_generation.Pattern(Last, Weights, c)
+            assert Counts @ Weights <= c and np.isclose(Counts @ Values, Best[c])
+
+def test_AllPatterns():
+    Random = np.random.default_rng(5)
+    for Case in range(0, 20):
+        n = int(Random.integers(1, 5))
+        Weights = Random.integers(2, 9, n)
+        Bounds = Random.integers(0, 4, n)
+        Capacity = int(Random.integers(1, 20))
+        Patterns = column_generation.AllPatterns(Weights, Bounds, Capacity)
+        Expected = [Counts for Counts in itertools.product(*[range(0, int(b) + 1) for b in Bounds]) if np.dot(Counts, Weights) <= Capacity]
+        assert sorted(map(tuple, Patterns.tolist())) == sorted(Expected) and not Patterns[0].any()
+        assert column_generation.PatternCounts(Weights, Bounds, Capacity)[0, Capacity] == len(Expected)
+
+# Small instances have every pattern in the integer master, so the least off-cut is the same as from the assignment model
+def test_SolvePatterns(tmp_path):
+    hangs.Verbose = False
+    for Seed in range(0, 3):
+        DataFile = str(tmp_path / 'wire.json')
+        generators.WirePieces(10, Seed, DataFile)
+        Data = hangs.GetData(DataFile)
+        Solution = column_generation.SolvePatterns(Data, 30, LogFile = str(tmp_path / 'highs.log'))
+        Patterns = hangs.TotalOffcut(Data['UseOne'][0], Solution['Required'], Solution['Lengths'], Solution['Cuts'], Solution['UseStock'])
+        Model = hangs.DefineModel(Data)
+        Results = pyo.SolverFactory('appsi_highs').solve(Model)
+        assert Results.solver.termination_condition == pyo.TerminationCondition.optimal and Solution['Status'] == 'Optimal'
+        assert np.isclose(Patterns, pyo.value(Model.OffcutWaste), atol = 1e-6) and np.isclose(Solution['Bound'], Patterns)
+        assert np.all(Solution['Cuts'].sum(axis = 1) == 1)   # Each piece cut once
@@ -0,0 +1,92 @@
+# Checks of the shared parts of the paper coverage models in Tools/coverage.py: the candidate sizes against the element-by-element loops
+# they replaced, with and without rotation, the candidate reduction and dominance against brute force on small random cases, and both
+# models on GDP/data-20-unsorted.xlsx, with the same optimum whether or not dominated candidates are pruned
+
+import itertools
+import os.path
+import numpy as np
+import pandas as pd
+import pyomo.environ as pyo
+from conftest import LoadScript, Root
+from coverage import CandidateSizes, DominatedCandidates, ReduceCandidates
+
+# Candidate sizes from the element-by-element loops: all widths x lengths, then if Rotate, all widths x widths and all lengths x lengths
+def LoopSizes(Width, Length, Rotate):
+    n = len(Width)
+    Sizes = []
+    for i in range(0, n):
+        for j in range(0, n):
+            Sizes.append((Width[i], Length[j]))
+    if Rotate:
+        for i in range(0, n):
+            for j in range(0, n):
+                Sizes.append((Width[i], Width[j]))
+        for i in range(0, n):
+            for j in range(0, n):
+                Sizes.append((Length[i], Length[j]))
+    return Sizes
+
+def test_CandidateSizes():
+    Random = np.random.default_rng(1)
+    for n in [1, 2, 7]:
+        Width, Length = Random.integers(10, 100, n), Random.integers(10, 100, n)
+        for Rotate in [True, False]:
+            CandidateWidth, CandidateLength, CandidateArea = CandidateSizes(pd.DataFrame({'Item': Width}), pd.DataFrame({'Item': Length}), Rotate)
+            assert list(zip(CandidateWidth.tolist(), CandidateLength.tolist())) == LoopSizes(Width.tolist(), Length.tolist(), Rotate)
+            assert (CandidateArea == CandidateWidth * CandidateLength).all()
+
+# Candidate x item fits, where an item fits a size in its original orientation, or also turned if Rotate
+def SizeFits(SizeWidth, SizeLength, Width, Length, Rotate):
+    Fits = (SizeWidth[:, None] >= Width) & (SizeLength[:, None] >= Length)
+    if Rotate:
+        Fits |= (SizeWidth[:, None] >= Length) & (SizeLength[:, None] >= Width)
+    return Fits
+
+# Least total weighted area of the products, ordering Orders of the sizes and allocating each item to the smallest it fits, by trying
+# every choice of sizes. Inf if no choice fits every item
+def BruteCover(SizeWidth, SizeLength, Width, Length, Weight, Orders, Rotate):
+    Fits = SizeFits(SizeWidth, SizeLength, Width, Length, Rotate)
+    Cost = np.where(Fits, (SizeWidth * SizeLength)[:, None] * Weight, np.inf)
+    Choices = np.array(list(itertools.combinations(range(0, len(SizeWidth)), Orders)))
+    return Cost[Choices].min(axis = 1).sum(axis = 1).min()
+
+def test_DominatedCandidates():
+    Random = np.random.default_rng(2)
+    for Case in range(0, 20):
+        Sizes = Random.integers(1, 8, (30, 2))
+        Fits = SizeFits(Sizes[:, 0], Sizes[:, 1], Random.integers(1, 8, 6), Random.integers(1, 8, 6), Case % 2 == 0)
+        Area = Sizes[:, 0] * Sizes[:, 1]
+        Dominated = DominatedCandidates(Sizes, Fits, ChunkSize = 7)
+        Covers = (Fits[:, None, :] <= Fits[None, :, :]).all(axis = 2) & (Area[None, :] <= Area[:, None])   # Column fits every item the row fits, with no more area
+        np.fill_diagonal(Covers, False)
+        assert (Covers[Dominated][:, ~Dominated].any(axis = 1)).all()   # Each dominated candidate is dominated by one that's kept
+        assert not Covers[~Dominated][:, ~Dominated].any()   # No kept candidate dominates another
+
+def test_ReduceCandidates():
+    Random = np.random.default_rng(3)
+    for Case in range(0, 12):
+        n = int(Random.integers(3, 6))
+        Width, Length, Weight = Random.integers(1, 10, n), Random.integers(1, 10, n), Random.integers(1, 5, n)
+        for Rotate, Prune, Orders in itertools.product([True, False], [True, False], [1, 2]):
+            CandidateWidth, CandidateLength, CandidateArea = CandidateSizes(pd.DataFrame({'Item': Width}), pd.DataFrame({'Item': Length}), Rotate)
+            ReducedWidth, ReducedLength, Fits = ReduceCandidates(CandidateWidth, CandidateLength, Width, Length, Orders, Rotate, Prune)
+            assert (Fits == SizeFits(ReducedWidth, ReducedLength, Width, Length, Rotate)).all()
+            assert len(ReducedWidth) >= Orders and len(ReducedWidth) <= len(CandidateWidth)
+            assert BruteCover(ReducedWidth, ReducedLength, Width, Length, Weight, Orders, Rotate) == \
+                BruteCover(CandidateWidth, CandidateLength, Width, Length, Weight, Orders, Rotate)
+
+# Optimal objective of one order size of a model script on GDP/data-20-unsorted.xlsx, with the given settings
+def Data20Objective(Path, OrderSize, **Settings):
+    Script = LoadScript(Path)
+    Script.Verbose, Script.TimeLimit = False, 60
+    for Name, Value in Settings.items():
+        setattr(Script, Name, Value)
+    Width, Length, Weight = Script.GetData(os.path.join(Root, 'GDP', 'data-20-unsorted.xlsx'), 'Data')
+    Model, Results = Script.Case(OrderSize, Width, Length, Weight)
+    assert 'optimal' in str(Results.solver.termination_condition if hasattr(Results, 'solver') else Results[0]).lower()
+    return pyo.value(Model.Obj())
+
+def test_PruneData20(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)   # The solver writes its log file in the working directory
+    for Path in [os.path.join('GDP', 'gdp.py'), os.path.join('HiGHS-testing', 'Presolve', 'model-3-cloud.py')]:
+        assert Data20Objective(Path, 3, PruneDominated = True) == Data20Objective(Path, 3, PruneDominated = False)
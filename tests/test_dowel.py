@@ -0,0 +1,45 @@
+# Checks of the dowel cutting model in Dowel/dowel.py: the bounded pricing knapsack against enumeration, and a solve of the wire cutting
+# model's data-100.json, which needs the artificial columns as the first patterns can't meet the demand from the stock available
+
+import itertools
+import os.path
+import numpy as np
+from conftest import LoadScript, Root
+
+dowel = LoadScript(os.path.join('Dowel', 'dowel.py'))
+
+# Most value from at most Bounds[i] copies of each item within the capacity, by trying every combination of counts
+def BruteBoundedKnapsack(Weights, Values, Bounds, Capacity):
+    Best = 0.0
+    for Counts in itertools.product(*[range(0, int(b) + 1) for b in Bounds]):
+        if np.dot(Counts, Weights) <= Capacity:
+            Best = max(Best, np.dot(Counts, Values))
+    return Best
+
+def test_BoundedKnapsack():
+    Random = np.random.default_rng(5)
+    for Case in range(0, 30):
+        n = int(Random.integers(1, 5))
+        Weights = Random.integers(2, 9, n)
+        Values = np.round(Random.uniform(-0.2, 1, n), 3)
+        Bounds = Random.integers(0, 4, n)
+        Capacity = int(Random.integers(1, 25))
+        Best, Counts = dowel.BoundedKnapsack(Weights, Values, Bounds, Capacity)
+        assert np.isclose(Best, BruteBoundedKnapsack(Weights, Values, Bounds, Capacity))
+        assert np.all(Counts <= Bounds) and Counts @ Weights <= Capacity and np.isclose(Counts @ Values, Best)
+
+def test_SolveDowelsData100(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)   # The solve writes highs.log in the working directory
+    monkeypatch.setattr(dowel, 'UseCache', False)
+    monkeypatch.setattr(dowel, 'Verbose', False)
+    Data = dowel.GetData(os.path.join(Root, 'HiGHS-testing', 'Hangs', 'data-100.json'))
+    Solution = dowel.SolveDowels(Data)
+    assert Solution['Status'] == 'Optimal' and Solution['Uses'] is not None
+    Uses = Solution['Uses']
+    assert np.all(Uses @ Solution['Patterns'] >= Solution['Demand'])
+    Stock = np.array([[Data['Stock'][s]['Lengths'], Data['Stock'][s]['MustUse']] for s in Data['Stock']])
+    Keys, Type = np.unique(Stock, axis = 0, return_inverse = True)   # Stock types in the same order as the solve's
+    Available = np.bincount(Type.ravel(), minlength = len(Keys))
+    Used = np.bincount(Solution['Types'], weights = Uses, minlength = len(Keys))
+    assert np.all(Used <= Available) and np.all(Used[Keys[:, 1] > 0] == Available[Keys[:, 1] > 0])
+    assert Solution['Bound'] is None or Uses @ Solution['TypeLength'][Solution['Types']] >= Solution['Bound'] - 1e-6
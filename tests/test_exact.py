@@ -0,0 +1,105 @@
+# Checks of the exact solvers in Tools/exact.py against brute force on small random cases
+
+import itertools
+import numpy as np
+import exact
+
+# Least cost of every partition of the sizes into k contiguous groups, each covered by the area of its last size
+def BrutePartition(Area, Weight, k):
+    m = len(Area)
+    Best = np.inf
+    for Cuts in itertools.combinations(range(1, m), k - 1):
+        Bounds = (0,) + Cuts + (m,)
+        Best = min(Best, sum(Area[Bounds[g + 1] - 1] * np.sum(Weight[Bounds[g]:Bounds[g + 1]]) for g in range(0, k)))
+    return Best
+
+# Least objective of every choice of Orders product sizes among the item sizes, with each item covered by the smallest product that it fits
+def BruteCoverage(ItemWidth, ItemLength, Weight, Orders):
+    Sizes = np.unique(np.column_stack((ItemWidth, ItemLength)), axis = 0)
+    Best = np.inf
+    for Chosen in itertools.combinations(range(0, len(Sizes)), Orders):
+        Products = Sizes[list(Chosen)]
+        Fits = (Products[None, :, 0] >= ItemWidth[:, None]) & (Products[None, :, 1] >= ItemLength[:, None])
+        if not Fits.any(axis = 1).all():
+            continue
+        Area = np.where(Fits, Products[:, 0] * Products[:, 1], np.inf).min(axis = 1)
+        Best = min(Best, np.sum((Area - ItemWidth * ItemLength) * Weight))
+    return Best
+
+def test_OptimalPartition():
+    Random = np.random.default_rng(1)
+    for Case in range(0, 40):
+        m = int(Random.integers(1, 9))
+        k = int(Random.integers(1, m + 1))
+        Area = np.sort(Random.integers(1, 50, m)).astype(np.float64)
+        Weight = Random.integers(1, 10, m).astype(np.float64)
+        Last, Covered = exact.OptimalPartition(Area, Weight, k)
+        assert np.isclose(Covered, BrutePartition(Area, Weight, k))
+        assert len(Last) == k and Last[-1] == m - 1 and np.all(np.diff(Last) > 0)
+        Group = np.searchsorted(Last, np.arange(0, m))
+        assert np.isclose(np.sum(Area[Last][Group] * Weight), Covered)   # The groups give the cost found
+
+# The divide and conquer search gives the same costs as evaluating every (split, target) pair
+def test_PartitionLayer():
+    Random = np.random.default_rng(2)
+    m = 30
+    Area = np.concatenate(([0.0], np.sort(Random.integers(1, 100, m)).astype(np.float64)))
+    Total = np.concatenate(([0.0], np.cumsum(Random.integers(1, 10, m)).astype(np.float64)))
+    Previous = np.full(m + 1, np.inf)
+    Previous[0] = 0.0
+    for First in range(1, 4):
+        Dense, DenseSplit = exact.PartitionLayer(Previous, Area, Total, First)
+        Sparse, SparseSplit = exact.PartitionLayer(Previous, Area, Total, First, DenseLimit = 0)
+        assert np.allclose(Dense, Sparse)
+        Previous = Dense
+
+def test_NestedCoverage():
+    Random = np.random.default_rng(3)
+    for Case in range(0, 40):
+        n = int(Random.integers(1, 10))
+        ItemWidth = np.sort(Random.integers(1, 6, n))
+        ItemLength = np.sort(Random.integers(1, 20, n))   # Nested: lengths don't decrease with width
+        Weight = Random.integers(1, 5, n)
+        Orders = int(Random.integers(1, 4))
+        Result = exact.NestedCoverage(ItemWidth, ItemLength, Weight, Orders)
+        if len(np.unique(np.column_stack((ItemWidth, ItemLength)), axis = 0)) < Orders:
+            assert Result is None
+            continue
+        Products, Product, Objective = Result
+        assert np.isclose(Objective, BruteCoverage(ItemWidth, ItemLength, Weight, Orders))
+        assert np.all(Products[Product, 0] >= ItemWidth) and np.all(Products[Product, 1] >= ItemLength)
+        assert np.isclose(np.sum((Products[Product, 0] * Products[Product, 1] - ItemWidth * ItemLength) * Weight), Objective)
+
+def test_NestedCoverageNotNested():
+    assert exact.NestedCoverage([1, 2], [5, 3], [1, 1], 1) is None
+
+# Most profit of every purchase within the budget, with at least MinCount items and MinCapacity capacity and the same number from each supplier
+def BrutePurchase(Cost, Capacity, Profit, Supplier, Budget, MinCount, MinCapacity):
+    Best = None
+    for Counts in itertools.product(*[range(0, Budget // c + 1) for c in Cost]):
+        Counts = np.array(Counts)
+        if Counts @ Cost <= Budget and Counts.sum() >= MinCount and Counts @ Capacity >= MinCapacity and Counts[Supplier == 0].sum() == Counts[Supplier == 1].sum():
+            Best = Counts @ Profit if Best is None else max(Best, Counts @ Profit)
+    return Best
+
+def test_BalancedPurchase():
+    Random = np.random.default_rng(8)
+    for Case in range(0, 40):
+        n = int(Random.integers(2, 5))
+        Supplier = np.concatenate(([0, 1], Random.integers(0, 2, n - 2)))
+        Cost, Capacity, Profit = Random.integers(2, 9, n), Random.integers(0, 7, n), Random.integers(0, 20, n)
+        Budget, MinCount, MinCapacity = int(Random.integers(10, 40)), int(Random.integers(0, 7)), int(Random.integers(0, 25))
+        Result = exact.BalancedPurchase(Cost, Capacity, Profit, Supplier, Budget, MinCount, MinCapacity)
+        Best = BrutePurchase(Cost, Capacity, Profit, Supplier, Budget, MinCount, MinCapacity)
+        if Best is None:
+            assert Result is None
+            continue
+        Counts, Total = Result
+        assert np.isclose(Total, Best) and np.isclose(Counts @ Profit, Best)
+        assert Counts @ Cost <= Budget and Counts.sum() >= MinCount and Counts @ Capacity >= MinCapacity
+        assert Counts[Supplier == 0].sum() == Counts[Supplier == 1].sum()
+    assert exact.BalancedPurchase([6000, 7000, 5000, 9000], [3, 5, 2, 6], [70, 80, 50, 110], ['Sleekboat', 'Sleekboat', 'Racer', 'Racer'], 420000, 50, 200)[1] == 5040
+
+def test_BalancedPurchaseStructure():
+    assert exact.BalancedPurchase([2, 3, 4], [1, 1, 1], [1, 1, 1], [0, 1, 2], 10, 0, 0) is None   # Three suppliers
+    assert exact.BalancedPurchase([0, 3], [1, 1], [1, 1], [0, 1], 10, 0, 0) is None   # A free item, so no bound
@@ -0,0 +1,47 @@
+# Checks of the Excel range loader in Tools/excel_data.py: named and addressed ranges read as DataFrames, a repeat load read from the cache
+# without opening the workbook, and the cache not used once the workbook has changed
+
+import os
+import numpy as np
+import pytest
+from openpyxl import Workbook
+from openpyxl.workbook.defined_name import DefinedName
+import excel_data
+from excel_data import LoadRanges
+
+# Write a workbook with an item table on worksheet Data, with Width a defined name for its first column
+def WriteWorkbook(ExcelFile, Widths, Names):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Data'
+    for Row, (Width, Name) in enumerate(zip(Widths, Names), start = 1):
+        ws.cell(Row, 1, Width)
+        ws.cell(Row, 2, Name)
+    wb.defined_names['Width'] = DefinedName('Width', attr_text = 'Data!$A$1:$A$' + str(len(Widths)))
+    wb.save(ExcelFile)
+
+# Stand-in for reading the workbook, to show that a load came from the cache
+def NoRead(ExcelFile, Worksheet, Ranges):
+    raise AssertionError('workbook read')
+
+def test_LoadRanges(monkeypatch, tmp_path):
+    ExcelFile = str(tmp_path / 'items.xlsx')
+    WriteWorkbook(ExcelFile, [10, 20, 30.5], ['a', 'b', None])
+    Data = LoadRanges(ExcelFile, ['Width', 'A1:B3'], 'Data')
+    assert Data['Width'][0].tolist() == [10, 20, 30.5] and Data['A1:B3'][1].tolist() == ['a', 'b', '']
+    assert os.path.exists(excel_data.CacheFile(ExcelFile, 'Data', ['Width', 'A1:B3']))
+    with monkeypatch.context() as Patch:
+        Patch.setattr(excel_data, 'ReadWorkbook', NoRead)
+        Cached = LoadRanges(ExcelFile, ['Width', 'A1:B3'], 'Data')   # Same workbook, so from the cache
+        assert all(Cached[Range].equals(Data[Range]) for Range in Data)
+        with pytest.raises(AssertionError, match = 'workbook read'):
+            LoadRanges(ExcelFile, ['Width'], 'Data')   # Other ranges have their own cache file
+    WriteWorkbook(ExcelFile, [10, 25, 30.5], ['a', 'b', 'c'])
+    Stamp = os.stat(ExcelFile)
+    os.utime(ExcelFile, ns = (Stamp.st_atime_ns, Stamp.st_mtime_ns + 10**9))   # Changed a second later, whatever the file system's time resolution
+    Data = LoadRanges(ExcelFile, ['Width', 'A1:B3'], 'Data')
+    assert Data['Width'][0].tolist() == [10, 25, 30.5] and Data['A1:B3'][1].tolist() == ['a', 'b', 'c']
+    Folder = tmp_path / excel_data.CacheFolder
+    Files = sorted(os.listdir(Folder))
+    assert np.array_equal(LoadRanges(ExcelFile, ['A1:A3'], 'Data', UseCache = False)['A1:A3'][0], [10, 25, 30.5])
+    assert sorted(os.listdir(Folder)) == Files   # Not cached
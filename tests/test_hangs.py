@@ -0,0 +1,78 @@
+# Checks of the wire cutting assignment model in HiGHS-testing/Hangs/hangs.py on small generated instances: the model over allowed
+# piece-stock pairs against the original model over all pairs, and each symmetry breaking option giving the same optimum and accepting
+# the heuristic start
+
+import os.path
+import sys
+import numpy as np
+import pyomo.environ as pyo
+from conftest import LoadScript, Root
+
+sys.path.append(os.path.join(Root, 'HiGHS-testing', 'Hangs'))   # hangs.py imports column_generation from its own folder
+sys.path.append(os.path.join(Root, 'Benchmark'))
+import generators
+hangs = LoadScript(os.path.join('HiGHS-testing', 'Hangs', 'hangs.py'))
+
+# Original model, with a Cuts variable for every piece and stock item, even where the piece is longer than the stock item
+def DenseModel(Data):
+    Model = pyo.ConcreteModel()
+    Model.P = pyo.Set(initialize = list(Data['Demand']))
+    Model.S = pyo.Set(initialize = list(Data['Stock']))
+    Required = {p: Data['Demand'][p]['Required'] for p in Model.P}
+    Lengths = {s: Data['Stock'][s]['Lengths'] for s in Model.S}
+    Model.Cuts = pyo.Var(Model.P, Model.S, domain = pyo.Binary)
+    Model.UseStock = pyo.Var(Model.S, domain = pyo.Binary)
+    Model.cOffCut = pyo.Constraint(Model.S, rule = lambda Model, S: Model.UseStock[S] * Lengths[S] - sum(Required[p] * Model.Cuts[p, S] for p in Model.P) >= 0)
+    Model.cCuts = pyo.Constraint(Model.P, rule = lambda Model, P: sum(Model.Cuts[P, s] for s in Model.S) == 1)
+    Model.cIfUsing = pyo.Constraint(Model.P, Model.S, rule = lambda Model, P, S: Model.Cuts[P, S] <= Model.UseStock[S])
+    Model.cMustUse = pyo.Constraint(Model.S, rule = lambda Model, S: Model.UseStock[S] >= Data['Stock'][S]['MustUse'])
+    Include = list(Model.S)[1:] if Data['UseOne'][0] == 0 else list(Model.S)
+    Model.OffcutWaste = pyo.Objective(expr = sum(Model.UseStock[s] * Lengths[s] - sum(Required[p] * Model.Cuts[p, s] for p in Model.P) for s in Include))
+    return Model
+
+# Optimal off-cut of a model
+def Optimum(Model):
+    Results = pyo.SolverFactory('appsi_highs').solve(Model)
+    assert Results.solver.termination_condition == pyo.TerminationCondition.optimal
+    return pyo.value(Model.OffcutWaste)
+
+def test_SparsePairs(monkeypatch, tmp_path):
+    monkeypatch.setattr(hangs, 'Verbose', False)
+    Dropped = 0
+    for Seed in [0, 5, 7]:   # 5 and 7 have pieces longer than a short stock item
+        DataFile = str(tmp_path / 'wire.json')
+        generators.WirePieces(12, Seed, DataFile)
+        Data = hangs.GetData(DataFile)
+        Model = hangs.DefineModel(Data)
+        Allowed = {(p, s) for p in Data['Demand'] for s in Data['Stock'] if Data['Demand'][p]['Required'] <= Data['Stock'][s]['Lengths']}
+        assert set(Model.PS) == Allowed
+        assert np.isclose(Optimum(Model), Optimum(DenseModel(Data)), atol = 1e-6)   # Integer lengths, up to the solver's tolerance
+        Dropped += len(Data['Demand']) * len(Data['Stock']) - len(Allowed)
+    assert Dropped > 0
+
+# Whether the variable values satisfy every constraint of a model
+def Feasible(Model, Tolerance = 1e-6):
+    for Row in Model.component_data_objects(pyo.Constraint, active = True):
+        Value = pyo.value(Row.body)
+        if (Row.has_lb() and Value < pyo.value(Row.lower) - Tolerance) or (Row.has_ub() and Value > pyo.value(Row.upper) + Tolerance):
+            return False
+    return True
+
+def test_Symmetry(monkeypatch, tmp_path):
+    monkeypatch.setattr(hangs, 'Verbose', False)
+    for Seed in [0, 5]:
+        DataFile = str(tmp_path / 'wire.json')
+        generators.WirePieces(12, Seed, DataFile)
+        Data = hangs.GetData(DataFile)
+        Cuts, UseStock, Offcut = hangs.HeuristicSolution(Data)
+        for Class in hangs.StockClasses(Data):   # Identical stock items in reverse, an equally good start that breaks the symmetry breaking
+            Cuts[:, Class], UseStock[Class] = Cuts[:, Class[::-1]], UseStock[Class[::-1]]
+        Optima = []
+        for Symmetry in ['none', 'use', 'load', 'lex']:
+            monkeypatch.setattr(hangs, 'Symmetry', Symmetry)
+            Model = hangs.DefineModel(Data)
+            assert (len(Model.SymPairs) > 0) == (Symmetry != 'none') and (len(Model.LexTriples) > 0) == (Symmetry == 'lex')
+            hangs.SetSolution(Model, Data, Cuts, UseStock)   # Reordered to satisfy the symmetry breaking
+            assert Feasible(Model) and np.isclose(pyo.value(Model.OffcutWaste), Offcut)
+            Optima.append(Optimum(Model))
+        assert np.allclose(Optima, Optima[0], atol = 1e-6)
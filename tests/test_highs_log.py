@@ -0,0 +1,53 @@
+# Checks of the HiGHS log parsing in Tools/highs_log.py on the saved log of a wire cutting solve (HiGHS-testing/Hangs/highs.log)
+
+import os.path
+import numpy as np
+import highs_log
+from conftest import Root
+
+LogFile = os.path.join(Root, 'HiGHS-testing', 'Hangs', 'highs.log')
+
+# Progress lines of the saved log
+def Progress():
+    with open(LogFile, 'r') as f:
+        return [Line for Line in map(highs_log.ParseProgressLine, f) if Line is not None]
+
+def test_ParseProgressLine():
+    with open(LogFile, 'r') as f:
+        Lines = f.readlines()
+    Table = [Line for Line in Lines if '%' in Line and Line.rstrip().endswith('s')]   # Rows of the progress table, but not its header
+    assert len(Progress()) == len(Table) == 22
+    Line = highs_log.ParseProgressLine(' T    4859    1024       446  85.80%   1.83536031e-08  3600             100.00%     4863    118   5465    242120    23.5s')
+    assert Line == {'Source': 'T', 'Nodes': 4859, 'Explored': 0.858, 'Bound': 1.83536031e-08, 'Incumbent': 3600.0, 'Gap': 1.0, 'LpIters': 242120, 'Time': 23.5}
+    First = Progress()[0]   # Before any incumbent, so the solution and gap are inf
+    assert First['Source'] == '' and First['Bound'] == -173180 and First['Incumbent'] == np.inf and First['Gap'] == np.inf
+    for Header in ['     Proc. InQueue |  Leaves   Expl. | BestBound       BestSol              Gap |   Cuts   InLp Confl. | LpIters     Time',
+                   '1922 rows, 2183 cols, 7948 nonzeros  0s', '']:
+        assert highs_log.ParseProgressLine(Header) is None
+    assert highs_log.LastProgress(LogFile)['Time'] == 47.9
+
+# Time of the progress line at which the rule first says to stop, or None if it never does
+def StopTime(Rule):
+    for Line in Progress():
+        if Rule(Line) is not None:
+            return Line['Time']
+    return None
+
+def test_StopRule():
+    assert StopTime(highs_log.StopRule()) is None
+    assert StopTime(highs_log.StopRule(TargetGap = 1.0)) == 1.7   # First incumbent, at a gap of 100%
+    assert StopTime(highs_log.StopRule(TargetGap = 0.5)) is None   # The bound stays near 0, so the gap never closes
+    assert StopTime(highs_log.StopRule(StallTime = 10)) == 12.9   # 100% since 1.7s, and an inf gap doesn't start the stall
+    assert StopTime(highs_log.StopRule(StallTime = 60)) is None
+
+# Lines written in pieces are only parsed once complete
+def test_ProgressReader(tmp_path):
+    File = tmp_path / 'highs.log'
+    Line = ' L       0       0         0   0.00%   2.31193553e-09  9490             100.00%     2739    269    225     11215     1.7s\n'
+    File.write_text('Solving MIP model with:\n' + Line[:40])
+    Read = highs_log.ProgressReader(str(File))
+    assert Read() == []
+    with open(File, 'a') as f:
+        f.write(Line[40:] + Line)
+    assert [Progress['Incumbent'] for Progress in Read()] == [9490, 9490]
+    assert Read() == []
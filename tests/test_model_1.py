@@ -0,0 +1,32 @@
+# Checks of the merit order dispatch in HiGHS-testing/Case-001/model-1.py against the model solved as an LP for each scenario
+
+import os.path
+import numpy as np
+from conftest import LoadScript, Root
+
+model_1 = LoadScript(os.path.join('HiGHS-testing', 'Case-001', 'model-1.py'))
+
+def test_MeritOrder():
+    CompareMethods(0, 100)
+
+def test_MeritOrderNegativeCost():
+    CompareMethods(-50, 100)   # Some generators are paid to run, e.g. with a subsidy
+
+# Compare MeritOrder with PersistentDispatch on random scenarios, with costs uniform between Low and High
+def CompareMethods(Low, High):
+    Data = model_1.GetData(os.path.join(Root, 'HiGHS-testing', 'Case-001', 'market-data-1.json'))
+    Generators = list(Data['Generators'])
+    Lower = np.maximum([Data['Generators'][g]['GMin'] for g in Generators], Data['VarLBounds']).astype(np.float64)   # As in RunScenarios
+    Upper = np.minimum([Data['Generators'][g]['GMax'] for g in Generators], Data['VarUBounds']).astype(np.float64)
+    Random = np.random.default_rng(7)
+    Demand = np.concatenate((Random.uniform(0, Upper.sum(), 40), [-10.0, Upper.sum() + 10, 0.0, Upper.sum()]))   # Including infeasible demand
+    Cost = np.round(Random.uniform(Low, High, (len(Demand), len(Generators))), 2)
+    Dispatch, Price, Feasible = model_1.MeritOrder(Demand, Cost, Lower, Upper)
+    Model, Solver = model_1.ScenarioSolver(Data)
+    LpDispatch, LpPrice, LpFeasible = model_1.PersistentDispatch(Model, Solver, Demand, Cost)
+    assert np.array_equal(Feasible, LpFeasible)
+    assert list(Feasible[-4:]) == [False, False, True, True]
+    assert np.allclose((Dispatch * Cost).sum(axis = 1)[Feasible], (LpDispatch * Cost).sum(axis = 1)[Feasible])
+    assert np.allclose(Dispatch[Feasible].sum(axis = 1), Demand[Feasible])
+    Inside = Feasible & (Demand > 0) & (Demand < Upper.sum())   # At either end the dual isn't unique
+    assert np.allclose(Price[Inside], LpPrice[Inside])
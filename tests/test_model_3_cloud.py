@@ -0,0 +1,45 @@
+# Checks of the low-memory build in HiGHS-testing/Presolve/model-3-cloud.py: DefineModelLean gives the same rows and objective as
+# DefineModel, coefficient by coefficient, and the same optimum, on GDP/data-20-unsorted.xlsx
+
+import os.path
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.repn import generate_standard_repn
+from conftest import LoadScript, Root
+
+model_3 = LoadScript(os.path.join('HiGHS-testing', 'Presolve', 'model-3-cloud.py'))
+
+# Build the model for an order size, with LowMemory on or off
+def BuildModel(monkeypatch, OrderSize, LowMemory):
+    monkeypatch.setattr(model_3, 'Verbose', False)
+    monkeypatch.setattr(model_3, 'LowMemory', LowMemory)
+    Width, Length, Weight = model_3.GetData(os.path.join(Root, 'GDP', 'data-20-unsorted.xlsx'), 'Data')
+    Model = pyo.ConcreteModel()
+    Model.Orders = OrderSize
+    model_3.DefineModelData(Model, Width, Length, Weight)
+    model_3.DefineModel(Model)
+    return Model
+
+# Linear form of an expression: its constant and the coefficient of each variable, by name
+def LinearForm(Expression):
+    Repn = generate_standard_repn(Expression)
+    assert Repn.is_linear()
+    return pyo.value(Repn.constant), {Var.name: pyo.value(Coef) for Var, Coef in zip(Repn.linear_vars, Repn.linear_coefs)}
+
+# Each row of a model by name, and the objective (without bounds): lower and upper bounds, constant, and coefficients
+def Rows(Model):
+    Form = {Row.name: (pyo.value(Row.lower), pyo.value(Row.upper)) + LinearForm(Row.body) for Row in Model.component_data_objects(pyo.Constraint, active = True)}
+    Form['Obj'] = (None, None) + LinearForm(Model.Obj.expr)
+    return Form
+
+def test_DefineModelLean(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)   # The solver writes its log file in the working directory
+    Full, Lean = BuildModel(monkeypatch, 3, False), BuildModel(monkeypatch, 3, True)
+    FullRows, LeanRows = Rows(Full), Rows(Lean)
+    assert FullRows.keys() == LeanRows.keys()
+    for Name in FullRows:
+        assert np.allclose(np.array(FullRows[Name][:-1], dtype = np.float64), np.array(LeanRows[Name][:-1], dtype = np.float64), equal_nan = True)   # Bounds and constant
+        assert FullRows[Name][-1].keys() == LeanRows[Name][-1].keys()
+        assert np.allclose([FullRows[Name][-1][Var] for Var in FullRows[Name][-1]], [LeanRows[Name][-1][Var] for Var in FullRows[Name][-1]])
+    Optima = [pyo.SolverFactory('appsi_highs').solve(Model).problem.upper_bound for Model in [Full, Lean]]
+    assert np.isclose(Optima[0], Optima[1])
@@ -0,0 +1,102 @@
+# Checks of the portfolio solve in Tools/portfolio.py: options of each configuration, the race outcome with stand-in solves (proved, best
+# incumbent at the deadline, or none), and a portfolio solve that starts the race from the direct solve's incumbent within the time limit
+
+import json
+import time as tm
+import numpy as np
+import pyomo.environ as pyo
+from pyomo.opt import SolverResults
+from portfolio import AvailableConfigurations, ConfigurationOptions, RaceSolve, PortfolioSolve, Incumbent
+
+def test_ConfigurationOptions():
+    Base = {'time_limit': 100, 'log_file': 'highs.log', 'mip_rel_gap': 0}
+    assert ConfigurationOptions({}, 'appsi_highs', Base, 42.5) == ('appsi_highs', {'time_limit': 42.5, 'log_file': 'highs.log', 'mip_rel_gap': 0})
+    assert ConfigurationOptions({'presolve': 'off', 'Formulation': 'hull'}, 'appsi_highs', Base, 10) == \
+        ('appsi_highs', {'time_limit': 10, 'log_file': 'highs.log', 'mip_rel_gap': 0, 'presolve': 'off'})
+    assert ConfigurationOptions({'Solver': 'glpk'}, 'appsi_highs', Base, 42.5) == ('glpk', {'tmlim': 43})   # Not the HiGHS options
+    assert ConfigurationOptions({'Solver': 'cbc', 'threads': 2}, 'appsi_highs', Base, 10) == ('cbc', {'sec': 10, 'threads': 2})
+
+def test_AvailableConfigurations():
+    Portfolio = [{}, {'presolve': 'off'}, {'Solver': 'no-such-solver'}]
+    assert AvailableConfigurations(Portfolio, 'appsi_highs') == [{}, {'presolve': 'off'}]
+
+# Results of a stand-in solve that ended with Condition, with a solution of the given Objective and variable Values, or none if Objective is None
+def StandInResults(Condition, Objective = None, Values = None):
+    Results = SolverResults()
+    Results.solver.termination_condition = getattr(pyo.TerminationCondition, Condition)
+    Results.problem.upper_bound = np.inf if Objective is None else Objective
+    if Objective is not None:
+        Solution = Results.solution.add()
+        for Name, Value in (Values or {}).items():
+            Solution.variable[Name] = {'Value': Value}
+    return Results
+
+# Stand-in for a solve in the race, which takes Sleep seconds and then fails or ends as given in its options
+def RaceStandIn(Settings, Solver, Options, ModelFile, Tee):
+    tm.sleep(Options.get('Sleep', 0))
+    if Options.get('Fail', False):
+        raise ValueError('stand-in failure')
+    return StandInResults(Options['Condition'], Options.get('Objective'))
+
+def Job(**Options):
+    return (Options, None, 'stand-in', Options)
+
+def test_RaceSolve():
+    Race = RaceSolve([Job(Sleep = 30, Condition = 'optimal', Objective = 1), Job(Condition = 'optimal', Objective = 2)], tm.time() + 60, Target = RaceStandIn)
+    assert Race['Status'] == 'proved' and Race['Winner'] == 1 and Incumbent(Race['Results']) == 2 and Race['Elapsed'] < 20
+    assert Race['Outcomes'][0]['Status'] == 'stopped'
+    Jobs = [Job(Condition = 'maxTimeLimit', Objective = 10), Job(Condition = 'maxTimeLimit', Objective = 7), Job(Sleep = 60, Condition = 'optimal', Objective = 1)]
+    Race = RaceSolve(Jobs, tm.time() + 5, Target = RaceStandIn)
+    assert Race['Status'] == 'best' and Race['Winner'] == 1 and Incumbent(Race['Results']) == 7   # Best incumbent at the deadline
+    assert [Outcome['Objective'] for Outcome in Race['Outcomes']] == [10, 7, None] and Race['Outcomes'][2]['Status'] == 'stopped'
+    Race = RaceSolve([Job(Fail = True), Job(Sleep = 60, Condition = 'optimal', Objective = 1)], tm.time() + 3, Target = RaceStandIn)
+    assert Race['Status'] == 'none' and Race['Winner'] is None and Race['Results'] is None
+    assert 'stand-in failure' in Race['Outcomes'][0]['Status'] and Race['Outcomes'][1]['Status'] == 'stopped'
+
+# Stand-in for the solves of a portfolio solve. The direct solve (time limit of 1 second) takes a second and finds Take[1] = 2 with an objective
+# of 50, unless the options say it finds nothing. Each race solve records its time limit and MIP start in its log file, then ends as in its options
+def PortfolioStandIn(Settings, Solver, Options, ModelFile, Tee):
+    if Options['time_limit'] == 1:
+        tm.sleep(1)
+        if Options.get('Nothing', False):
+            return StandInResults('maxTimeLimit')
+        return StandInResults('maxTimeLimit', 50, {Name: 2 if Name == 'Take[1]' else 0 for Name in ModelFile['Names'].values()})
+    with open(Options['log_file'], 'w') as f:
+        json.dump({'time_limit': Options['time_limit'], 'Start': {ModelFile['Names'][Label]: Value for Label, Value in ModelFile['Start'].items()}}, f)
+    return RaceStandIn(Settings, Solver, Options, ModelFile, Tee)
+
+def PortfolioModel():
+    Model = pyo.ConcreteModel()
+    Model.Item = pyo.RangeSet(1, 3)
+    Model.Take = pyo.Var(Model.Item, domain = pyo.NonNegativeIntegers, bounds = (0, 5))
+    def rule_Obj(Model):   # Defined inside the function, so the model can't be pickled
+        return sum(i * Model.Take[i] for i in Model.Item)
+    Model.Obj = pyo.Objective(rule = rule_Obj)
+    return Model
+
+def test_PortfolioSolve(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)   # The race solves write their log files in the working directory
+    Portfolio = [{'Condition': 'maxTimeLimit', 'Objective': 60}, {'Condition': 'maxTimeLimit', 'Objective': 55}]
+    Model = PortfolioModel()
+    Results, Winner = PortfolioSolve(Model, 'appsi_highs', {}, Portfolio, 30, Delay = 1, Target = PortfolioStandIn)
+    assert Winner is Model and Incumbent(Results) == 50 and Model.Take[1].value == 2   # The direct solve's incumbent is the best
+    for k in range(0, len(Portfolio)):
+        with open('highs-portfolio-' + str(k) + '.log', 'r') as f:
+            Log = json.load(f)
+        assert Log['time_limit'] <= 29   # The rest of the time limit after the direct solve
+        assert [Log['Start'][Name] for Name in ['Take[1]', 'Take[2]', 'Take[3]']] == [2, 0, 0]   # Started from the direct solve's incumbent
+    Portfolio[1] = {'Condition': 'optimal', 'Objective': 40}
+    Results, Winner = PortfolioSolve(PortfolioModel(), 'appsi_highs', {}, Portfolio, 30, Delay = 1, Target = PortfolioStandIn)
+    assert Incumbent(Results) == 40 and Results.solver.termination_condition == pyo.TerminationCondition.optimal
+    Portfolio = [{'Fail': True, 'Nothing': True}]   # No solution from the direct solve or the race, which isn't an error
+    Results, Winner = PortfolioSolve(PortfolioModel(), 'appsi_highs', {'Nothing': True}, Portfolio, 30, Delay = 1, Target = PortfolioStandIn)
+    assert Incumbent(Results) is None and Results.solver.termination_condition == pyo.TerminationCondition.maxTimeLimit
+    Results, Winner = PortfolioSolve(PortfolioModel(), 'appsi_highs', {}, Portfolio, 30, Delay = 0, Target = PortfolioStandIn)
+    assert Incumbent(Results) is None and Results.solver.termination_condition == pyo.TerminationCondition.noSolution
+
+def test_PortfolioSolveModel(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    Model = PortfolioModel()
+    Model.cTotal = pyo.Constraint(expr = sum(Model.Take[i] for i in Model.Item) >= 4)
+    Results, Winner = PortfolioSolve(Model, 'appsi_highs', {}, [{}, {'presolve': 'off'}], 30, Delay = 0, StartMethod = 'spawn')
+    assert Results.solver.termination_condition == pyo.TerminationCondition.optimal and pyo.value(Model.Obj) == 4
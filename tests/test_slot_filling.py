@@ -0,0 +1,52 @@
+# Checks of the slot filling engine in tv_slots/slot_filling.py: frame counts of durations, and filled breaks against brute force
+
+import itertools
+import os.path
+import numpy as np
+import pytest
+from conftest import LoadScript
+
+slot_filling = LoadScript(os.path.join('tv_slots', 'slot_filling.py'))
+
+# Halves round away from zero, as in Excel, rather than to even: 1 second at 2.5 frames per second is 3 frames, not 2
+def test_Frames():
+    assert list(slot_filling.Frames(['00:00:01;00', '00:00:03;00', '00:00:02;01'], 2.5)) == [3, 8, 6]   # Fixed width, read by character
+    assert list(slot_filling.Frames(['0:00:01;00', '42', '01:00:00;24'], 2.5)) == [3, 42, 9024]   # Read by regex
+    assert list(slot_filling.Frames(['00:00:30;12', '00:01:00;00'], 25)) == [762, 1500]
+    with pytest.raises(ValueError):
+        slot_filling.Frames(['00:00:30', '00:00:30;00'], 25)
+
+# Frames, promos and interstitials of every selection of up to Repeats copies of each item, within the count limits
+def BruteSelections(Data, Repeats):
+    Selections = []
+    for Counts in itertools.product(range(0, Repeats + 1), repeat = len(Data['Frames'])):
+        Counts = np.array(Counts)
+        p, i = Counts @ Data['Promo'], Counts @ (1 - Data['Promo'])
+        if Data['Min']['Promo'] <= p <= Data['Max']['Promo'] and Data['Min']['Interstitial'] <= i <= Data['Max']['Interstitial'] \
+                and Data['Min']['Total'] <= p + i <= Data['Max']['Total']:
+            Selections.append(Counts @ Data['Frames'])
+    return np.unique(Selections)
+
+@pytest.mark.parametrize('Repeats', [1, 2])
+def test_FillSlots(Repeats):
+    Random = np.random.default_rng(6)
+    for Case in range(0, 10):
+        n = 6 if Repeats == 1 else 4
+        Data = {'Frames': Random.integers(5, 40, n), 'Promo': Random.integers(0, 2, n),
+                'Min': {'Promo': 1, 'Interstitial': 0, 'Total': 2}, 'Max': {'Promo': 3, 'Interstitial': 2, 'Total': 4}}
+        Target = Random.integers(0, 150, 25)
+        Allowed = Random.integers(0, 6, 25)
+        Size = int(np.max(Target + Allowed)) + 1
+        Table = slot_filling.SlotTable(Data, Size, Repeats)
+        Filled, Within, Count = slot_filling.FillSlots(Data, Table, Target, Allowed)
+        Totals = BruteSelections(Data, Repeats)
+        Totals = Totals[Totals < Size]
+        for b in range(0, len(Target)):
+            Best = min(Totals, key = lambda t: (abs(t - Target[b]), t > Target[b]), default = None)   # Under the target on a tie
+            Expected = Best is not None and abs(Best - Target[b]) <= Allowed[b]
+            assert Within[b] == Expected
+            assert Filled[b] == (Best if Expected else 0)
+            assert Count[b] @ Data['Frames'] == Filled[b] and np.all(Count[b] <= Repeats)
+            if Expected:
+                p, i = Count[b] @ Data['Promo'], Count[b] @ (1 - Data['Promo'])
+                assert Data['Min']['Promo'] <= p <= Data['Max']['Promo'] and i <= Data['Max']['Interstitial'] and 2 <= p + i <= 4
@@ -0,0 +1,53 @@
+# Checks of the solution cache in Tools/solution_cache.py: a stored solution read back, misses when a setting or the data changes, the
+# nearest instance of the same family, entries that aren't final, and removing the least recently used. Also a round trip through gdp.py,
+# whose repeat run reports the cached solution without solving, until a setting changes
+
+import os
+import os.path
+import numpy as np
+import pyomo.environ as pyo
+from conftest import LoadScript, Root
+from solution_cache import InstanceKey, CachedSolution, NearestSolution, StoreSolution
+
+Data = {'Width': np.array([10, 20, 30]), 'Weight': np.array([1.0, 2.5, 1.0])}
+Settings = {'Model': 'test', 'Orders': 2, 'Options': {'time_limit': 60}}
+
+def test_CacheRoundTrip(tmp_path):
+    Folder = str(tmp_path)
+    Family, Key = InstanceKey(Data, Settings)
+    assert CachedSolution(Family, Key, Folder) is None
+    StoreSolution(Family, Key, Data, {'Objective': 42.0, 'Choice': np.array([0, 1, 1])}, Folder)
+    Entry = CachedSolution(Family, Key, Folder)
+    assert Entry['Objective'] == 42.0 and Entry['Choice'].tolist() == [0, 1, 1] and Entry['Data']['Weight'].tolist() == [1.0, 2.5, 1.0]
+    assert CachedSolution(*InstanceKey(Data, dict(Settings, Options = {'time_limit': 30})), Folder) is None   # A setting changed
+    Near = dict(Data, Width = np.array([10, 21, 30]))
+    NearFamily, NearKey = InstanceKey(Near, Settings)
+    assert NearFamily == Family and CachedSolution(NearFamily, NearKey, Folder) is None   # The data changed
+    assert NearestSolution(Family, Near, Folder)['Objective'] == 42.0
+    assert NearestSolution(Family, dict(Data, Width = np.array([10, 90, 30])), Folder) is None   # Too far
+    StoreSolution(NearFamily, NearKey, Near, {'Objective': 40.0}, Folder, Final = False)
+    assert CachedSolution(NearFamily, NearKey, Folder) is None and NearestSolution(Family, Near, Folder)['Objective'] == 40.0
+
+def test_CacheEviction(tmp_path):
+    Folder = str(tmp_path)
+    Keys = [InstanceKey(Data, dict(Settings, Orders = k)) for k in range(0, 3)]
+    for k, (Family, Key) in enumerate(Keys):
+        StoreSolution(Family, Key, Data, {'Objective': k}, Folder, MaxEntries = 2)
+        os.utime(os.path.join(Folder, Family + '-' + Key + '.pkl'), (k, k))   # Stored in order, whatever the file system's time resolution
+        if k == 1:
+            CachedSolution(*Keys[0], Folder)   # A hit makes the first entry the most recently used
+    assert CachedSolution(*Keys[0], Folder) is not None and CachedSolution(*Keys[1], Folder) is None and CachedSolution(*Keys[2], Folder) is not None
+
+def test_CacheCoverageModel(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)   # The cache and the solver's log file are in the working directory
+    gdp = LoadScript(os.path.join('GDP', 'gdp.py'))
+    gdp.Verbose, gdp.TimeLimit, gdp.UseCache = False, 60, True
+    Width, Length, Weight = gdp.GetData(os.path.join(Root, 'GDP', 'data-20-unsorted.xlsx'), 'Data')
+    Model, Results = gdp.Case(2, Width, Length, Weight)
+    Objective = pyo.value(Model.Obj())
+    assert Results is not None and len(os.listdir(os.path.join('.cache', 'solutions'))) == 1
+    Model, Results = gdp.Case(2, Width, Length, Weight)
+    assert Results is None and np.isclose(pyo.value(Model.Obj()), Objective)   # Reported from the cache, without solving
+    gdp.PruneDominated = True
+    Model, Results = gdp.Case(2, Width, Length, Weight)
+    assert Results is not None and np.isclose(pyo.value(Model.Obj()), Objective)   # Solved again, as a setting changed
@@ -0,0 +1,86 @@
+# Checks of the local job queue in Tools/solver_manager.py with stand-in jobs in spawned workers: futures resolve, at most Workers jobs run
+# at once on reused workers, a job over the memory budget fails without stopping the queue, cancelled jobs never run, and queued models
+# are solved with the thread budget
+
+import os
+import time as tm
+import pytest
+import pyomo.environ as pyo
+from solver_manager import LocalSolverManager
+
+# Stand-in for a solve: record the job's name in RunFile, hold Megabytes of memory for Seconds, and return the process and the time it ran
+def StandIn(Name, RunFile, Seconds, Megabytes = 0):
+    with open(RunFile, 'a') as f:
+        f.write(Name + '\n')
+    Start = tm.time()
+    Held = bytearray(Megabytes * 2**20)   # Zero filled, so the memory is used
+    tm.sleep(Seconds)
+    if Name == 'fail':
+        raise ValueError('stand-in failure')
+    return {'Name': Name, 'Pid': os.getpid(), 'Start': Start, 'End': tm.time(), 'Held': len(Held)}
+
+# Names of the jobs that ran
+def Ran(RunFile):
+    with open(RunFile, 'r') as f:
+        return f.read().split()
+
+def test_Pool(tmp_path):
+    RunFile = str(tmp_path / 'run.txt')
+    Manager = LocalSolverManager(Workers = 2, Target = StandIn, StartMethod = 'spawn')
+    Futures = [Manager.QueueJob((str(k), RunFile, 0.5)) for k in range(0, 6)] + [Manager.QueueJob(('fail', RunFile, 0))]
+    Results = [Future.result(timeout = 60) for Future in Futures[:-1]]
+    assert [Result['Name'] for Result in Results] == [str(k) for k in range(0, 6)]
+    with pytest.raises(RuntimeError, match = 'stand-in failure'):
+        Futures[-1].result(timeout = 60)
+    assert len({Result['Pid'] for Result in Results}) == 2   # Workers are reused
+    for Result in Results:   # At most two jobs at once
+        assert sum(Other['Start'] < Result['End'] and Result['Start'] < Other['End'] for Other in Results) <= 2
+    Manager.shutdown()
+
+def test_PoolMemoryLimit(tmp_path):
+    RunFile = str(tmp_path / 'run.txt')
+    Manager = LocalSolverManager(Workers = 1, MemoryLimit = 50, Target = StandIn, StartMethod = 'spawn')
+    Large = Manager.QueueJob(('large', RunFile, 10, 200))
+    Small = Manager.QueueJob(('small', RunFile, 0, 10))
+    with pytest.raises(MemoryError, match = 'more than the limit of 50 MB'):
+        Large.result(timeout = 60)
+    assert Small.result(timeout = 60)['Name'] == 'small'   # On a new worker, as the first was stopped
+    assert tm.time() < Small.result()['Start'] + 5
+    Manager.shutdown()
+
+def test_PoolCancel(tmp_path):
+    RunFile = str(tmp_path / 'run.txt')
+    Manager = LocalSolverManager(Workers = 1, Target = StandIn, StartMethod = 'spawn')
+    First = Manager.QueueJob(('first', RunFile, 1))
+    Cancelled = Manager.QueueJob(('cancelled', RunFile, 0))
+    Last = Manager.QueueJob(('last', RunFile, 0))
+    assert Cancelled.cancel()
+    assert First.result(timeout = 60)['Name'] == 'first' and Last.result(timeout = 60)['Name'] == 'last'
+    assert Ran(RunFile) == ['first', 'last']
+    Stopped = Manager.QueueJob(('stopped', RunFile, 60))
+    Waiting = Manager.QueueJob(('waiting', RunFile, 0))
+    while not Stopped.running():
+        tm.sleep(0.1)
+    Manager.shutdown()   # Stops the running job and cancels the waiting one
+    assert Waiting.cancelled()
+    with pytest.raises(RuntimeError, match = 'shut down'):
+        Stopped.result(timeout = 10)
+
+# Options given to the solve, to check the thread budget
+def Options(Settings, Engine, Options, ModelFile, Tee):
+    return Options
+
+def test_PoolQueueModel():
+    Model = pyo.ConcreteModel()
+    Model.x = pyo.Var(range(0, 3), domain = pyo.NonNegativeIntegers, bounds = (0, 4))
+    def rule_Capacity(Model):   # Defined inside the function, so the model can't be pickled
+        return 3 * Model.x[0] + 5 * Model.x[1] + 7 * Model.x[2] <= 17
+    Model.cCapacity = pyo.Constraint(rule = rule_Capacity)
+    Model.Obj = pyo.Objective(expr = 4 * Model.x[0] + 7 * Model.x[1] + 10 * Model.x[2], sense = pyo.maximize)
+    Manager = LocalSolverManager(Workers = 1, Threads = 2, StartMethod = 'spawn')
+    Results = Manager.solve(Model, options = {'time_limit': 10})
+    assert Results.solver.termination_condition == pyo.TerminationCondition.optimal and pyo.value(Model.Obj) == 24
+    Manager.shutdown()
+    Manager = LocalSolverManager(Workers = 1, Threads = 2, Target = Options, StartMethod = 'spawn')
+    assert Manager.queue(Model, options = {'time_limit': 10}).result(timeout = 60) == {'time_limit': 10, 'threads': 2}
+    Manager.shutdown()
@@ -0,0 +1,72 @@
+# Checks of the supervised solve in Tools/supervisor.py: a stand-in target that goes silent is killed and restarted with the next settings,
+# with each hang recorded, and a model with rules defined inside a function is solved from a model file in a spawned child process
+
+import json
+import os
+import time as tm
+import psutil
+import pyomo.environ as pyo
+from supervisor import SupervisedSolve, WriteModelFile, RemoveModelFile, SolveModelFile, LoadSolutionByName, FileModel
+
+Line = ' L       0       0         0   0.00%   2.31193553e-09  9490             100.00%     2739    269    225     11215     1.7s\n'
+
+# Stand-in for a solve: writes a progress line to the log and its process id to Pids, then goes silent (no CPU use or log output) unless
+# the settings include a random seed
+def SilentSolve(Settings, LogFile, Pids):
+    with open(Pids, 'a') as f:
+        f.write(str(os.getpid()) + '\n')
+    with open(LogFile, 'a') as f:
+        f.write(Line)
+    if 'random_seed' not in Settings:
+        tm.sleep(600)
+    return 'solved with ' + str(Settings)
+
+def test_SupervisedSolveRestarts(tmp_path):
+    LogFile, Pids, IncidentFile = str(tmp_path / 'highs.log'), str(tmp_path / 'pids.txt'), str(tmp_path / 'incidents.jsonl')
+    Restarts = [{'presolve': 'off'}, {'random_seed': 1}, {'random_seed': 2}]
+    Report = SupervisedSolve(SilentSolve, (LogFile, Pids), Restarts, Window = 1, LogFile = LogFile, Poll = 0.2, IncidentFile = IncidentFile, StartMethod = 'spawn')
+    assert Report['Status'] == 'finished' and Report['Result'] == "solved with {'random_seed': 1}" and Report['Settings'] == {'random_seed': 1}
+    assert [Incident['Settings'] for Incident in Report['Incidents']] == [{}, {'presolve': 'off'}]
+    with open(IncidentFile, 'r') as f:
+        assert [json.loads(Record) for Record in f] == Report['Incidents']
+    Incident = Report['Incidents'][0]
+    assert Incident['Attempt'] == 1 and Incident['Restarting'] and Incident['Silent for'] >= 1
+    assert Incident['Incumbent'] == 9490 and Incident['Log time'] == 1.7   # From the last progress line of the log
+    with open(Pids, 'r') as f:
+        Children = [int(Pid) for Pid in f]
+    assert len(Children) == 3 and not any(psutil.pid_exists(Pid) for Pid in Children[:2])   # The hung children were killed
+
+def test_SupervisedSolveHung(tmp_path):
+    LogFile, Pids = str(tmp_path / 'highs.log'), str(tmp_path / 'pids.txt')
+    Report = SupervisedSolve(SilentSolve, (LogFile, Pids), [{'presolve': 'off'}], Window = 1, LogFile = LogFile, Poll = 0.2, StartMethod = 'spawn')
+    assert Report['Status'] == 'hung' and Report['Result'] is None and len(Report['Incidents']) == 2
+    assert not Report['Incidents'][-1]['Restarting']
+
+# Knapsack with rules defined inside the function, so the model can't be pickled
+def LocalRuleModel():
+    Model = pyo.ConcreteModel()
+    Model.Item = pyo.RangeSet(1, 6)
+    Model.Take = pyo.Var(Model.Item, domain = pyo.NonNegativeIntegers, bounds = (0, 3))
+    def rule_Capacity(Model):
+        return sum((i + 2) * Model.Take[i] for i in Model.Item) <= 29
+    Model.cCapacity = pyo.Constraint(rule = rule_Capacity)
+    def rule_Obj(Model):
+        return sum((7 - i) * (i + 1) * Model.Take[i] for i in Model.Item) + 5
+    Model.Obj = pyo.Objective(rule = rule_Obj, sense = pyo.maximize)
+    return Model
+
+def test_SolveModelFile(tmp_path):
+    Expected = pyo.SolverFactory('appsi_highs').solve(LocalRuleModel()).problem.upper_bound
+    Model = LocalRuleModel()
+    ModelFile = WriteModelFile(Model, Folder = str(tmp_path))
+    LogFile = str(tmp_path / 'highs.log')
+    Report = SupervisedSolve(SolveModelFile, ('appsi_highs', {'time_limit': 10, 'log_file': LogFile}, ModelFile), [], LogFile = LogFile, StartMethod = 'spawn')
+    assert Report['Status'] == 'finished'
+    Results = Report['Result']
+    assert Results.solver.termination_condition == pyo.TerminationCondition.optimal and Results.problem.upper_bound == Expected
+    assert LoadSolutionByName(Model, Results) and pyo.value(Model.Obj) == Expected
+    FileCopy, Columns = FileModel(ModelFile['File'])   # The Pyomo model of the file, used for solvers other than HiGHS
+    pyo.SolverFactory('appsi_highs').solve(FileCopy)
+    assert pyo.value(FileCopy.Obj) == Expected and set(ModelFile['Names']) <= set(Columns)
+    RemoveModelFile(ModelFile)
+    assert not os.path.exists(ModelFile['File'])
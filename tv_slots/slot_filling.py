@@ -0,0 +1,306 @@
+# Promo and interstitial slot filling
+# Fill TV breaks with promo and interstitial items, so that the total duration of each break is as close as possible to its target
+# Python version of slot_filling_1.xlsx and slot_filling_2.xlsx, reading the same workbooks. Durations are 'hh:mm:ss;ff', i.e. a time plus
+# extra frames, converted to whole frames as in the workbooks, so all the arithmetic is exact integer frame counts
+
+# Import dependencies
+
+import pyomo.environ as pyo
+import pandas as pd
+import numpy as np
+import time as tm
+import os.path
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Tools'))   # Shared helpers
+from excel_data import LoadRanges
+from profiler import StartProfile, ProfilePhase, Profiled, WriteProfile
+from solution import ValueMatrix, WriteChunk
+
+# Layout of each workbook: cells of the target, frame rate and allowed range (± seconds, None if the workbook doesn't have one),
+# the Min/Max table of item counts by type, and the item table (Item, Promo, Interstitial, Duration)
+Layouts = {'slot_filling_1.xlsx': {'Worksheet': 'Model 1', 'Target': 'B3', 'FrameRate': 'B15', 'Range': None, 'Limits': 'A6:C8', 'Items': 'F4:I34'},
+           'slot_filling_2.xlsx': {'Worksheet': 'Model 2', 'Target': 'B3', 'FrameRate': 'B4', 'Range': 'B5', 'Limits': 'A8:C10', 'Items': 'F4:I34'}}
+
+# Frames of durations, as in the workbooks' Frames function: round(seconds x frame rate) + extra frames, where a duration is 'hh:mm:ss;ff'
+# A number is taken as a count of frames already. Excel rounds halves away from zero, so this does too rather than rounding halves to even
+# When every duration is exactly 'hh:mm:ss;ff', the digits are read straight from the characters, which is much faster than a regex
+def Frames(Durations, FrameRate):
+    Text = np.asarray(Durations).astype('S')
+    if Text.dtype.itemsize == 11:
+        Chars = np.frombuffer(Text.tobytes(), dtype = np.uint8).reshape(-1, 11).astype(np.int64)
+        if np.all(Chars[:, [2, 5]] == ord(':')) and np.all(Chars[:, 8] == ord(';')):
+            Digits = Chars[:, [0, 1, 3, 4, 6, 7, 9, 10]] - ord('0')
+            if np.all((Digits >= 0) & (Digits <= 9)):
+                Parts = Digits[:, 0::2] * 10 + Digits[:, 1::2]   # Hours, minutes, seconds, extra frames
+                Seconds = Parts[:, 0] * 3600 + Parts[:, 1] * 60 + Parts[:, 2]
+                return np.floor(Seconds * FrameRate + 0.5).astype(np.int64) + Parts[:, 3]
+    Durations = pd.Series(Durations).astype(str).str.strip()
+    Counted = Durations.str.fullmatch(r'\d+')
+    Parts = Durations[~Counted].str.extract(r'^(\d+):(\d+):(\d+);(\d+)$').astype(float)
+    if Parts.isna().any().any():
+        raise ValueError('Durations must be hh:mm:ss;ff or a count of frames: ' + ', '.join(Durations[~Counted][Parts.isna().any(axis = 1)].head(3)))
+    Result = np.empty(len(Durations), dtype = np.int64)
+    Result[Counted.to_numpy()] = Durations[Counted].astype(np.int64)
+    Seconds = Parts[0].to_numpy() * 3600 + Parts[1].to_numpy() * 60 + Parts[2].to_numpy()
+    Result[~Counted.to_numpy()] = np.floor(Seconds * FrameRate + 0.5).astype(np.int64) + Parts[3].to_numpy().astype(np.int64)
+    return Result
+
+# Get data
+
+@Profiled('Load data')
+def GetData(DataFile):
+    Layout = Layouts[os.path.basename(DataFile)]
+    Cells = [Layout[Name] for Name in ['Target', 'FrameRate', 'Range', 'Limits', 'Items'] if Layout[Name] is not None]
+    Ranges = LoadRanges(DataFile, Cells, Layout['Worksheet'])
+    Items = Ranges[Layout['Items']]
+    Items = Items[Items[3].astype(str).str.strip() != ''].reset_index(drop = True)   # The table can have blank rows at the end
+    Limits = Ranges[Layout['Limits']].set_index(0)
+    Data = {'Name': os.path.basename(DataFile),
+            'FrameRate': float(Ranges[Layout['FrameRate']].iloc[0, 0]),
+            'Item': Items[0].to_numpy().astype(np.int64),
+            'Promo': Items[1].to_numpy().astype(np.int64),
+            'Interstitial': Items[2].to_numpy().astype(np.int64),
+            'Duration': Items[3].astype(str).to_numpy(),
+            'Min': {Type: int(Limits.loc[Type, 1]) for Type in ['Promo', 'Interstitial', 'Total']},
+            'Max': {Type: int(Limits.loc[Type, 2]) for Type in ['Promo', 'Interstitial', 'Total']}}
+    if np.any(Data['Promo'] + Data['Interstitial'] != 1):
+        raise ValueError('Each item must be either a promo or an interstitial: ' + str(Data['Item'][Data['Promo'] + Data['Interstitial'] != 1]))
+    Data['Frames'] = Frames(Data['Duration'], Data['FrameRate'])
+    Data['Target'] = int(Frames([Ranges[Layout['Target']].iloc[0, 0]], Data['FrameRate'])[0])
+    Data['Range'] = DefaultRange if Layout['Range'] is None else float(Ranges[Layout['Range']].iloc[0, 0])
+    return Data
+
+# Allowed deviation from the target in frames, given in ± seconds, as in the workbook: rounded down
+def RangeFrames(Range, FrameRate):
+    return np.floor(np.asarray(Range, dtype = np.float64) * FrameRate).astype(np.int64)
+
+# Dynamic program
+
+# Every combination of items that can fill a break, as reachable (promos, interstitials, frames) states after each item. Each item can be used up
+# to Repeats times in a break, so this is a bounded knapsack, with each copy of an item as a 0/1 step. States are only kept up to Size frames
+# Reach[j, p, i, f] is True if p promos and i interstitials, with f frames in total, can be chosen from the first j copies
+# The table doesn't depend on the target, so one table serves every break, and filling a break is a lookup and a walk back through the table
+def SlotTable(Data, Size, Repeats = 1):
+    Copies = np.repeat(np.arange(0, len(Data['Frames'])), Repeats)   # Item of each step
+    Promos, Interstitials = Data['Max']['Promo'], Data['Max']['Interstitial']
+    Reach = np.zeros((len(Copies) + 1, Promos + 1, Interstitials + 1, Size), dtype = bool)
+    Reach[0, 0, 0, 0] = True
+    for j, k in enumerate(Copies):
+        Reach[j + 1] = Reach[j]
+        d = Data['Frames'][k]
+        if d >= Size:
+            continue
+        if Data['Promo'][k]:
+            Reach[j + 1, 1:, :, d:] |= Reach[j, :-1, :, :Size - d]
+        else:
+            Reach[j + 1, :, 1:, d:] |= Reach[j, :, :-1, :Size - d]
+    Promo, Interstitial = np.meshgrid(np.arange(0, Promos + 1), np.arange(0, Interstitials + 1), indexing = 'ij')
+    Valid = (Promo >= Data['Min']['Promo']) & (Interstitial >= Data['Min']['Interstitial']) \
+            & (Promo + Interstitial >= Data['Min']['Total']) & (Promo + Interstitial <= Data['Max']['Total'])
+    Order = np.argsort((Promo + Interstitial)[Valid], kind = 'stable')   # Fewest items first, when more than one count gives the same frames
+    Counts = np.column_stack((Promo[Valid], Interstitial[Valid]))[Order]
+    Final = Reach[-1][Counts[:, 0], Counts[:, 1]]   # Count x frames
+    Feasible = Final.any(axis = 0)   # Frames that a valid selection adds up to
+    Index = np.arange(0, Size)
+    return {'Size': Size,
+            'Copies': Copies,
+            'Reach': Reach,
+            'Counts': Counts,
+            'Choice': Final.argmax(axis = 0),   # First valid count for each feasible frames
+            'Below': np.maximum.accumulate(np.where(Feasible, Index, -1)),   # Most feasible frames up to each frame count, -1 if none
+            'Above': np.minimum.accumulate(np.where(Feasible, Index, Size)[::-1])[::-1]}   # Least feasible frames from each, Size if none
+
+# Fill breaks with the given target and allowed deviation (frames, one of each per break, with target + allowed less than the table size)
+# The deviation is the least possible, preferring to be under the target on a tie. Returns the frames of each break, whether it is within
+# the allowed range, and the count of each item (break x item). A break with no selection within its range gets none
+def FillSlots(Data, Table, Target, Allowed):
+    Low, High = Table['Below'][Target], Table['Above'][Target]
+    UnderBy = np.where(Low >= 0, Target - Low, np.iinfo(np.int64).max)
+    OverBy = np.where(High < Table['Size'], High - Target, np.iinfo(np.int64).max)
+    Filled = np.where(UnderBy <= OverBy, Low, High)
+    Within = np.minimum(UnderBy, OverBy) <= Allowed
+    Count = np.zeros((len(Target), len(Data['Frames'])), dtype = np.int64)
+    Rows = np.flatnonzero(Within)
+    f = Filled[Rows]
+    p, i = Table['Counts'][Table['Choice'][f]].T
+    for j in range(len(Table['Copies']), 0, -1):   # Walk back through the steps: a step is used if its state wasn't reachable without it
+        k = Table['Copies'][j - 1]
+        Used = ~Table['Reach'][j - 1, p, i, f]
+        Count[Rows[Used], k] += 1   # Each break at most once per step
+        f = f - Used * Data['Frames'][k]
+        if Data['Promo'][k]:
+            p = p - Used
+        else:
+            i = i - Used
+    return np.where(Within, Filled, 0), Within, Count
+
+# Breaks
+
+# Breaks to fill, in chunks of BreakChunk: the workbook's own target, or each row of BreaksFile. The file has a Target column (hh:mm:ss;ff, or
+# frames) and, optionally, a Range column (± seconds), otherwise each break has the workbook's range. Other columns are copied to the output
+def ReadBreaks(Data):
+    if BreaksFile is None:
+        yield pd.DataFrame({'Target': [Data['Target']], 'Range': [Data['Range']]})
+        return
+    for Breaks in pd.read_csv(BreaksFile, chunksize = BreakChunk, dtype = {'Target': str}):
+        Breaks['Target'] = Frames(Breaks['Target'], Data['FrameRate'])
+        if 'Range' not in Breaks:
+            Breaks['Range'] = Data['Range']
+        yield Breaks
+
+# Output table for a chunk of breaks, with the count of each item as a column
+def BreakTable(Data, Breaks, Filled, Within, Count):
+    Target = Breaks['Target'].to_numpy()
+    Solution = pd.DataFrame({'Frames': Filled,
+                             'Under': np.where(Within, np.maximum(Target - Filled, 0), 0),
+                             'Over': np.where(Within, np.maximum(Filled - Target, 0), 0),
+                             'Within allowed': Within,
+                             'Promos': Count[:, Data['Promo'] == 1].sum(axis = 1),
+                             'Interstitials': Count[:, Data['Interstitial'] == 1].sum(axis = 1)}, index = Breaks.index)
+    Table = pd.concat([Breaks, Solution, pd.DataFrame(Count, index = Breaks.index, columns = ['Item ' + str(k) for k in Data['Item']])], axis = 1)
+    Table.index.name = 'Break'
+    return Table
+
+# Print the selection for one break, like the workbook
+def WriteBreak(Data, Row):
+    print(f'Target:        {Row["Target"]:,.0f} frames (± {RangeFrames(Row["Range"], Data["FrameRate"]):,.0f} allowed)')
+    if not Row['Within allowed']:
+        print('No selection of items is within the allowed range\n')
+        return
+    print(f'Selected:      {Row["Frames"]:,.0f} frames, under {Row["Under"]:,.0f}, over {Row["Over"]:,.0f}')
+    print(f'Items:         {Row["Promos"]:,.0f} promos, {Row["Interstitials"]:,.0f} interstitials\n')
+    Selected = pd.DataFrame({'Item': Data['Item'], 'Type': np.where(Data['Promo'] == 1, 'Promo', 'Interstitial'), 'Duration': Data['Duration'],
+                             'Frames': Data['Frames'], 'Select': [Row['Item ' + str(k)] for k in Data['Item']]})
+    print(Selected[Selected['Select'] > 0].to_string(index = False), '\n')
+
+# Fill each break independently, by dynamic programming, a chunk of breaks at a time. The table is rebuilt larger if a chunk has a longer break
+@Profiled('Fill breaks')
+def FillBreaks(Data):
+    Table, Count, Outside = None, 0, 0
+    Started = tm.perf_counter()
+    for Chunk, Breaks in enumerate(ReadBreaks(Data), 1):
+        Target = Breaks['Target'].to_numpy(dtype = np.int64)
+        Allowed = RangeFrames(Breaks['Range'], Data['FrameRate'])
+        Size = int((Target + Allowed).max()) + 1
+        if Table is None or Size > Table['Size']:
+            with ProfilePhase('Slot table'):
+                Table = SlotTable(Data, Size if Table is None else max(Size, 2 * Table['Size']), MaxRepeats)
+        Solution = BreakTable(Data, Breaks, *FillSlots(Data, Table, Target, Allowed))
+        if BreaksOutput is not None:
+            WriteChunk(Solution, BreaksOutput, Chunk)
+        if BreaksFile is None:
+            WriteBreak(Data, Solution.iloc[0])
+        Count += len(Breaks)
+        Outside += int((~Solution['Within allowed']).sum())
+        if Verbose and BreaksFile is not None:
+            print(f'Chunk {Chunk:>6,.0f}: {Count:>12,.0f} breaks, {Count / (tm.perf_counter() - Started):>12,.0f} per second')
+    Elapsed = tm.perf_counter() - Started
+    print(f'Breaks:        {Count:,.0f}, of which {Outside:,.0f} have no selection within the allowed range')
+    print(f'Time:          {Elapsed:,.3f} seconds, {Count / max(Elapsed, 1e-9):,.0f} breaks per second')
+
+# Schedule model, for limits across breaks
+
+# All breaks at once as a MIP, when there are limits on how often each item airs across the breaks, which the dynamic program can't handle
+# The deviation of each break is limited to its allowed range, so breaks without a selection in range (found by the dynamic program) are left out
+@Profiled('Define model')
+def DefineModel(Data, Target, Allowed):
+    Model = pyo.ConcreteModel(name = 'Slot filling schedule - ' + Data['Name'])
+    Model.Breaks = pyo.Set(initialize = range(0, len(Target)))
+    Model.Items = pyo.Set(initialize = range(0, len(Data['Item'])))
+    Model.Promos = pyo.Set(initialize = np.flatnonzero(Data['Promo'] == 1).tolist())
+    Model.Interstitials = pyo.Set(initialize = np.flatnonzero(Data['Interstitial'] == 1).tolist())
+
+    Model.Select = pyo.Var(Model.Breaks, Model.Items, within = pyo.NonNegativeIntegers, bounds = (0, MaxRepeats))
+    Model.Under = pyo.Var(Model.Breaks, within = pyo.NonNegativeReals, bounds = lambda Model, b: (0, Allowed[b]))
+    Model.Over = pyo.Var(Model.Breaks, within = pyo.NonNegativeReals, bounds = lambda Model, b: (0, Allowed[b]))
+
+    def rule_Duration(Model, B):
+        return sum(int(Data['Frames'][k]) * Model.Select[B, k] for k in Model.Items) - Model.Over[B] + Model.Under[B] == int(Target[B])
+    Model.Duration = pyo.Constraint(Model.Breaks, rule = rule_Duration)
+
+    def rule_TypeCount(Model, B, Type):
+        Items = {'Promo': Model.Promos, 'Interstitial': Model.Interstitials, 'Total': Model.Items}[Type]
+        return (Data['Min'][Type], sum(Model.Select[B, k] for k in Items), Data['Max'][Type])
+    Model.TypeCount = pyo.Constraint(Model.Breaks, ['Promo', 'Interstitial', 'Total'], rule = rule_TypeCount)
+
+    def rule_Airings(Model, K):
+        return (MinAirings, sum(Model.Select[b, K] for b in Model.Breaks), MaxAirings)
+    Model.Airings = pyo.Constraint(Model.Items, rule = rule_Airings)
+
+    def rule_Obj(Model):
+        return sum(Model.Under[b] + Model.Over[b] for b in Model.Breaks)   # Total deviation from the targets, in frames
+    Model.Obj = pyo.Objective(rule = rule_Obj, sense = pyo.minimize)
+    return Model
+
+def CallSolver(Model):
+    Solver = pyo.SolverFactory('appsi_highs')
+    Solver.options['time_limit'] = TimeLimit
+    Solver.options['log_file'] = 'highs.log'
+    with ProfilePhase('Solve'):
+        Results = Solver.solve(Model, load_solutions = False, tee = Verbose)
+    return Results
+
+# Fill all breaks together with the schedule model. The breaks are read all at once, as the model covers them all. The total deviation of
+# the breaks filled independently by dynamic programming is a lower bound, as the model only adds the limits across breaks
+@Profiled('Schedule')
+def ScheduleBreaks(Data):
+    Breaks = pd.concat(ReadBreaks(Data))
+    Target = Breaks['Target'].to_numpy(dtype = np.int64)
+    Allowed = RangeFrames(Breaks['Range'], Data['FrameRate'])
+    Table = SlotTable(Data, int((Target + Allowed).max()) + 1, MaxRepeats)
+    Filled, Within, Count = FillSlots(Data, Table, Target, Allowed)
+    Bound = np.abs(Filled - Target)[Within].sum()
+    Rows = np.flatnonzero(Within)
+    Model = DefineModel(Data, Target[Rows], Allowed[Rows])
+    Results = CallSolver(Model)
+    Condition = Results.solver.termination_condition
+    print(Model.name, '\n')
+    print('Status:', Condition)
+    if Condition not in [pyo.TerminationCondition.optimal, pyo.TerminationCondition.maxTimeLimit] or not np.isfinite(Results.problem.upper_bound):
+        print('No solution loaded\n')
+        return
+    Model.solutions.load_from(Results)
+    Count[:] = 0
+    Count[Rows] = np.round(ValueMatrix(Model.Select, list(Model.Breaks), list(Model.Items))).astype(np.int64)
+    Filled[Rows] = Count[Rows] @ Data['Frames']
+    Solution = BreakTable(Data, Breaks, Filled, Within, Count)
+    print(f'Deviation:     {pyo.value(Model.Obj):,.0f} frames in total, at least {Bound:,.0f} (breaks filled independently)')
+    print(f'Breaks:        {len(Breaks):,.0f}, of which {len(Breaks) - len(Rows):,.0f} have no selection within the allowed range\n')
+    if BreaksOutput is not None:
+        WriteChunk(Solution, BreaksOutput, 1)
+    if BreaksFile is None:
+        WriteBreak(Data, Solution.iloc[0])
+
+def Main():
+    if Profile:
+        StartProfile(ProfileFile, Script = 'slot_filling', DataFile = DataFile)
+    Data = GetData(DataFile)
+    if MaxAirings is None and MinAirings == 0:
+        FillBreaks(Data)
+    else:
+        ScheduleBreaks(Data)
+    WriteProfile()
+
+# Globals
+
+DataFile = 'slot_filling_2.xlsx'   # slot_filling_1.xlsx or slot_filling_2.xlsx
+DefaultRange = 4   # ± seconds allowed around the target, for workbooks that don't have an allowed range (slot_filling_1.xlsx)
+MaxRepeats = 1   # Most times an item can be used in one break
+Verbose = True
+Profile = False   # Record the wall time, CPU time and peak memory of each phase
+ProfileFile = 'profile.jsonl'   # Profile records as JSON lines, appended to by each run
+
+# Break options
+
+BreaksFile = None   # CSV file of breaks to fill, with a Target column and optionally a Range column, rather than the workbook's target, e.g. 'breaks.csv'
+BreakChunk = 100000   # Breaks read, filled and written at a time
+BreaksOutput = None   # File for the frames and item counts of each break, written a chunk at a time, e.g. 'breaks.csv' or 'breaks.parquet'
+
+# Schedule options. With either limit, all breaks are filled together by a MIP solved with HiGHS, rather than each by dynamic programming
+
+MaxAirings = None   # Most times each item can air across all breaks, e.g. for rotation of promos. None for no limit
+MinAirings = 0   # Least times each item must air across all breaks
+TimeLimit = 60   # seconds, for the MIP
+
+if __name__ == '__main__':
+    Main()